@@ -1,80 +1,82 @@
-import os, json
-from groq import Groq
+import os, re, json, time, asyncio, weakref, threading, contextvars
+from concurrent.futures import ThreadPoolExecutor
+from cache import result_cache, normalize_text, make_key
+from chunking import estimate_tokens, split_sections, merge_results, recompute_summary, quality_label, LIST_SECTIONS
+from json_stream import SectionStreamParser, recover_json
+from doc_diff import diff_documents, render_hunks
+from metrics import span, observe_document, record_usage, INPUT_TOKENS
+from normalize import normalize_document
+from compact_schema import expand, expand_section
+from routing import RoutePlan, routes_key
+from scheduler import Scheduler, SingleFlight, AsyncSingleFlight, StreamFlight
 
-client = Groq(api_key=os.environ.get("GROQ_API_KEY"))
+_scheduler   = Scheduler()
+_flights     = SingleFlight()     # identical analyses in flight share one upstream call
 
-SYSTEM_PROMPT = """You are an expert software requirements analyst. 
-Analyze the provided software requirements document and return ONLY valid JSON with this exact structure:
+TEMPERATURE        = 0.3     # model and max_tokens are chosen per request by routing.RoutePlan
+CHUNK_TOKENS       = int(os.environ.get("REQMIND_CHUNK_TOKENS", "6000"))
+CHUNK_WORKERS      = int(os.environ.get("REQMIND_CHUNK_WORKERS", "4"))
+LLM_CONCURRENCY    = int(os.environ.get("REQMIND_LLM_CONCURRENCY", "8"))
+LLM_TIMEOUT        = float(os.environ.get("REQMIND_LLM_TIMEOUT", "120"))
+DIFF_FULL_RATIO    = 0.6    # compare whole documents once this share of the text has changed
+CONTINUE_ROUNDS    = int(os.environ.get("REQMIND_CONTINUE_ROUNDS", "2"))   # 0 disables continuations
+OUTPUT_FORMAT      = os.environ.get("REQMIND_OUTPUT_FORMAT", "compact")      # "compact" rows or full "json"
+JSON_BUDGET_SCALE  = 2.5    # full JSON spends about this many times the output tokens of compact rows
 
-{
-  "project_info": {
-    "detected_type": "E-commerce / Hospital System / LMS / FinTech / ERP / Social Media / Other",
-    "complexity": "Small / Medium / Large",
-    "complexity_reason": "brief reason",
-    "total_requirements_count": 0
-  },
-  "quality_score": {
-    "overall": 0,
-    "clarity": 0,
-    "completeness": 0,
-    "consistency": 0,
-    "testability": 0,
-    "breakdown": "brief explanation of score"
-  },
-  "functional_requirements": [
-    {"id": "FR1", "description": "...", "priority": "High/Medium/Low", "category": "Core/Secondary/Optional"}
-  ],
-  "non_functional_requirements": [
-    {"id": "NFR1", "category": "Performance/Security/Usability/Scalability/Reliability", "description": "..."}
-  ],
-  "constraints": [
-    {"id": "CON1", "description": "..."}
-  ],
-  "risks": [
-    {"id": "RSK1", "type": "Security/Scalability/Performance/Privacy/Compliance", "description": "...", "severity": "High/Medium/Low"}
-  ],
-  "ambiguities": [
-    {"id": "AMB1", "text": "...", "issue": "why it is ambiguous", "suggestion": "how to fix it"}
-  ],
-  "missing_information": [
-    {"id": "MI1", "area": "...", "description": "what is missing", "impact": "High/Medium/Low"}
-  ],
-  "scope_creep": [
-    {"id": "SC1", "statement": "exact text from document", "reason": "why this is scope creep"}
-  ],
-  "clarification_questions": {
-    "client": [{"id": "CQ1", "question": "..."}],
-    "developer": [{"id": "DQ1", "question": "..."}],
-    "tester": [{"id": "TQ1", "question": "..."}],
-    "project_manager": [{"id": "PQ1", "question": "..."}]
-  },
-  "summary": {
-    "total_fr": 0,
-    "total_nfr": 0,
-    "total_ambiguities": 0,
-    "total_risks": 0,
-    "total_scope_creep": 0,
-    "overall_quality": "Good/Fair/Poor",
-    "recommendation": "..."
-  }
+ANALYSIS_SECTIONS = (
+    "project_info", "quality_score", "functional_requirements", "non_functional_requirements",
+    "constraints", "risks", "ambiguities", "missing_information", "scope_creep",
+    "clarification_questions", "summary",
+)
+
+# Asked for together when only some sections are wanted: one focused request per group, run concurrently.
+SECTION_GROUPS = (
+    ("project_info", "quality_score", "summary"),
+    ("functional_requirements", "non_functional_requirements", "constraints"),
+    ("risks", "missing_information"),
+    ("ambiguities", "scope_creep"),
+    ("clarification_questions",),
+)
+# summary totals and the list each one counts; a total is only kept when its list was analyzed
+SUMMARY_TOTALS = {
+    "total_fr": "functional_requirements", "total_nfr": "non_functional_requirements",
+    "total_ambiguities": "ambiguities", "total_risks": "risks", "total_scope_creep": "scope_creep",
 }
+SCHEMA_LINE_RE = re.compile(r'^\{?"(\w+)":')
 
-Return ONLY the JSON. No extra text. No markdown."""
+SYSTEM_PROMPT = """You are an expert software requirements analyst.
+Analyze the requirements document and return ONLY valid JSON, no markdown or extra text, in this schema
+(a|b: one of; s: text; n: integer 0-100; i: integer; L: "High|Medium|Low"; lists: any length, ids counting up from 1):
+{"project_info":{"detected_type":"E-commerce|Hospital System|LMS|FinTech|ERP|Social Media|Other","complexity":"Small|Medium|Large","complexity_reason":s,"total_requirements_count":i},
+"quality_score":{"overall":n,"clarity":n,"completeness":n,"consistency":n,"testability":n,"breakdown":s},
+"functional_requirements":[{"id":"FR1","description":s,"priority":L,"category":"Core|Secondary|Optional"}],
+"non_functional_requirements":[{"id":"NFR1","category":"Performance|Security|Usability|Scalability|Reliability","description":s}],
+"constraints":[{"id":"CON1","description":s}],
+"risks":[{"id":"RSK1","type":"Security|Scalability|Performance|Privacy|Compliance","description":s,"severity":L}],
+"ambiguities":[{"id":"AMB1","text":s,"issue":"why it is ambiguous","suggestion":"how to fix it"}],
+"missing_information":[{"id":"MI1","area":s,"description":"what is missing","impact":L}],
+"scope_creep":[{"id":"SC1","statement":"exact text from document","reason":"why this is scope creep"}],
+"clarification_questions":{"client":[{"id":"CQ1","question":s}],"developer":[{"id":"DQ1","question":s}],"tester":[{"id":"TQ1","question":s}],"project_manager":[{"id":"PQ1","question":s}]},
+"summary":{"total_fr":i,"total_nfr":i,"total_ambiguities":i,"total_risks":i,"total_scope_creep":i,"overall_quality":"Good|Fair|Poor","recommendation":s}}"""
 
 
-def analyze_requirements(text: str) -> dict:
-    response = client.chat.completions.create(
-        model="llama-3.3-70b-versatile",
-        messages=[
-            {"role": "system", "content": SYSTEM_PROMPT},
-            {"role": "user",   "content": f"Analyze this software requirements document:\n\n{text}"}
-        ],
-        temperature=0.3,
-        max_tokens=6000
-    )
-    raw = response.choices[0].message.content
-    raw = raw.strip().removeprefix("```json").removeprefix("```").removesuffix("```").strip()
-    return json.loads(raw)
+# Same analysis, but list items as positional rows; compact_schema.expand restores the schema above.
+COMPACT_PROMPT = """You are an expert software requirements analyst.
+Analyze the requirements document and return ONLY valid JSON, no markdown or extra text, in this schema
+(a|b: one of; s: text; n: integer 0-100; L: "H|M|L" for High|Medium|Low).
+List items are rows: arrays of the listed fields in that order, without ids or keys.
+{"project_info":{"detected_type":"E-commerce|Hospital System|LMS|FinTech|ERP|Social Media|Other","complexity":"Small|Medium|Large","complexity_reason":s},
+"quality_score":{"overall":n,"clarity":n,"completeness":n,"consistency":n,"testability":n,"breakdown":s},
+"functional_requirements":[[description,priority L,category "Core|Secondary|Optional"]],
+"non_functional_requirements":[[category "Performance|Security|Usability|Scalability|Reliability",description]],
+"constraints":[description s],
+"risks":[[type "Security|Scalability|Performance|Privacy|Compliance",description,severity L]],
+"ambiguities":[[exact text,why it is ambiguous,how to fix it]],
+"missing_information":[[area,what is missing,impact L]],
+"scope_creep":[[exact text from document,why this is scope creep]],
+"clarification_questions":{"client":[question s],"developer":[question s],"tester":[question s],"project_manager":[question s]},
+"summary":{"overall_quality":"Good|Fair|Poor","recommendation":s}}
+Example: "functional_requirements":[["Users can reset their password by email","H","Core"]],"constraints":["Must run on AWS"]"""
 
 
 COMPARE_PROMPT = """You are a software requirements analyst.
@@ -89,17 +91,744 @@ Compare the OLD and NEW requirement documents and return ONLY valid JSON:
 }
 Return ONLY the JSON."""
 
+DIFF_PROMPT = """You are a software requirements analyst.
+You are given ONLY the changed parts of a requirements document between its OLD and NEW version.
+Lines starting with "-" exist only in the old version, lines starting with "+" only in the new one,
+and context lines are unchanged. Return ONLY valid JSON:
+{
+  "modified": [{"id": "M1", "old": "old text", "new": "new text"}],
+  "added": [{"id": "A1", "description": "requirement that only appears in a CHANGE's + lines"}],
+  "removed": [{"id": "R1", "description": "requirement that only appears in a CHANGE's - lines"}],
+  "scope_changes": ["description of scope change"],
+  "quality_change": {"old_score": 0, "new_score": 0, "verdict": "Improved/Degraded/Same"},
+  "summary": "overall summary of changes"
+}
+ADDED LINES and REMOVED LINES are already recorded; use them only to judge scope and quality.
+Return ONLY the JSON."""
+
+
+# ── Request building ──────────────────────────────────────────────────────────
+def _parse_json(raw: str, sections: tuple = ()) -> dict:
+    """Parse a model response, salvaging truncated or prose-wrapped JSON.
+
+    A salvaged result carries ``partial = {"missing": [...], "truncated": [...]}``
+    naming the expected ``sections`` it lacks and the one that was cut off.
+    """
+    with span("parse", chars=len(raw)) as attrs:
+        recovered = recover_json(raw)
+        attrs["complete"] = recovered.complete
+    result = recovered.value
+    if not recovered.complete:
+        truncated = [recovered.open_key] if recovered.open_key else []
+        result["partial"] = {
+            "missing":   [s for s in sections if s not in result],
+            "truncated": truncated,
+        }
+    return result
+
+
+def _focus(prompt: str, sections: tuple) -> str:
+    """``prompt`` with its schema cut down to ``sections``."""
+    head, rows, tail = [], [], []
+    for line in prompt.splitlines():
+        m = SCHEMA_LINE_RE.match(line)
+        if m:
+            if m.group(1) in sections:
+                rows.append(line.lstrip("{").rstrip(","))
+        else:
+            (tail if rows or tail else head).append(line)
+    if rows[-1].endswith("}}"):
+        rows[-1] = rows[-1][:-1]    # the schema's closing brace
+    if not any(s in LIST_SECTIONS for s in sections):
+        tail = []       # the example only shows list rows
+    return "\n".join(head + ["{" + ",\n".join(rows) + "}"] + tail)
+
+
+def _analysis_prompt(sections: tuple = None) -> str:
+    prompt = COMPACT_PROMPT if OUTPUT_FORMAT == "compact" else SYSTEM_PROMPT
+    return prompt if sections is None else _focus(prompt, sections)
+
+
+def _analysis_plan(text: str, sections: tuple = None) -> RoutePlan:
+    return RoutePlan(text, budget_scale=1.0 if OUTPUT_FORMAT == "compact" else JSON_BUDGET_SCALE,
+                     sections=sections)
+
+
+def _parse_analysis(raw: str, sections: tuple = ANALYSIS_SECTIONS) -> dict:
+    """``_parse_json`` for analysis responses, expanded into the standard schema."""
+    return expand(_parse_json(raw, sections))
+
+
+def _selection(sections) -> tuple:
+    """``sections`` in schema order, or None when every section is wanted (one full request)."""
+    if sections is None:
+        return None
+    unknown = set(sections) - set(ANALYSIS_SECTIONS)
+    if unknown:
+        raise ValueError(f"unknown analysis sections: {', '.join(sorted(unknown))}")
+    if not sections:
+        raise ValueError("no analysis sections requested")
+    selected = tuple(s for s in ANALYSIS_SECTIONS if s in sections)
+    return None if selected == ANALYSIS_SECTIONS else selected
+
+
+def _focused_groups(sections: tuple) -> list:
+    return [g for g in (tuple(s for s in group if s in sections) for group in SECTION_GROUPS) if g]
+
+
+def select_sections(result: dict, sections: tuple) -> dict:
+    """``result`` in the standard schema with only ``sections`` filled in; the rest are empty."""
+    if sections is None:
+        return result
+    if "summary" in sections:
+        recompute_summary(result)
+        result["summary"] = {k: v for k, v in result["summary"].items()
+                             if k not in SUMMARY_TOTALS or SUMMARY_TOTALS[k] in sections}
+    if "project_info" in sections and not {"functional_requirements", "non_functional_requirements"} <= set(sections):
+        result["project_info"].pop("total_requirements_count", None)
+    selected = {s: result[s] if s in sections and s in result else [] if s in LIST_SECTIONS else {}
+                for s in ANALYSIS_SECTIONS}
+    return {**selected, **{k: v for k, v in result.items() if k not in selected}}
+
+
+def _chunk_sections(sections: tuple) -> tuple:
+    """What each chunk is asked for: merging labels the summary from the merged quality score."""
+    if sections is None or "summary" not in sections:
+        return sections
+    return tuple(s for s in ANALYSIS_SECTIONS if s in sections or s == "quality_score")
+
+
+def _merge_focused(parts: list, sections: tuple) -> dict:
+    """One result from the focused requests' results, with their ``partial`` notes combined."""
+    result, partial = {}, {"missing": [], "truncated": []}
+    for group, part in zip(_focused_groups(sections), parts):
+        for section in group:
+            if section in part:
+                result[section] = part[section]
+        for kind in partial:
+            partial[kind] += part.get("partial", {}).get(kind, [])
+    if partial["missing"] or partial["truncated"]:
+        result["partial"] = partial
+    return select_sections(result, sections)
+
+
+def _continue_request(text: str, result: dict, plan: RoutePlan):
+    """Request only the sections a partial result lacks, or None if there is nothing to ask for."""
+    partial = result.get("partial")
+    if not partial:
+        return None
+    # a list cut off mid-way keeps its salvaged items: regenerating it would likely hit the same limit
+    wanted = [s for s in partial["truncated"] if not (isinstance(result.get(s), list) and result[s])]
+    wanted += partial["missing"]
+    if not wanted:
+        return None
+    request = _analyze_request(text, plan)
+    request["messages"][0] = {"role": "system", "content": _analysis_prompt(plan.sections) + (
+        "\n\nA previous answer was cut off. Return ONLY a JSON object with these top-level keys, "
+        "in the structure above: " + ", ".join(wanted))}
+    return request
+
+
+def _fill_partial(result: dict, raw: str) -> dict:
+    """Merge a continuation response into a partial result; what it still lacks stays listed."""
+    partial = result["partial"]
+    try:
+        extra = _parse_analysis(raw, ())
+    except json.JSONDecodeError:
+        return result
+    cut    = extra.get("partial", {}).get("truncated", [])
+    filled = [s for s in partial["truncated"] + partial["missing"] if s in extra and s not in cut]
+    for section in filled:
+        result[section] = extra[section]
+    partial["truncated"] = [s for s in partial["truncated"] if s not in filled]
+    partial["missing"]   = [s for s in partial["missing"] if s not in filled]
+    if not (partial["truncated"] or partial["missing"]):
+        del result["partial"]
+    return result
 
-def compare_documents(old_text: str, new_text: str) -> dict:
-    response = client.chat.completions.create(
-        model="llama-3.3-70b-versatile",
+
+def _settle_partial(result: dict) -> dict:
+    # totals must describe the sections actually salvaged, not what the cut-off answer claimed
+    recompute_summary(result)
+    result["summary"].setdefault("overall_quality", quality_label(result.get("quality_score", {}).get("overall")))
+    return result
+
+
+def _analyze_key(text: str, sections: tuple = None) -> str:
+    return make_key("analyze", _analysis_prompt(sections), routes_key(), TEMPERATURE, normalize_text(text))
+
+
+def _analyze_request(text: str, plan: RoutePlan) -> dict:
+    return plan.request(dict(
+        messages=[
+            {"role": "system", "content": _analysis_prompt(plan.sections)},
+            {"role": "user",   "content": f"Analyze this software requirements document:\n\n{text}"}
+        ],
+        temperature=TEMPERATURE,
+    ))
+
+
+def _chunked_key(text: str, sections: tuple = None) -> str:
+    return make_key("analyze-chunked", _analysis_prompt(sections), routes_key(), TEMPERATURE,
+                    CHUNK_TOKENS, normalize_text(text))
+
+
+def _merge_chunks(chunks: list, outcomes: list) -> tuple:
+    partials, weights, errors = [], [], []
+    for chunk, outcome in zip(chunks, outcomes):
+        if isinstance(outcome, BaseException):
+            errors.append(outcome)
+        else:
+            partials.append(outcome)
+            weights.append(len(chunk))
+    # a few failed chunks still leave a useful report; only fail if nothing came back
+    if not partials:
+        raise errors[0]
+    result = merge_results(partials, weights)
+    result["chunking"] = {"chunks": len(chunks), "failed": len(errors),
+                          "partial": sum("partial" in p for p in partials)}
+    return result, errors
+
+
+def _compare_key(old_text: str, new_text: str) -> str:
+    return make_key("compare", COMPARE_PROMPT, DIFF_PROMPT, routes_key(), TEMPERATURE,
+                    normalize_text(old_text), normalize_text(new_text))
+
+
+def _compare_request(old_text: str, new_text: str) -> dict:
+    return dict(
         messages=[
             {"role": "system", "content": COMPARE_PROMPT},
             {"role": "user", "content": f"OLD DOCUMENT:\n{old_text}\n\nNEW DOCUMENT:\n{new_text}"}
         ],
-        temperature=0.3,
-        max_tokens=4000
+        temperature=TEMPERATURE,
     )
-    raw = response.choices[0].message.content
-    raw = raw.strip().removeprefix("```json").removeprefix("```").removesuffix("```").strip()
-    return json.loads(raw)
\ No newline at end of file
+
+
+def _compare_plan(old_text: str, new_text: str) -> tuple:
+    """Diff locally and return ``(local_result, request)``; ``request`` is None when no LLM call is needed.
+
+    ``request`` has no model or ``max_tokens`` yet: those come from its ``RoutePlan``.
+    """
+    diff = diff_documents(old_text, new_text)
+    if diff.identical:
+        return {
+            "added": [], "removed": [], "modified": [], "scope_changes": [],
+            "quality_change": {"old_score": None, "new_score": None, "verdict": "Same"},
+            "summary": "The documents are identical; no requirements changed.",
+        }, None
+
+    if diff.changed_chars > DIFF_FULL_RATIO * (len(old_text) + len(new_text)):
+        return None, _compare_request(old_text, new_text)
+
+    local = {
+        "added":   [{"description": l} for l in diff.added],
+        "removed": [{"description": l} for l in diff.removed],
+    }
+    request = dict(
+        messages=[
+            {"role": "system", "content": DIFF_PROMPT},
+            {"role": "user", "content": render_hunks(diff)}
+        ],
+        temperature=TEMPERATURE,
+    )
+    return local, request
+
+
+def _finish_compare(local: dict, judged: dict) -> dict:
+    if local is None:
+        return judged
+    result = {}
+    for field, prefix in (("added", "A"), ("removed", "R"), ("modified", "M")):
+        items = local.get(field, []) + [i for i in judged.get(field, []) if isinstance(i, dict)]
+        result[field] = [{"id": f"{prefix}{n}", **{k: v for k, v in item.items() if k != "id"}}
+                         for n, item in enumerate(items, 1)]
+    for field in ("scope_changes", "quality_change", "summary"):
+        result[field] = judged.get(field)
+    return result
+
+
+def _prompt_chars(request: dict) -> int:
+    return sum(len(m["content"]) for m in request["messages"])
+
+
+def _prepare(text: str) -> str:
+    """Normalize a document before it is keyed, chunked or sent (see ``normalize``)."""
+    with span("normalize", tokens_before=estimate_tokens(text)) as attrs:
+        normalized = normalize_document(text)
+        attrs["tokens_after"] = estimate_tokens(normalized)
+    INPUT_TOKENS.inc(attrs["tokens_before"], stage="raw")
+    INPUT_TOKENS.inc(attrs["tokens_after"], stage="normalized")
+    return normalized
+
+
+def _cached(key: str, use_cache: bool):
+    return result_cache.get(key) if use_cache else None
+
+
+# ── Sync API ──────────────────────────────────────────────────────────────────
+def _complete(request: dict, plan: RoutePlan = None) -> str:
+    with span("llm", model=request["model"], prompt_chars=_prompt_chars(request)) as attrs:
+        response = _scheduler.call(request, lambda: _sync_client().chat.completions.create(**request))
+        record_usage(request["model"], response.usage, attrs)
+    if plan is not None:
+        plan.charge(attrs)
+    return response.choices[0].message.content
+
+
+def _continue_partial(text: str, result: dict, plan: RoutePlan) -> dict:
+    """Ask for a partial result's missing sections, up to ``CONTINUE_ROUNDS`` times."""
+    for _ in range(CONTINUE_ROUNDS):
+        request = _continue_request(text, result, plan)
+        if request is None:
+            break
+        try:
+            raw = _complete(request, plan)
+        except Exception:
+            break       # the salvaged sections are still worth returning
+        result = _fill_partial(result, raw)
+    return _settle_partial(result)
+
+
+def _routed(plan: RoutePlan, attempt) -> dict:
+    """Run ``attempt()`` on the plan's tier, moving up a tier while its answer is invalid or doubtful."""
+    while True:
+        with plan.attempt() as attrs:
+            try:
+                result = attempt()
+                reason = plan.doubt(result)
+            except json.JSONDecodeError as e:
+                result, reason = e, "invalid_json"
+            attrs["outcome"] = reason or "ok"
+        if not reason or not plan.escalate(reason):
+            break
+    if isinstance(result, json.JSONDecodeError):
+        raise result
+    return result
+
+
+def _analyze_routed(text: str, plan: RoutePlan) -> dict:
+    def attempt():
+        result = _parse_analysis(_complete(_analyze_request(text, plan), plan), plan.sections or ANALYSIS_SECTIONS)
+        return _continue_partial(text, result, plan) if "partial" in result else result
+    return _routed(plan, attempt)
+
+
+def _compare_routed(local: dict, request: dict) -> dict:
+    plan = RoutePlan(request["messages"][-1]["content"], "compare")
+    return _finish_compare(local, _routed(plan, lambda: _parse_json(_complete(plan.request(request), plan))))
+
+
+def _analyze_single(text: str, use_cache: bool = True, sections: tuple = None) -> dict:
+    key = _analyze_key(text, sections)
+    cached = _cached(key, use_cache)
+    if cached is not None:
+        return cached
+
+    def fresh():
+        result = _analyze_routed(text, _analysis_plan(text, sections))
+        if use_cache and "partial" not in result:
+            result_cache.set(key, result)
+        return result
+    return _flights.run(key, fresh)
+
+
+def _analyze_focused(text: str, use_cache: bool = True, sections: tuple = None) -> dict:
+    """The whole analysis in one request, or only ``sections`` in one concurrent request per group."""
+    if sections is None:
+        return _analyze_single(text, use_cache)
+    groups = _focused_groups(sections)
+    with ThreadPoolExecutor(max_workers=len(groups)) as pool:
+        futures = [pool.submit(contextvars.copy_context().run, _analyze_single, text, use_cache, g) for g in groups]
+        parts   = [f.result() for f in futures]
+    return _merge_focused(parts, sections)
+
+
+def _analyze_chunked(text: str, use_cache: bool = True, sections: tuple = None) -> dict:
+    chunks = split_sections(text, CHUNK_TOKENS)
+    if len(chunks) == 1:
+        return _analyze_focused(text, use_cache, sections)
+
+    key = _chunked_key(text, sections)
+    cached = _cached(key, use_cache)
+    if cached is not None:
+        return cached
+
+    with ThreadPoolExecutor(max_workers=min(CHUNK_WORKERS, len(chunks))) as pool:
+        # each chunk runs in the caller's context, so its calls keep the caller's scheduling lane
+        futures  = [pool.submit(contextvars.copy_context().run, _analyze_focused, c, use_cache,
+                                _chunk_sections(sections)) for c in chunks]
+        outcomes = [f.exception() or f.result() for f in futures]
+    result, errors = _merge_chunks(chunks, outcomes)
+    result = select_sections(result, sections)
+    if use_cache and not errors and not result["chunking"]["partial"]:
+        result_cache.set(key, result)
+    return result
+
+
+def analyze_requirements(text: str, use_cache: bool = True, chunked: bool = None, sections=None) -> dict:
+    """Analyze a requirements document into the standard result dict.
+
+    ``sections`` (names from ``ANALYSIS_SECTIONS``) limits the analysis to those
+    sections; the others are left empty. They are asked for in smaller focused
+    requests, one per ``SECTION_GROUPS`` group, run concurrently.
+    """
+    sections = _selection(sections)
+    text = _prepare(text)
+    observe_document(text)
+    if chunked is None:
+        chunked = estimate_tokens(text) > CHUNK_TOKENS
+    if chunked:
+        return _analyze_chunked(text, use_cache, sections)
+    return _analyze_focused(text, use_cache, sections)
+
+
+def compare_documents(old_text: str, new_text: str, use_cache: bool = True) -> dict:
+    old_text, new_text = _prepare(old_text), _prepare(new_text)
+    observe_document(old_text + new_text, "compare")
+    key = _compare_key(old_text, new_text)
+    cached = _cached(key, use_cache)
+    if cached is not None:
+        return cached
+    local, request = _compare_plan(old_text, new_text)
+    if request is None:
+        return local
+
+    def fresh():
+        result = _compare_routed(local, request)
+        if use_cache:
+            result_cache.set(key, result)
+        return result
+    return _flights.run(key, fresh)
+
+
+# ── Clients ───────────────────────────────────────────────────────────────────
+# Created (and the groq SDK imported) on the first LLM call, so importing the
+# analyzer needs neither the SDK loaded nor an API key. Retries are left to the
+# scheduler, which also knows about the rate limits.
+_client      = None
+_client_lock = threading.Lock()
+
+
+def _sync_client():
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                from groq import Groq
+                _client = Groq(api_key=os.environ.get("GROQ_API_KEY"), max_retries=0)
+    return _client
+
+
+# ── Async API ─────────────────────────────────────────────────────────────────
+# One semaphore per event loop: Gradio runs every async handler on a single loop,
+# so this bounds in-flight LLM calls across all browser sessions.
+_semaphores = weakref.WeakKeyDictionary()
+_async_flights  = weakref.WeakKeyDictionary()     # the async counterparts of _flights, also per loop
+_stream_flights = weakref.WeakKeyDictionary()
+_async_clients  = weakref.WeakKeyDictionary()     # an AsyncGroq's connection pool is bound to its loop
+
+
+def _per_loop(registry: weakref.WeakKeyDictionary, factory):
+    loop = asyncio.get_running_loop()
+    if loop not in registry:
+        registry[loop] = factory()
+    return registry[loop]
+
+
+def _semaphore() -> asyncio.Semaphore:
+    return _per_loop(_semaphores, lambda: asyncio.Semaphore(LLM_CONCURRENCY))
+
+
+def _async_client():
+    def create():
+        from groq import AsyncGroq
+        return AsyncGroq(api_key=os.environ.get("GROQ_API_KEY"), max_retries=0)
+    return _per_loop(_async_clients, create)
+
+
+async def _acomplete(request: dict, plan: RoutePlan = None) -> str:
+    # Cancelling the awaiting task (e.g. Gradio dropping a disconnected session)
+    # aborts the HTTP request and frees the semaphore slot immediately. The slot
+    # is taken once the scheduler lets the call through, so batch calls waiting
+    # on the rate limits don't hold slots interactive ones could use.
+    async def send():
+        async with _semaphore():
+            return await asyncio.wait_for(_async_client().chat.completions.create(**request), LLM_TIMEOUT)
+
+    with span("llm", model=request["model"], prompt_chars=_prompt_chars(request)) as attrs:
+        response = await _scheduler.acall(request, send)
+        record_usage(request["model"], response.usage, attrs)
+    if plan is not None:
+        plan.charge(attrs)
+    return response.choices[0].message.content
+
+
+async def _continue_partial_async(text: str, result: dict, plan: RoutePlan) -> dict:
+    for _ in range(CONTINUE_ROUNDS):
+        request = _continue_request(text, result, plan)
+        if request is None:
+            break
+        try:
+            raw = await _acomplete(request, plan)
+        except Exception:
+            break
+        result = _fill_partial(result, raw)
+    return _settle_partial(result)
+
+
+async def _routed_async(plan: RoutePlan, attempt) -> dict:
+    while True:
+        with plan.attempt() as attrs:
+            try:
+                result = await attempt()
+                reason = plan.doubt(result)
+            except json.JSONDecodeError as e:
+                result, reason = e, "invalid_json"
+            attrs["outcome"] = reason or "ok"
+        if not reason or not plan.escalate(reason):
+            break
+    if isinstance(result, json.JSONDecodeError):
+        raise result
+    return result
+
+
+async def _analyze_routed_async(text: str, plan: RoutePlan) -> dict:
+    async def attempt():
+        result = _parse_analysis(await _acomplete(_analyze_request(text, plan), plan),
+                                 plan.sections or ANALYSIS_SECTIONS)
+        return await _continue_partial_async(text, result, plan) if "partial" in result else result
+    return await _routed_async(plan, attempt)
+
+
+async def _compare_routed_async(local: dict, request: dict) -> dict:
+    plan = RoutePlan(request["messages"][-1]["content"], "compare")
+
+    async def attempt():
+        return _parse_json(await _acomplete(plan.request(request), plan))
+    return _finish_compare(local, await _routed_async(plan, attempt))
+
+
+async def _analyze_single_async(text: str, use_cache: bool = True, sections: tuple = None) -> dict:
+    key = _analyze_key(text, sections)
+    cached = _cached(key, use_cache)
+    if cached is not None:
+        return cached
+
+    async def fresh():
+        result = await _analyze_routed_async(text, _analysis_plan(text, sections))
+        if use_cache and "partial" not in result:
+            result_cache.set(key, result)
+        return result
+    return await _per_loop(_async_flights, AsyncSingleFlight).run(key, fresh)
+
+
+async def _analyze_focused_async(text: str, use_cache: bool = True, sections: tuple = None) -> dict:
+    if sections is None:
+        return await _analyze_single_async(text, use_cache)
+    parts = await asyncio.gather(*(_analyze_single_async(text, use_cache, g) for g in _focused_groups(sections)))
+    return _merge_focused(parts, sections)
+
+
+async def _analyze_chunked_async(text: str, use_cache: bool = True, sections: tuple = None) -> dict:
+    chunks = split_sections(text, CHUNK_TOKENS)
+    if len(chunks) == 1:
+        return await _analyze_focused_async(text, use_cache, sections)
+
+    key = _chunked_key(text, sections)
+    cached = _cached(key, use_cache)
+    if cached is not None:
+        return cached
+
+    outcomes = await asyncio.gather(*(_analyze_focused_async(c, use_cache, _chunk_sections(sections))
+                                      for c in chunks), return_exceptions=True)
+    result, errors = _merge_chunks(chunks, outcomes)
+    result = select_sections(result, sections)
+    if use_cache and not errors and not result["chunking"]["partial"]:
+        result_cache.set(key, result)
+    return result
+
+
+async def analyze_requirements_async(text: str, use_cache: bool = True, chunked: bool = None,
+                                     sections=None) -> dict:
+    sections = _selection(sections)
+    text = _prepare(text)
+    observe_document(text)
+    if chunked is None:
+        chunked = estimate_tokens(text) > CHUNK_TOKENS
+    if chunked:
+        return await _analyze_chunked_async(text, use_cache, sections)
+    return await _analyze_focused_async(text, use_cache, sections)
+
+
+async def compare_documents_async(old_text: str, new_text: str, use_cache: bool = True) -> dict:
+    old_text, new_text = _prepare(old_text), _prepare(new_text)
+    observe_document(old_text + new_text, "compare")
+    key = _compare_key(old_text, new_text)
+    cached = _cached(key, use_cache)
+    if cached is not None:
+        return cached
+    local, request = _compare_plan(old_text, new_text)
+    if request is None:
+        return local
+
+    async def fresh():
+        result = await _compare_routed_async(local, request)
+        if use_cache:
+            result_cache.set(key, result)
+        return result
+    return await _per_loop(_async_flights, AsyncSingleFlight).run(key, fresh)
+
+
+async def stream_analysis_async(text: str, use_cache: bool = True, sections=None):
+    """Yield ``(section, value)`` pairs of the analysis as soon as each one is complete.
+
+    Uses a streamed completion for single-window documents; cached and chunked
+    analyses are yielded section by section once the full result is available.
+    With ``sections``, each focused request's sections are yielded as it completes.
+    """
+    sections = _selection(sections)
+    text = _prepare(text)
+    observe_document(text)
+    if estimate_tokens(text) > CHUNK_TOKENS:
+        result = await _analyze_chunked_async(text, use_cache, sections)
+        for item in result.items():
+            yield item
+        return
+    if sections is not None:
+        async for item in _stream_focused(text, use_cache, sections):
+            yield item
+        return
+
+    key = _analyze_key(text)
+    cached = _cached(key, use_cache)
+    if cached is not None:
+        for item in cached.items():
+            yield item
+        return
+
+    # every session streaming the same document reads the one upstream stream
+    flights = _per_loop(_stream_flights, StreamFlight)
+    async for item in flights.stream(key, lambda: _stream_fresh(text, key, use_cache)):
+        yield item
+
+
+def _stream_totals(streamed: dict):
+    """Recompute the summary totals (and project_info's requirement count) of the sections streamed so far."""
+    totals = recompute_summary({**streamed, "summary": dict(streamed["summary"]),
+                                "project_info": dict(streamed.get("project_info") or {})})
+    streamed["summary"] = totals["summary"]
+    if "project_info" in streamed:
+        streamed["project_info"] = totals["project_info"]
+
+
+async def _stream_fresh(text: str, key: str, use_cache: bool):
+    plan     = _analysis_plan(text)
+    parser   = SectionStreamParser()
+    streamed = {}       # expanded sections, so the summary totals can be computed when it arrives
+    raw      = []
+    request  = _analyze_request(text, plan)
+    started  = time.monotonic()
+    deadline = started + LLM_TIMEOUT
+    # The slot is taken inside send, as in _acomplete, and held until the stream is consumed.
+    slot, held = _semaphore(), False
+
+    async def send():
+        nonlocal held
+        await slot.acquire()
+        try:
+            stream = await asyncio.wait_for(_async_client().chat.completions.create(**request, stream=True),
+                                            LLM_TIMEOUT)
+        except BaseException:
+            slot.release()
+            raise
+        held = True
+        return stream
+
+    with plan.attempt() as route_attrs:
+        try:
+            with span("llm", model=request["model"], prompt_chars=_prompt_chars(request), stream=True) as attrs:
+                stream = await _scheduler.acall(request, send)
+                chunks = stream.__aiter__()
+                while True:
+                    try:
+                        chunk = await asyncio.wait_for(chunks.__anext__(), max(deadline - time.monotonic(), 0))
+                    except StopAsyncIteration:
+                        break
+                    # Groq reports usage on the final chunk under x_groq
+                    usage = chunk.usage or getattr(chunk.x_groq, "usage", None)
+                    if usage is not None:
+                        record_usage(request["model"], usage, attrs)
+                        _scheduler.settle(request, usage)
+                    delta = chunk.choices[0].delta.content if chunk.choices else None
+                    if not delta:
+                        continue
+                    if not raw:
+                        attrs["first_token_s"] = round(time.monotonic() - started, 3)
+                    raw.append(delta)
+                    try:
+                        items = parser.feed(delta)
+                    except json.JSONDecodeError:
+                        parser.done, items = True, []    # malformed member: leave it to the final parse
+                    for section, value in items:
+                        streamed[section] = expand_section(section, value)
+                        if "summary" in streamed and section in ("summary", "project_info"):
+                            # totals go into fresh dicts: readers already hold copies of the yielded ones
+                            _stream_totals(streamed)
+                        yield section, streamed[section]
+                        if section == "summary" and "project_info" in streamed:
+                            yield "project_info", streamed["project_info"]
+        finally:
+            if held:
+                slot.release()
+        plan.charge(attrs)
+
+        # the incremental parser only sees well-formed members; the full parse is the authority
+        try:
+            result = _parse_analysis("".join(raw))
+            if "partial" in result:
+                # cut off mid-stream: ask only for what is missing instead of starting over
+                result = await _continue_partial_async(text, result, plan)
+            reason = plan.doubt(result)
+        except json.JSONDecodeError as e:
+            result, reason = e, "invalid_json"
+        route_attrs["outcome"] = reason or "ok"
+
+    if reason and plan.escalate(reason):
+        # not good enough to keep: redo it one tier up and replace every section shown so far
+        result = await _analyze_routed_async(text, plan)
+        for item in result.items():
+            yield item
+    else:
+        if isinstance(result, json.JSONDecodeError):
+            raise result
+        for item in result.items():
+            if item[0] not in parser.sections:
+                yield item
+    if use_cache and "partial" not in result:
+        result_cache.set(key, result)
+
+
+async def _stream_focused(text: str, use_cache: bool, sections: tuple):
+    async def run(group):
+        return group, await _analyze_single_async(text, use_cache, group)
+
+    groups  = _focused_groups(sections)
+    tasks   = [asyncio.ensure_future(run(g)) for g in groups]
+    parts   = {}
+    yielded = {}
+    try:
+        for done in asyncio.as_completed(tasks):
+            group, part = await done
+            parts[group] = part
+            for section in group:
+                if section in part and section != "summary":    # its totals need the other groups
+                    yielded[section] = part[section]
+                    yield section, part[section]
+    finally:
+        for task in tasks:
+            task.cancel()
+    result = _merge_focused([parts[g] for g in groups], sections)
+    for section, value in result.items():
+        if section not in yielded or yielded[section] != value:
+            yield section, value
@@ -1,65 +1,133 @@
 import gradio as gr
-import os, json, tempfile
-from groq import Groq
-import pdfplumber
-from analyzer import analyze_requirements, compare_documents
-from pdf_generator import generate_pdf
-
-try:
-    from docx import Document as DocxDocument
-    DOCX_OK = True
-except ImportError:
-    DOCX_OK = False
-
-
-# ── Text extraction ───────────────────────────────────────────────────────────
-def extract_text(file_path: str) -> str:
-    if not file_path:
-        return ""
-    ext = os.path.splitext(file_path)[1].lower()
-    if ext == ".pdf":
-        text = ""
-        with pdfplumber.open(file_path) as pdf:
-            for page in pdf.pages:
-                t = page.extract_text()
-                if t:
-                    text += t + "\n"
-        return text.strip()
-    elif ext == ".docx" and DOCX_OK:
-        doc = DocxDocument(file_path)
-        return "\n".join(p.text for p in doc.paragraphs if p.text.strip())
-    elif ext in (".txt", ".md"):
-        with open(file_path, "r", encoding="utf-8", errors="ignore") as f:
-            return f.read().strip()
-    return ""
+import os, json, time, tempfile, asyncio
+from analyzer import stream_analysis_async, compare_documents_async, select_sections, ANALYSIS_SECTIONS
+from extractor import extract_text
+from prescan import scan, merge_findings, fallback_result
+from pdf_generator import prefetch_pdf, report_path
+from store import analysis_store
+from scheduler import rate_limited
+import metrics
+import similarity
+
+
+# ── Session-scoped LLM calls ──────────────────────────────────────────────────
+# Running analyses per browser session, so closing the tab cancels them and
+# frees their slot in the analyzer's concurrency pool.
+_inflight = {}
+
+
+async def run_for_session(request, coro):
+    task = asyncio.ensure_future(coro)
+    if request is None or not request.session_hash:
+        return await task
+    tasks = _inflight.setdefault(request.session_hash, set())
+    tasks.add(task)
+    try:
+        return await task
+    finally:
+        tasks.discard(task)
+        if not tasks:
+            _inflight.pop(request.session_hash, None)
+
+
+async def iterate_for_session(request, agen):
+    try:
+        while True:
+            try:
+                yield await run_for_session(request, agen.__anext__())
+            except StopAsyncIteration:
+                return
+    finally:
+        await agen.aclose()
+
+
+async def cancel_session(request: gr.Request):
+    for task in _inflight.pop(request.session_hash, ()):
+        task.cancel()
 
 
 # ── Main analyze handler ──────────────────────────────────────────────────────
-def analyze(text_input, file_input):
+SECTION_LABELS = {
+    "project_info": "Project info", "quality_score": "Quality score",
+    "functional_requirements": "Functional requirements", "non_functional_requirements": "Non-functional requirements",
+    "constraints": "Constraints", "risks": "Risks", "ambiguities": "Ambiguities",
+    "missing_information": "Missing information", "scope_creep": "Scope creep",
+    "clarification_questions": "Clarification questions", "summary": "Summary",
+}
+
+
+def _source_name(file_input) -> str:
+    return os.path.basename(file_input) if file_input else "pasted text"
+
+
+async def analyze(text_input, file_input, sections=None, request=None):
+    """Yield ``(result, report, status)`` as analysis sections stream in.
+
+    ``sections`` limits the analysis to those sections (None for all). ``report``
+    is the finished analysis to build the PDF from, None until then; the PDF is
+    only queued for background rendering here, and ``load_pdf`` fetches it when
+    the download tab asks for it.
+    """
+    if sections is not None and not sections:
+        yield None, None, "⚠️ Please select at least one section to analyze."
+        return
     source = ""
     if file_input is not None:
-        source = extract_text(file_input)
+        source = await asyncio.to_thread(extract_text, file_input)
         if not source:
-            return None, None, "❌ Could not extract text from file."
+            yield None, None, "❌ Could not extract text from file."
+            return
     elif text_input and text_input.strip():
         source = text_input.strip()
     else:
-        return None, None, "⚠️ Please paste requirements OR upload a file."
+        yield None, None, "⚠️ Please paste requirements OR upload a file."
+        return
 
     if len(source) < 30:
-        return None, None, "⚠️ Text too short. Please provide more detailed requirements."
-
+        yield None, None, "⚠️ Text too short. Please provide more detailed requirements."
+        return
+
+    # instant rule-based first paint; each LLM section replaces it as it arrives
+    findings = {k: v for k, v in scan(source).items() if sections is None or k in sections}
+    result   = dict(findings)
+    found = [f"**{len(items)}** " + ("ambiguit(ies)" if k == "ambiguities" else "scope creep statement(s)")
+             for k, items in findings.items()]
+    yield result, None, f"⚡ Pre-scan: {', '.join(found) or 'not applicable'}  |  ⏳ AI analysis running…"
+
+    received, first = set(), None
+    start = time.perf_counter()
     try:
-        result = analyze_requirements(source)
+        async for section, value in iterate_for_session(request, stream_analysis_async(source, sections=sections)):
+            result[section] = value
+            received.add(section)
+            if first is None:
+                first = time.perf_counter() - start
+            yield result, None, f"⏳ Analyzing…  |  **{len(received)}** section(s) received  |  first result in {first:.1f}s"
     except json.JSONDecodeError:
-        return None, None, "❌ AI returned invalid response. Please try again."
-    except Exception as e:
-        return None, None, f"❌ Error: {str(e)}"
-
-    try:
-        pdf_path = generate_pdf(result)
+        error = "❌ AI returned invalid response."
+    except asyncio.TimeoutError:
+        error = "❌ The AI took too long to respond."
     except Exception as e:
-        pdf_path = None
+        error = "❌ The AI service is busy (rate limit reached)." if rate_limited(e) else f"❌ Error: {str(e)}"
+    else:
+        error = None
+    if error:
+        if not any(findings.values()):
+            yield None, None, error + " Please try again."
+            return
+        # offline fallback: keep whatever arrived plus the rule findings
+        fallback = select_sections(merge_findings({**fallback_result(source, findings), **result}, findings), sections)
+        prefetch_pdf(fallback)
+        yield fallback, fallback, error + " Showing the instant rule-based findings only."
+        return
+    total = time.perf_counter() - start
+    # the final result is the LLM's alone; the pre-scan only stood in until it arrived
+    result = select_sections({k: v for k, v in result.items() if k in received}, sections)
+    # local check of the requirements and source sentences for repeats and clashes
+    result["consistency_check"] = await asyncio.to_thread(similarity.check, result, source)
+
+    prefetch_pdf(result)
+    analysis_store.save_analysis(source, result, _source_name(file_input), sections)
 
     qs      = result.get("quality_score", {})
     score   = qs.get("overall", "N/A")
@@ -72,39 +140,131 @@ def analyze(text_input, file_input):
     status = (
         f"✅ **Analysis Complete!**  |  "
         f"🏷️ Type: **{ptype}**  |  "
-        f"📊 Score: **{score}/100**  |  "
+        f"📊 Score: **{score}{'/100' if isinstance(score, (int, float)) else ''}**  |  "
         f"📦 Complexity: **{comp}**  |  "
-        f"Overall: **{quality}**"
+        f"Overall: **{quality}**  |  "
+        f"⏱️ first result {first or 0:.1f}s · total {total:.1f}s"
     )
-    return result, pdf_path, status
+    check = result["consistency_check"]
+    if check["duplicate_clusters"] or check["contradictions"]:
+        status += (f"\n\n🔁 **{len(check['duplicate_clusters'])}** duplicate group(s), "
+                   f"**{len(check['contradictions'])}** possible contradiction(s) — see `consistency_check`")
+    if result.get("partial"):
+        gaps = result["partial"]["truncated"] + result["partial"]["missing"]
+        status += "\n\n⚠️ The AI response was cut short; incomplete: " + ", ".join(gaps)
+    yield result, result, status
+
+
+async def load_pdf(report):
+    if not report:
+        return None
+    try:
+        return await asyncio.to_thread(report_path, report)
+    except Exception:
+        return None
 
 
 # ── Version comparison handler ────────────────────────────────────────────────
-def compare(old_file, new_file, old_text, new_text):
-    old = extract_text(old_file) if old_file else old_text.strip()
-    new = extract_text(new_file) if new_file else new_text.strip()
+async def compare(old_file, new_file, old_text, new_text, request: gr.Request = None):
+    old = await asyncio.to_thread(extract_text, old_file) if old_file else old_text.strip()
+    new = await asyncio.to_thread(extract_text, new_file) if new_file else new_text.strip()
 
     if not old or not new:
         return None, "⚠️ Please provide both Old and New documents."
 
     try:
-        result = compare_documents(old, new)
+        result = await run_for_session(request, compare_documents_async(old, new))
+        analysis_store.save_comparison(old, new, result, _source_name(old_file), _source_name(new_file))
         return result, "✅ Comparison complete!"
+    except asyncio.TimeoutError:
+        return None, "❌ The AI took too long to respond. Please try again."
     except Exception as e:
+        if rate_limited(e):
+            return None, "❌ The AI service is busy (rate limit reached). Please try again in a minute."
         return None, f"❌ Error: {str(e)}"
 
 
+# ── History handlers ──────────────────────────────────────────────────────────
+# Saved results reload from the local store without another LLM call.
+HISTORY_COLUMNS = {
+    "analysis":   [("id", "ID"), ("updated_at", "Saved"), ("source", "Source"), ("project_type", "Type"),
+                   ("overall", "Score"), ("functional_count", "FR"), ("non_functional_count", "NFR"),
+                   ("ambiguity_count", "Ambiguities"), ("risk_count", "Risks"), ("sections", "Sections")],
+    "comparison": [("id", "ID"), ("updated_at", "Saved"), ("old_source", "Old"), ("new_source", "New"),
+                   ("old_score", "Old score"), ("new_score", "New score"), ("verdict", "Verdict"),
+                   ("added_count", "Added"), ("removed_count", "Removed"), ("modified_count", "Modified")],
+}
+
+
+def _history_filters(kind, project_type, min_score, max_score) -> dict:
+    # the slider ends mean "no bound", so unscored (partial) results still show
+    return {"kind": kind, "project_type": project_type if kind == "analysis" and project_type != "All" else None,
+            "min_score": min_score if min_score > 0 else None, "max_score": max_score if max_score < 100 else None}
+
+
+def _history_rows(kind, **filters) -> list:
+    rows = []
+    for rec in analysis_store.history(kind, **filters):
+        rec["updated_at"] = time.strftime("%Y-%m-%d %H:%M", time.localtime(rec["updated_at"]))
+        rec["sections"] = rec.get("sections") or "all"
+        rows.append([rec[c] if rec[c] is not None else "" for c, _ in HISTORY_COLUMNS[kind]])
+    return rows
+
+
+async def refresh_history(kind, project_type, min_score, max_score):
+    filters = _history_filters(kind, project_type, min_score, max_score)
+    try:
+        await asyncio.to_thread(analysis_store.flush, 2.0)     # include what was saved a moment ago
+        rows  = await asyncio.to_thread(_history_rows, **filters)
+        types = await asyncio.to_thread(analysis_store.project_types)
+    except Exception as e:
+        return gr.update(), gr.update(), f"❌ Could not read history: {e}"
+    table = gr.update(value=rows, headers=[h for _, h in HISTORY_COLUMNS[kind]])
+    choices = gr.update(choices=["All"] + types, value=project_type if project_type in types else "All")
+    return table, choices, f"**{len(rows)}** saved {kind}(s)" + (" — select a row to open it" if rows else "")
+
+
+async def open_history(kind, table, evt: gr.SelectData):
+    try:
+        row_id = int(table.iloc[evt.index[0], 0])
+        result = await asyncio.to_thread(analysis_store.load, row_id, kind)
+    except Exception:
+        result = None
+    if result is None:
+        return None, "", None, "⚠️ That entry is no longer available."
+    if kind != "analysis":
+        return result, "", None, f"✅ Loaded comparison #{row_id}"
+    prefetch_pdf(result)
+    return result, score_html(result), result, f"✅ Loaded analysis #{row_id}"
+
+
+async def export_history(kind, project_type, min_score, max_score, fmt):
+    filters = _history_filters(kind, project_type, min_score, max_score)
+    path = os.path.join(tempfile.mkdtemp(), f"reqmind_{kind}_history.{fmt.lower()}")
+    await asyncio.to_thread(analysis_store.flush, 2.0)
+    count = await asyncio.to_thread(analysis_store.export, path, **filters)
+    return path, f"📤 Exported **{count}** {kind}(s) as {fmt}"
+
+
 # ── Score card HTML ───────────────────────────────────────────────────────────
 def score_html(analysis):
     if not analysis:
         return ""
+    with metrics.span("score_html"):
+        return _score_html(analysis)
+
+
+def _score_html(analysis):
     qs    = analysis.get("quality_score", {})
     pi    = analysis.get("project_info", {})
     summ  = analysis.get("summary", {})
     score = qs.get("overall", 0)
-    color = "#16a34a" if score >= 70 else ("#d97706" if score >= 40 else "#dc2626")
+    scored = isinstance(score, (int, float))     # None when no chunk of a merged analysis was scored
+    color = ("#16a34a" if score >= 70 else ("#d97706" if score >= 40 else "#dc2626")) if scored else "#94a3b8"
 
     def bar(val):
+        if not isinstance(val, (int, float)):
+            return "<span style='font-size:0.78rem;color:#94a3b8;'>Not scored</span>"
         c = "#16a34a" if val >= 70 else ("#d97706" if val >= 40 else "#dc2626")
         return f"""
         <div style="display:flex;align-items:center;gap:8px;margin-bottom:4px;">
@@ -134,11 +294,11 @@ def score_html(analysis):
 
       <!-- Score Circle -->
       <div style="background:white;border:1px solid #e2e8f0;border-radius:14px;padding:1.25rem;text-align:center;">
-        <div style="width:90px;height:90px;border-radius:50%;background:conic-gradient({color} {score*3.6}deg,#e2e8f0 0deg);
+        <div style="width:90px;height:90px;border-radius:50%;background:conic-gradient({color} {score * 3.6 if scored else 0}deg,#e2e8f0 0deg);
              display:flex;align-items:center;justify-content:center;margin:0 auto 0.75rem;position:relative;">
           <div style="width:70px;height:70px;border-radius:50%;background:white;
                display:flex;align-items:center;justify-content:center;">
-            <span style="font-size:1.3rem;font-weight:800;color:{color};">{score}</span>
+            <span style="font-size:{'1.3rem' if scored else '0.75rem'};font-weight:800;color:{color};">{score if scored else 'Not scored'}</span>
           </div>
         </div>
         <p style="font-weight:700;color:#1e293b;margin:0 0 0.2rem;">Quality Score</p>
@@ -250,8 +410,14 @@ with gr.Blocks(
                         label="Requirements Text",
                         show_label=False,
                     )
+                    section_input = gr.CheckboxGroup(
+                        choices=[(SECTION_LABELS[s], s) for s in ANALYSIS_SECTIONS],
+                        value=list(ANALYSIS_SECTIONS),
+                        label="Sections to analyze (fewer sections, faster results)",
+                    )
                     analyze_btn = gr.Button("🔍 Analyze", variant="primary", size="lg")
                     status_box  = gr.Markdown("")
+                    report      = gr.State(None)
 
                 # RIGHT — Output
                 with gr.Column(scale=1):
@@ -261,8 +427,9 @@ with gr.Blocks(
                     with gr.Tabs():
                         with gr.Tab("📋 Full JSON"):
                             output_json = gr.JSON(label="Full Analysis", show_label=False)
-                        with gr.Tab("📥 Download PDF"):
+                        with gr.Tab("📥 Download PDF") as pdf_tab:
                             gr.Markdown("Click below to download your full analysis report:")
+                            pdf_btn    = gr.Button("📄 Prepare PDF", size="sm")
                             pdf_output = gr.File(label="PDF Report", interactive=False)
 
         # ════════════════════════════════════════
@@ -288,7 +455,37 @@ with gr.Blocks(
             compare_output = gr.JSON(label="Comparison Result", show_label=False)
 
         # ════════════════════════════════════════
-        # TAB 3 — ABOUT
+        # TAB 3 — HISTORY
+        # ════════════════════════════════════════
+        with gr.Tab("🕘 History") as history_tab:
+            gr.Markdown("### Saved Analyses & Comparisons")
+            gr.Markdown("Every finished analysis and comparison is kept here — open one to view it again without re-running the AI.")
+
+            with gr.Row():
+                history_kind = gr.Radio([("Analyses", "analysis"), ("Comparisons", "comparison")],
+                                        value="analysis", label="Show")
+                history_type = gr.Dropdown(["All"], value="All", label="Project type")
+                history_min  = gr.Slider(0, 100, value=0, step=1, label="Min score")
+                history_max  = gr.Slider(0, 100, value=100, step=1, label="Max score")
+            with gr.Row():
+                refresh_btn   = gr.Button("🔎 Search", variant="primary")
+                export_format = gr.Radio(["JSONL", "CSV"], value="JSONL", label="Export format", scale=0)
+                export_btn    = gr.Button("📤 Export All Matching")
+            history_status = gr.Markdown("")
+            history_table  = gr.Dataframe(headers=[h for _, h in HISTORY_COLUMNS["analysis"]],
+                                          interactive=False, wrap=True)
+            export_file    = gr.File(label="Export", interactive=False)
+
+            with gr.Row():
+                with gr.Column(scale=1):
+                    history_card = gr.HTML("")
+                    history_pdf  = gr.File(label="PDF Report", interactive=False)
+                    history_report = gr.State(None)
+                with gr.Column(scale=1):
+                    history_json = gr.JSON(label="Saved Result", show_label=False)
+
+        # ════════════════════════════════════════
+        # TAB 4 — ABOUT
         # ════════════════════════════════════════
         with gr.Tab("📖 Explore"):
             gr.HTML("""
@@ -369,16 +566,19 @@ with gr.Blocks(
             """)
 
     # ── Events ──
-    def full_analyze(text_input, file_input):
-        result, pdf_path, status = analyze(text_input, file_input)
-        html = score_html(result) if result else ""
-        return result, pdf_path, status, html
+    async def full_analyze(text_input, file_input, sections, request: gr.Request):
+        sections = None if set(sections) == set(ANALYSIS_SECTIONS) else sections
+        async for result, analysis, status in analyze(text_input, file_input, sections, request):
+            html = score_html(result) if result else ""
+            yield result, analysis, None, status, html
 
     analyze_btn.click(
         fn=full_analyze,
-        inputs=[text_input, file_input],
-        outputs=[output_json, pdf_output, status_box, score_card]
+        inputs=[text_input, file_input, section_input],
+        outputs=[output_json, report, pdf_output, status_box, score_card]
     )
+    for trigger in (pdf_tab.select, pdf_btn.click):
+        trigger(fn=load_pdf, inputs=[report], outputs=[pdf_output])
 
     compare_btn.click(
         fn=compare,
@@ -386,5 +586,30 @@ with gr.Blocks(
         outputs=[compare_output, compare_status]
     )
 
+    history_filters = [history_kind, history_type, history_min, history_max]
+    for trigger in (history_tab.select, refresh_btn.click, history_kind.change):
+        trigger(fn=refresh_history, inputs=history_filters, outputs=[history_table, history_type, history_status])
+    history_table.select(
+        fn=open_history,
+        inputs=[history_kind, history_table],
+        outputs=[history_json, history_card, history_report, history_status]
+    ).then(
+        fn=load_pdf, inputs=[history_report], outputs=[history_pdf]
+    )
+    export_btn.click(
+        fn=export_history,
+        inputs=history_filters + [export_format],
+        outputs=[export_file, history_status]
+    )
+
+    app.unload(cancel_session)
+
+# Handlers are async, so the queue concurrency is cheap; the real bound on
+# upstream calls is REQMIND_LLM_CONCURRENCY inside analyzer.
+app.queue(default_concurrency_limit=int(os.environ.get("REQMIND_UI_CONCURRENCY", "64")))
+
 if __name__ == "__main__":
+    # Prometheus scrape target on its own port, e.g. REQMIND_METRICS_PORT=9100
+    if os.environ.get("REQMIND_METRICS_PORT"):
+        metrics.serve(int(os.environ["REQMIND_METRICS_PORT"]))
     app.launch()
\ No newline at end of file
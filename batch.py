@@ -0,0 +1,194 @@
+"""Headless batch analysis of a directory of requirement documents.
+
+    python batch.py docs/ -o results.jsonl --pdf-dir reports/ --rpm 30 --resume
+
+Each input document becomes one JSON line with its timings and either the
+analysis result or the error that stopped it. Every LLM call, including each
+chunk of a long document, waits for room under the scheduler's rate limits
+(``--rpm``/``--tpm``, with per-model ``REQMIND_RATE_LIMITS`` taking precedence)
+in the batch lane, behind interactive sessions sharing them.
+"""
+import os, json, time, argparse, itertools
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait, FIRST_COMPLETED
+from extractor import extract_text, SUPPORTED_EXTS
+
+IN_FLIGHT_PER_WORKER = 2     # documents extracted or analyzed at once, per extraction process and LLM worker
+
+
+# ── Pipeline stages ───────────────────────────────────────────────────────────
+def find_documents(root: str) -> list:
+    found = []
+    for dirpath, _, files in os.walk(root):
+        for name in files:
+            if os.path.splitext(name)[1].lower() in SUPPORTED_EXTS:
+                found.append(os.path.join(dirpath, name))
+    return sorted(found)
+
+
+def load_done(out_path: str, retry_errors: bool = False) -> set:
+    done = set()
+    if not os.path.exists(out_path):
+        return done
+    with open(out_path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                rec = json.loads(line)
+            except ValueError:
+                continue    # a line cut short by an interrupted run
+            if retry_errors and rec.get("error"):
+                continue
+            done.add(rec["path"])
+    return done
+
+
+def drop_error_records(out_path: str):
+    """Remove failed documents' records, so their retries do not leave two lines per path."""
+    if not os.path.exists(out_path):
+        return
+    tmp = out_path + ".tmp"
+    with open(out_path, "r", encoding="utf-8") as src, open(tmp, "w", encoding="utf-8") as dst:
+        for line in src:
+            try:
+                failed = bool(json.loads(line).get("error"))
+            except ValueError:
+                failed = False
+            if not failed:
+                dst.write(line)
+    os.replace(tmp, out_path)
+
+
+def drop_partial_line(out_path: str):
+    """Cut an unterminated last line (a record cut short by an interrupted run) so appends start clean."""
+    if not os.path.exists(out_path):
+        return
+    with open(out_path, "rb+") as f:
+        end = f.seek(0, os.SEEK_END)
+        pos = end
+        while pos > 0:
+            step = min(pos, 1 << 16)
+            f.seek(pos - step)
+            block = f.read(step)
+            if pos == end and block.endswith(b"\n"):
+                return
+            cut = block.rfind(b"\n")
+            if cut >= 0:
+                f.truncate(pos - step + cut + 1)
+                return
+            pos -= step
+        f.truncate(0)
+
+
+def _timed_extract(path: str) -> tuple:
+    start = time.perf_counter()
+    return extract_text(path, parallel=False), time.perf_counter() - start
+
+
+def _analyze_one(path: str, text: str, args) -> dict:
+    from analyzer import analyze_requirements
+    from pdf_generator import generate_pdf
+    from scheduler import lane
+
+    rec = {"path": path, "chars": len(text), "timings": {}}
+    if len(text) < 30:
+        rec["error"] = "no extractable text" if not text else "text too short"
+        return rec
+
+    start = time.perf_counter()
+    with lane("batch"):     # interactive sessions sharing the rate limits go first
+        result = analyze_requirements(text, use_cache=not args.no_cache)
+    rec["timings"]["analyze_s"] = round(time.perf_counter() - start, 3)
+    rec["result"] = result
+
+    if args.pdf_dir:
+        start = time.perf_counter()
+        stem = os.path.splitext(os.path.relpath(path, args.input))[0].replace(os.sep, "__")
+        rec["pdf"] = generate_pdf(result, os.path.join(args.pdf_dir, stem + ".pdf"))
+        rec["timings"]["pdf_s"] = round(time.perf_counter() - start, 3)
+    return rec
+
+
+# ── Runner ────────────────────────────────────────────────────────────────────
+def run(args) -> dict:
+    paths = find_documents(args.input)
+    if args.resume:
+        drop_partial_line(args.output)
+        if args.retry_errors:
+            drop_error_records(args.output)
+    done  = load_done(args.output, args.retry_errors) if args.resume else set()
+    todo  = [p for p in paths if p not in done]
+    if args.pdf_dir:
+        os.makedirs(args.pdf_dir, exist_ok=True)
+    from analyzer import _scheduler
+    _scheduler.configure(rpm=args.rpm, tpm=args.tpm)
+
+    stats = {"found": len(paths), "skipped": len(paths) - len(todo), "ok": 0, "failed": 0}
+    mode  = "a" if args.resume else "w"
+    start = time.perf_counter()
+
+    with open(args.output, mode, encoding="utf-8") as out, \
+         ProcessPoolExecutor(max_workers=args.extract_procs) as procs, \
+         ThreadPoolExecutor(max_workers=args.workers) as threads:
+
+        # only a few documents per worker are in flight, so extracted text never piles up for the whole corpus
+        queued  = iter(todo)
+        window  = IN_FLIGHT_PER_WORKER * (args.workers + (args.extract_procs or os.cpu_count() or 1))
+        pending = {}
+        while True:
+            for path in itertools.islice(queued, max(window - len(pending), 0)):
+                pending[procs.submit(_timed_extract, path)] = (path, None)
+            if not pending:
+                break
+            finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in finished:
+                path, extract_s = pending.pop(fut)
+                if extract_s is None:
+                    # extraction finished: hand the text to the analysis pool
+                    try:
+                        text, extract_s = fut.result()
+                    except Exception as e:
+                        _write(out, {"path": path, "error": f"extract: {e}"}, stats)
+                        continue
+                    job = threads.submit(_analyze_one, path, text, args)
+                    pending[job] = (path, extract_s)
+                    continue
+                try:
+                    rec = fut.result()
+                except Exception as e:
+                    rec = {"path": path, "error": f"{type(e).__name__}: {e}", "timings": {}}
+                rec.setdefault("timings", {})["extract_s"] = round(extract_s, 3)
+                _write(out, rec, stats)
+
+    stats["elapsed_s"] = round(time.perf_counter() - start, 2)
+    return stats
+
+
+def _write(out, rec: dict, stats: dict):
+    rec.setdefault("name", os.path.basename(rec["path"]))
+    stats["failed" if rec.get("error") else "ok"] += 1
+    out.write(json.dumps(rec, ensure_ascii=False) + "\n")
+    out.flush()
+    print(f"[{stats['ok'] + stats['failed']}] {'✗' if rec.get('error') else '✓'} {rec['path']}"
+          + (f"  — {rec['error']}" if rec.get("error") else ""), flush=True)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Analyze every requirements document in a directory.")
+    ap.add_argument("input", help="directory to scan recursively for .pdf/.docx/.txt/.md files")
+    ap.add_argument("-o", "--output", default="results.jsonl", help="JSONL file to write (default: results.jsonl)")
+    ap.add_argument("--pdf-dir", help="also render a PDF report per document into this directory")
+    ap.add_argument("--workers", type=int, default=4, help="concurrent LLM calls (default: 4)")
+    ap.add_argument("--extract-procs", type=int, default=os.cpu_count(), help="text extraction processes")
+    ap.add_argument("--rpm", type=float, default=30, help="max LLM requests per minute, 0 for unlimited (default: 30)")
+    ap.add_argument("--tpm", type=float, help="max LLM tokens per minute, 0 for unlimited (default: REQMIND_TPM)")
+    ap.add_argument("--resume", action="store_true", help="append to OUTPUT, skipping documents already in it")
+    ap.add_argument("--retry-errors", action="store_true", help="with --resume, re-run documents that failed")
+    ap.add_argument("--no-cache", action="store_true", help="bypass the analysis result cache")
+    args = ap.parse_args(argv)
+
+    stats = run(args)
+    print(json.dumps(stats))
+    return 0 if not stats["failed"] else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
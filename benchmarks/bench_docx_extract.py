@@ -0,0 +1,71 @@
+"""Compare python-docx against the streaming DOCX extractor.
+
+    python benchmarks/bench_docx_extract.py [--paragraphs 1000 10000 50000]
+
+Each measurement runs in a fresh subprocess and reports peak RSS growth over
+the post-import baseline (lxml allocations are invisible to tracemalloc).
+"""
+import os, sys, json, time, argparse, resource, subprocess, tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def make_docx(path: str, paragraphs: int):
+    from docx import Document
+    doc = Document()
+    for i in range(paragraphs):
+        if i % 50 == 0:
+            doc.add_heading(f"{i // 50 + 1}. Module {i // 50 + 1}", level=1)
+            table = doc.add_table(rows=6, cols=4)
+            for r, row in enumerate(table.rows):
+                for c, cell in enumerate(row.cells):
+                    cell.text = f"FR-{i}-{r}" if c == 0 else f"The system shall handle case {r}.{c} for module {i // 50}."
+        doc.add_paragraph(f"REQ-{i}: The system shall process request {i} within 2 seconds under normal load.")
+    doc.save(path)
+
+
+def child(method: str, path: str):
+    from docx import Document
+    from extractor import extract_docx_text
+    base_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    start = time.perf_counter()
+    if method == "python-docx":
+        doc  = Document(path)
+        text = "\n".join(p.text for p in doc.paragraphs if p.text.strip())
+    else:
+        text = extract_docx_text(path)
+    elapsed = time.perf_counter() - start
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(json.dumps({"seconds": elapsed, "peak_mb": (peak_kb - base_kb) / 1024, "chars": len(text)}))
+
+
+def measure(method: str, path: str) -> dict:
+    out = subprocess.run([sys.executable, __file__, "--child", method, path],
+                         capture_output=True, text=True, check=True, cwd=ROOT)
+    return json.loads(out.stdout)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--paragraphs", type=int, nargs="+", default=[1000, 10000, 50000])
+    ap.add_argument("--child", nargs=2, help=argparse.SUPPRESS)
+    args = ap.parse_args()
+    if args.child:
+        return child(*args.child)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"{'paras':>7}  {'python-docx':>20}  {'streaming':>20}  (time, peak RSS growth)")
+        for n in args.paragraphs:
+            path = os.path.join(tmp, f"srs_{n}.docx")
+            make_docx(path, n)
+            old = measure("python-docx", path)
+            new = measure("streaming", path)
+            print(f"{n:>7}  {old['seconds']:>7.2f}s {old['peak_mb']:>7.0f} MB   "
+                  f"{new['seconds']:>7.2f}s {new['peak_mb']:>7.0f} MB   "
+                  f"+{new['chars'] - old['chars']} chars from tables")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""Cold import time of the core modules and of the app, from ``python -X importtime``.
+
+    python benchmarks/bench_import.py [--budget-ms 400] [--repeat 3]
+
+Imports each entry point in a fresh interpreter without ``GROQ_API_KEY``
+(best of ``--repeat`` runs), prints its cumulative import time and the
+slowest modules it pulled in, and lists which heavy dependencies it loaded.
+
+Exits non-zero if the core modules (everything a batch worker or another
+service imports) fail to import without an API key, load an LLM SDK, PDF,
+DOCX, NumPy or UI library, or take longer than ``--budget-ms`` together;
+or if the app loads more than Gradio among the heavy dependencies.
+"""
+import os, re, sys, argparse, subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEAVY = ("groq", "gradio", "reportlab", "pdfplumber", "pypdf", "docx", "numpy", "pandas")
+ENTRY_POINTS = {
+    "core": "import analyzer, extractor, pdf_generator, store, batch, routing, scheduler, prescan",
+    "app":  "import app",
+}
+APP_HEAVY = ("gradio", "numpy", "pandas")     # Gradio needs NumPy and pandas itself
+STARTUP   = ("site", "encodings")     # interpreter start-up, not ours
+LINE_RE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def measure(statement: str) -> tuple:
+    """``(seconds, {module: cumulative seconds}, returncode, stderr tail)`` of one fresh import."""
+    env = {k: v for k, v in os.environ.items() if k != "GROQ_API_KEY"}
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", statement], cwd=ROOT, env=env,
+                          capture_output=True, text=True)
+    modules, total = {}, 0
+    for line in proc.stderr.splitlines():
+        m = LINE_RE.match(line)
+        if not m:
+            continue
+        cumulative, depth, name = int(m.group(2)) / 1e6, len(m.group(3)), m.group(4)
+        modules[name] = cumulative
+        if depth == 1 and name not in STARTUP:
+            total += cumulative
+    return total, modules, proc.returncode, proc.stderr.strip().splitlines()[-1:] if proc.returncode else []
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--budget-ms", type=float, default=400, help="allowed import time of the core modules")
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    ok = True
+    for label, statement in ENTRY_POINTS.items():
+        runs = [measure(statement) for _ in range(args.repeat)]
+        seconds, modules, code, error = min(runs, key=lambda r: r[0])
+        if code:
+            print(f"{label:>5}: IMPORT FAILED  {error}")
+            ok = False
+            continue
+        heavy = sorted({m.split(".")[0] for m in modules} & set(HEAVY))
+        slowest = sorted(((t, m) for m, t in modules.items() if "." not in m and m not in STARTUP), reverse=True)[:5]
+        print(f"{label:>5}: {seconds * 1000:7.0f} ms  heavy: {', '.join(heavy) or 'none'}")
+        print("        slowest: " + ", ".join(f"{m} {t * 1000:.0f} ms" for t, m in slowest))
+        if label == "core":
+            within = seconds * 1000 <= args.budget_ms
+            ok &= within and not heavy
+            if not within:
+                print(f"        OVER BUDGET ({args.budget_ms:.0f} ms)")
+        else:
+            ok &= set(heavy) <= set(APP_HEAVY)
+
+    print("ok" if ok else "FAILED")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
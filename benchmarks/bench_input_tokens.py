@@ -0,0 +1,168 @@
+"""Input tokens per analysis before and after normalization and the compact prompt.
+
+    python benchmarks/bench_input_tokens.py [--pages 5 30 120] [--min-saving 25]
+
+Generates SRS PDFs with the usual page furniture (running header and footer,
+page numbers, a dotted table of contents, a confidentiality notice), extracts
+them, and counts the input tokens one analysis sends (system prompt + document,
+per chunk for documents over ``CHUNK_TOKENS``) the old way and the new way. Also checks that no requirement line is lost.
+Tokens are estimated as characters / 4, as ``chunking.estimate_tokens`` does.
+
+Exits non-zero if a requirement line is lost or the saving over all documents
+is below ``--min-saving`` percent.
+"""
+import os, sys, argparse, tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("GROQ_API_KEY", "unused")     # only the prompt is read; nothing is sent
+
+from reportlab.lib.pagesizes import letter
+from reportlab.pdfgen import canvas
+from chunking import estimate_tokens, split_sections
+from normalize import normalize_document
+import extractor, analyzer
+
+# the schema prompt as it stood before it was compacted
+VERBOSE_PROMPT = """You are an expert software requirements analyst. 
+Analyze the provided software requirements document and return ONLY valid JSON with this exact structure:
+
+{
+  "project_info": {
+    "detected_type": "E-commerce / Hospital System / LMS / FinTech / ERP / Social Media / Other",
+    "complexity": "Small / Medium / Large",
+    "complexity_reason": "brief reason",
+    "total_requirements_count": 0
+  },
+  "quality_score": {
+    "overall": 0,
+    "clarity": 0,
+    "completeness": 0,
+    "consistency": 0,
+    "testability": 0,
+    "breakdown": "brief explanation of score"
+  },
+  "functional_requirements": [
+    {"id": "FR1", "description": "...", "priority": "High/Medium/Low", "category": "Core/Secondary/Optional"}
+  ],
+  "non_functional_requirements": [
+    {"id": "NFR1", "category": "Performance/Security/Usability/Scalability/Reliability", "description": "..."}
+  ],
+  "constraints": [
+    {"id": "CON1", "description": "..."}
+  ],
+  "risks": [
+    {"id": "RSK1", "type": "Security/Scalability/Performance/Privacy/Compliance", "description": "...", "severity": "High/Medium/Low"}
+  ],
+  "ambiguities": [
+    {"id": "AMB1", "text": "...", "issue": "why it is ambiguous", "suggestion": "how to fix it"}
+  ],
+  "missing_information": [
+    {"id": "MI1", "area": "...", "description": "what is missing", "impact": "High/Medium/Low"}
+  ],
+  "scope_creep": [
+    {"id": "SC1", "statement": "exact text from document", "reason": "why this is scope creep"}
+  ],
+  "clarification_questions": {
+    "client": [{"id": "CQ1", "question": "..."}],
+    "developer": [{"id": "DQ1", "question": "..."}],
+    "tester": [{"id": "TQ1", "question": "..."}],
+    "project_manager": [{"id": "PQ1", "question": "..."}]
+  },
+  "summary": {
+    "total_fr": 0,
+    "total_nfr": 0,
+    "total_ambiguities": 0,
+    "total_risks": 0,
+    "total_scope_creep": 0,
+    "overall_quality": "Good/Fair/Poor",
+    "recommendation": "..."
+  }
+}
+
+Return ONLY the JSON. No extra text. No markdown."""
+
+LINES = [
+    "FR-{n} The system shall let a signed-in customer cancel an order within 24 hours.",
+    "FR-{n} Search results shall be returned within 2 seconds for 95% of queries.",
+    "NFR-{n} Payment data shall be encrypted with AES-256 at rest.",
+    "FR-{n} The administrator shall be notified when stock drops below 10 units.",
+]
+PER_PAGE  = 14     # requirement lines on a content page
+TOC_LINES = 40     # table-of-contents entries per page
+
+
+def make_pdf(path: str, pages: int):
+    """An IEEE-830 style SRS: TOC pages with dot leaders, then one numbered section per page."""
+    c = canvas.Canvas(path, pagesize=letter)
+    toc   = [f"{s}.{k} Module {s} {name}" for s in range(1, pages + 1)
+             for k, name in enumerate(("overview", "requirements", "acceptance"), 1)]
+    toc_pages = -(-len(toc) // TOC_LINES)
+    for p in range(pages + toc_pages):
+        c.drawString(72, 760, "ACME Order Platform - Software Requirements Specification v2.1")
+        c.drawString(72, 744, "CONFIDENTIAL - Internal use only")
+        y = 712
+        if p < toc_pages:
+            if p == 0:
+                c.drawString(72, y, "Table of Contents")
+            for i, entry in enumerate(toc[p * TOC_LINES:(p + 1) * TOC_LINES]):
+                y -= 15
+                c.drawString(72, y, entry + " " + ". " * 25 + str(toc_pages + 1 + (p * TOC_LINES + i) // 3))
+        else:
+            s = p - toc_pages + 1
+            c.drawString(72, y, f"{s}. Module {s}")
+            c.drawString(72, y - 24, f"{s}.1 Overview")
+            c.drawString(72, y - 42, f"Module {s} covers order handling for the storefront.")
+            y -= 70
+            c.drawString(72, y, f"{s}.2 Requirements")
+            for j in range(PER_PAGE):
+                y -= 18
+                c.drawString(72, y, LINES[j % len(LINES)].format(n=f"{s}.{j}"))
+        c.drawString(72, 40, "© 2024 ACME Corp. All rights reserved.")
+        c.drawString(500, 40, f"Page {p + 1} of {pages + toc_pages}")
+        c.showPage()
+    c.save()
+
+
+def request_tokens(prompt: int, text: str) -> int:
+    """Input tokens of every request one analysis sends: the prompt goes with each chunk."""
+    chunks = split_sections(text, analyzer.CHUNK_TOKENS) if estimate_tokens(text) > analyzer.CHUNK_TOKENS else [text]
+    return sum(prompt + estimate_tokens(c) for c in chunks)
+
+
+def requirement_lines(text: str) -> list:
+    return [" ".join(l.split()) for l in text.splitlines() if l.strip().startswith(("FR-", "NFR-"))]
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--pages", type=int, nargs="+", default=[5, 30, 120])
+    ap.add_argument("--min-saving", type=float, default=25.0, help="required saving, percent")
+    args = ap.parse_args()
+
+    prompt_before, prompt_after = estimate_tokens(VERBOSE_PROMPT), estimate_tokens(analyzer._analysis_prompt())
+    print(f"system prompt: {prompt_before} -> {prompt_after} tokens")
+    print(f"{'pages':>6}  {'doc before':>10}  {'doc after':>9}  {'request before':>14}  {'request after':>13}  saved")
+    ok, total_before, total_after = True, 0, 0
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in args.pages:
+            path = os.path.join(tmp, f"srs_{n}.pdf")
+            make_pdf(path, n)
+            extractor._page_cache.clear()
+            raw  = "\n".join(p.text for p in extractor.extract_pdf_pages(path, parallel=False) if p.text)
+            text = normalize_document(extractor.extract_text(path, parallel=False))
+            if requirement_lines(text) != requirement_lines(raw):
+                print(f"{n:>6}  requirement lines changed by normalization  FAILED")
+                ok = False
+                continue
+            before = request_tokens(prompt_before, raw)
+            after  = request_tokens(prompt_after, text)
+            saved  = 100 * (before - after) / before
+            total_before, total_after = total_before + before, total_after + after
+            print(f"{n:>6}  {estimate_tokens(raw):>10}  {estimate_tokens(text):>9}  {before:>14}  {after:>13}  {saved:.1f}%")
+    saved = 100 * (total_before - total_after) / max(total_before, 1)
+    print(f"overall: {total_before} -> {total_after} input tokens, {saved:.1f}% saved")
+    return 0 if ok and saved >= args.min_saving else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
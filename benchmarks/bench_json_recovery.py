@@ -0,0 +1,111 @@
+"""How often a bad model response still forces a retry, strict parsing vs. recovery.
+
+    python benchmarks/bench_json_recovery.py [--corpus captured/] [--max-retry-rate 0.05]
+
+Without ``--corpus`` the responses are synthetic: analyses of several sizes cut
+off at random points (as at ``max_tokens``), wrapped in prose or code fences,
+or followed by chatter. With ``--corpus`` every ``*.txt``/``*.json`` file in the
+directory is one captured raw response. Also runs one truncated analysis end
+to end against the fake backend to check the continuation request fills it in.
+
+Exits non-zero if the retry rate with recovery exceeds ``--max-retry-rate``.
+"""
+import os, sys, json, random, argparse
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+sys.path.insert(0, HERE)
+
+from bench_pdf_render import make_analysis
+from fake_groq import FakeGroq
+from json_stream import recover_json
+from chunking import LIST_SECTIONS
+
+
+def strict_parse(raw: str) -> dict:
+    """The parser analyze_requirements used before recovery."""
+    raw = raw.strip().removeprefix("```json").removeprefix("```").removesuffix("```").strip()
+    return json.loads(raw)
+
+
+def synthetic_corpus(seed: int, per_size: int) -> list:
+    rng, corpus = random.Random(seed), []
+    for n in (5, 20, 60):
+        full = json.dumps(make_analysis(n), indent=2)
+        corpus += [
+            "Here is the analysis you asked for:\n\n" + full,
+            "```json\n" + full + "\n```\nLet me know if you need anything else.",
+            full + "\n\nNote: some requirements {like FR3} were ambiguous.",
+        ]
+        # cut anywhere past the first section, as a max_tokens stop would
+        first = full.index('"quality_score"')
+        corpus += [full[:rng.randrange(first, len(full))] for _ in range(per_size)]
+    return corpus
+
+
+def load_corpus(directory: str) -> list:
+    return [open(os.path.join(directory, name), encoding="utf-8", errors="replace").read()
+            for name in sorted(os.listdir(directory)) if name.endswith((".txt", ".json"))]
+
+
+def items(result: dict) -> int:
+    return sum(len(result.get(s) or []) for s in LIST_SECTIONS)
+
+
+def check_continuation() -> bool:
+    """Truncate one analysis at max_tokens on the fake backend and expect every section back."""
+    fake = FakeGroq(frs=80).start()
+    os.environ["GROQ_BASE_URL"] = fake.base_url
+    os.environ.setdefault("GROQ_API_KEY", "fake-key")
+    import analyzer, routing
+    # one tier whose budget cuts the answer off after the FRs, even as compact rows
+    routes, routing.ROUTES = routing.ROUTES, (routing.Route("test", "llama-3.3-70b-versatile", 2500),)
+    try:
+        result = analyzer.analyze_requirements("The system shall process orders.\n" * 40, use_cache=False)
+    finally:
+        routing.ROUTES = routes
+        fake.stop()
+    ok = (not result.get("partial", {}).get("missing") and len(result["functional_requirements"]) == 80
+          and result["summary"]["total_fr"] == 80)
+    print(f"continuation: {fake.requests} LLM calls, {len(result['functional_requirements'])}/80 FRs, "
+          f"partial={result.get('partial')}  {'ok' if ok else 'FAILED'}")
+    return ok
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--corpus", help="directory of captured raw responses")
+    ap.add_argument("--per-size", type=int, default=100, help="synthetic truncations per analysis size")
+    ap.add_argument("--seed", type=int, default=7)
+    ap.add_argument("--max-retry-rate", type=float, default=0.05)
+    args = ap.parse_args()
+
+    corpus = load_corpus(args.corpus) if args.corpus else synthetic_corpus(args.seed, args.per_size)
+    strict_fail = recover_fail = partial = salvaged = 0
+    for raw in corpus:
+        try:
+            strict_parse(raw)
+        except ValueError:
+            strict_fail += 1
+        try:
+            rec = recover_json(raw)
+        except ValueError:
+            recover_fail += 1
+            continue
+        if not rec.complete:
+            partial += 1
+            salvaged += items(rec.value)
+
+    n = len(corpus)
+    print(f"responses: {n}")
+    print(f"retries, strict parse:  {strict_fail:>5}  ({strict_fail / n:.1%})")
+    print(f"retries, with recovery: {recover_fail:>5}  ({recover_fail / n:.1%})")
+    print(f"partial results: {partial}, {salvaged / max(partial, 1):.1f} complete list items salvaged on average")
+
+    ok = recover_fail / n <= args.max_retry_rate
+    ok = check_continuation() and ok
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,75 @@
+"""Output tokens and generation time, full JSON vs. the compact row format.
+
+    python benchmarks/bench_output_tokens.py [--sizes 10 40 120] [--tokens-per-s 400]
+
+For analyses of several sizes, counts the tokens of the standard JSON answer
+(pretty-printed, as the model writes it, and minified) and of its compact
+form, and checks that ``compact_schema.expand`` restores the standard result
+exactly. Then runs one analysis per format against the fake backend at
+``--tokens-per-s`` to show the end-to-end effect. Tokens are estimated as
+characters / 4.
+
+Exits non-zero if an expansion differs or compact output is not smaller.
+"""
+import os, sys, json, time, copy, argparse
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+sys.path.insert(0, HERE)
+
+from bench_pdf_render import make_analysis
+from fake_groq import FakeGroq
+from chunking import estimate_tokens
+from compact_schema import compact, expand
+from routing import DEFAULT_ROUTES
+
+ANALYZE_MAX_TOKENS = DEFAULT_ROUTES[-1].max_tokens     # the largest output budget
+
+
+def timed_analysis(analyzer, fmt: str, text: str) -> tuple:
+    analyzer.OUTPUT_FORMAT = fmt
+    start  = time.perf_counter()
+    result = analyzer.analyze_requirements(text, use_cache=False)
+    return time.perf_counter() - start, result
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", type=int, nargs="+", default=[10, 40, 120], help="FRs per analysis")
+    ap.add_argument("--tokens-per-s", type=float, default=400, help="fake generation rate")
+    ap.add_argument("--e2e-frs", type=int, default=40, help="FRs in the end-to-end run (fits both formats)")
+    args = ap.parse_args()
+
+    ok = True
+    print(f"{'FRs':>5}  {'json':>7}  {'minified':>8}  {'compact':>7}  saved  round trip")
+    for n in args.sizes:
+        analysis = make_analysis(n)
+        pretty   = estimate_tokens(json.dumps(analysis, indent=2))
+        minified = estimate_tokens(json.dumps(analysis))
+        rows     = estimate_tokens(json.dumps(compact(analysis)))
+        same     = expand(json.loads(json.dumps(compact(analysis)))) == expand(copy.deepcopy(analysis))
+        ok = ok and same and rows < minified
+        over = "  (json over max_tokens)" if pretty > ANALYZE_MAX_TOKENS >= rows else ""
+        print(f"{n:>5}  {pretty:>7}  {minified:>8}  {rows:>7}  {100 * (1 - rows / pretty):4.1f}%  "
+              f"{'ok' if same else 'DIFFERS'}{over}")
+
+    fake = FakeGroq(frs=args.e2e_frs, tokens_per_s=args.tokens_per_s).start()
+    os.environ["GROQ_BASE_URL"] = fake.base_url
+    os.environ.setdefault("GROQ_API_KEY", "fake-key")
+    import analyzer, routing
+    routing.ROUTES = DEFAULT_ROUTES[-1:]     # one tier with the full budget: measure the format alone
+    text = "The system shall let a signed-in customer process orders.\n" * args.e2e_frs
+    try:
+        slow, full  = timed_analysis(analyzer, "json", text)
+        fast, small = timed_analysis(analyzer, "compact", text)
+    finally:
+        fake.stop()
+    same = full == small
+    ok = ok and same
+    print(f"end to end, {args.e2e_frs} FRs at {args.tokens_per_s:.0f} tok/s: json {slow:.2f}s, "
+          f"compact {fast:.2f}s ({100 * (1 - fast / slow):.0f}% faster), results {'equal' if same else 'DIFFER'}")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
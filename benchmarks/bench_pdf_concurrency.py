@@ -0,0 +1,64 @@
+"""Render many different analyses in parallel and check each PDF got its own content.
+
+    python benchmarks/bench_pdf_concurrency.py [--reports 50] [--threads 16]
+
+Exits non-zero if any report is missing its marker or contains another's.
+"""
+import os, io, sys, time, argparse
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pypdf import PdfReader
+from pdf_generator import render_pdf
+
+
+def make_analysis(n: int) -> dict:
+    tag = f"MARKER{n:04d}"
+    return {
+        "project_info": {"detected_type": f"Type {tag}", "complexity": "Medium",
+                         "complexity_reason": "generated", "total_requirements_count": n + 1},
+        "quality_score": {"overall": n % 100, "clarity": 50, "completeness": 50,
+                          "consistency": 50, "testability": 50, "breakdown": f"Breakdown for {tag}"},
+        "functional_requirements": [
+            {"id": f"FR{i + 1}", "description": f"{tag} requirement {i} shall hold.",
+             "priority": "High", "category": "Core"} for i in range(n % 15 + 1)
+        ],
+        "risks": [{"id": "RSK1", "type": "Security", "description": f"{tag} risk", "severity": "High"}],
+        "summary": {"overall_quality": "Fair", "recommendation": f"Fix {tag}"},
+    }
+
+
+def check(n: int) -> tuple:
+    report = render_pdf(make_analysis(n))
+    text = "".join(p.extract_text() or "" for p in PdfReader(io.BytesIO(report.data)).pages)
+    own    = f"MARKER{n:04d}" in text
+    others = {m for m in text.split() if m.startswith("MARKER") and not m.startswith(f"MARKER{n:04d}")}
+    return n, own and not others, report.page_count, report.render_seconds
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--reports", type=int, default=50)
+    ap.add_argument("--threads", type=int, default=16)
+    args = ap.parse_args()
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.threads) as pool:
+        results = list(pool.map(check, range(args.reports)))
+    elapsed = time.perf_counter() - start
+
+    bad = [n for n, ok, _, _ in results if not ok]
+    renders = sorted(r for _, _, _, r in results)
+    print(f"{args.reports} reports on {args.threads} threads in {elapsed:.2f}s  "
+          f"(render p50 {renders[len(renders) // 2] * 1000:.0f} ms, max {renders[-1] * 1000:.0f} ms, "
+          f"pages {sum(p for _, _, p, _ in results)})")
+    if bad:
+        print(f"FAIL: wrong content in reports {bad}")
+        return 1
+    print("OK: every report contains only its own content")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
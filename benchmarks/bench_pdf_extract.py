@@ -0,0 +1,62 @@
+"""Compare pypdf, pdfplumber and the tiered extractor on generated PDFs.
+
+    python benchmarks/bench_pdf_extract.py [--pages 5 50 200]
+"""
+import os, sys, time, argparse, tempfile
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from reportlab.lib.pagesizes import letter
+from reportlab.pdfgen import canvas
+from pypdf import PdfReader
+import extractor
+
+
+def make_pdf(path: str, pages: int):
+    c = canvas.Canvas(path, pagesize=letter)
+    for p in range(pages):
+        if p % 10 == 9:
+            # figure-only page: no text layer, so the tiered path falls back to pdfplumber
+            c.rect(72, 300, 400, 300, fill=1)
+            c.showPage()
+            continue
+        c.drawString(72, 760, f"ACME Order Platform SRS v2.1                          Page {p + 1}")
+        for j in range(40):
+            c.drawString(72, 730 - j * 16,
+                         f"FR-{p + 1}.{j}  The system shall process order {j} within two seconds for logged-in users.")
+        c.showPage()
+    c.save()
+
+
+def run(path: str, backend: str) -> tuple:
+    extractor._page_cache.clear()
+    start = time.perf_counter()
+    if backend == "auto":
+        pages = extractor.extract_pdf_pages(path, parallel=False)
+        used  = Counter(p.backend for p in pages)
+    else:
+        n     = len(PdfReader(path).pages)
+        pages = extractor._extract_page_range(path, 0, n, backend)
+        used  = Counter(b for _, b in pages)
+    return time.perf_counter() - start, used
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--pages", type=int, nargs="+", default=[5, 50, 200])
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"{'pages':>6}  {'pdfplumber':>11}  {'pypdf':>9}  {'tiered':>9}  {'speedup':>7}  backends")
+        for n in args.pages:
+            path = os.path.join(tmp, f"srs_{n}.pdf")
+            make_pdf(path, n)
+            slow, _    = run(path, "pdfplumber")
+            fast, _    = run(path, "pypdf")
+            tier, used = run(path, "auto")
+            print(f"{n:>6}  {slow:>10.2f}s  {fast:>8.2f}s  {tier:>8.2f}s  {slow / tier:>6.1f}x  {dict(used)}")
+
+
+if __name__ == "__main__":
+    main()
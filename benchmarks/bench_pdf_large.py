@@ -0,0 +1,49 @@
+"""Scaling of large-report rendering: time per row and peak Python memory.
+
+    python benchmarks/bench_pdf_large.py [--rows 1250 2500 5000 10000] [--compare]
+
+``--compare`` also renders each size in the single-table mode for reference.
+Peak memory is measured with tracemalloc in a second pass so it does not skew
+the timings.
+"""
+import os, sys, time, argparse, tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_pdf_render import make_analysis
+from pdf_generator import render_pdf, report_rows
+
+
+def measure(analysis: dict, large: bool) -> tuple:
+    start = time.perf_counter()
+    report = render_pdf(analysis, large=large)
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    render_pdf(analysis, large=large)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak / 2**20, len(report.data) / 2**20, report.page_count
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, nargs="+", default=[1250, 2500, 5000, 10000])
+    ap.add_argument("--compare", action="store_true")
+    args = ap.parse_args()
+
+    modes = [True, False] if args.compare else [True]
+    print(f"{'rows':>6}  {'mode':>6}  {'time':>8}  {'ms/row':>7}  {'peak MB':>8}  {'pdf MB':>7}  pages")
+    for n in args.rows:
+        # make_analysis adds ~n/5 rows to each of the other sections; scale FRs so the total is n
+        analysis = make_analysis(round(n / 2.8))
+        rows = report_rows(analysis)
+        for large in modes:
+            t, peak, size, pages = measure(analysis, large)
+            print(f"{rows:>6}  {'large' if large else 'single':>6}  {t:>7.2f}s  {t / rows * 1000:>7.3f}  "
+                  f"{peak:>8.1f}  {size:>7.1f}  {pages}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""Per-report render time of pdf_generator.render_pdf for small, medium and large analyses.
+
+    python benchmarks/bench_pdf_render.py [--sizes 10 100 1000] [--repeat 3]
+"""
+import os, sys, time, argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pdf_generator import render_pdf
+
+PRIORITIES = ["High", "Medium", "Low"]
+
+
+def make_analysis(n: int) -> dict:
+    """Synthetic analysis with ``n`` functional requirements and proportional other sections."""
+    k = max(n // 5, 1)
+    return {
+        "project_info": {"detected_type": "E-commerce", "complexity": "Large",
+                         "complexity_reason": "many modules", "total_requirements_count": n + k},
+        "quality_score": {"overall": 64, "clarity": 60, "completeness": 70, "consistency": 66,
+                          "testability": 58, "breakdown": "Mostly clear; several vague NFRs."},
+        "functional_requirements": [
+            {"id": f"FR{i}", "description": f"The system shall let customers manage order {i} & track its status.",
+             "priority": PRIORITIES[i % 3], "category": "Core"} for i in range(1, n + 1)],
+        "non_functional_requirements": [
+            {"id": f"NFR{i}", "category": "Performance", "description": f"Page {i} loads in under 2 s."}
+            for i in range(1, k + 1)],
+        "constraints": [{"id": f"CON{i}", "description": f"Must run on platform {i}."} for i in range(1, k + 1)],
+        "risks": [{"id": f"RSK{i}", "type": "Security", "description": f"Risk {i} <unvalidated input>.",
+                   "severity": PRIORITIES[i % 3]} for i in range(1, k + 1)],
+        "ambiguities": [{"id": f"AMB{i}", "text": "fast", "issue": "not measurable", "suggestion": "use ms"}
+                        for i in range(1, k + 1)],
+        "missing_information": [{"id": f"MI{i}", "area": "Auth", "description": "No MFA policy.", "impact": "High"}
+                                for i in range(1, k + 1)],
+        "scope_creep": [{"id": f"SC{i}", "statement": "may add AI later", "reason": "future work"}
+                        for i in range(1, k + 1)],
+        "clarification_questions": {role: [{"id": f"Q{i}", "question": f"Question {i}?"} for i in range(1, k + 1)]
+                                    for role in ("client", "developer", "tester", "project_manager")},
+        "summary": {"total_fr": n, "total_nfr": k, "total_ambiguities": k, "total_risks": k,
+                    "total_scope_creep": k, "overall_quality": "Fair", "recommendation": "Clarify NFRs."},
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000])
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    print(f"{'FRs':>6}  {'best':>8}  {'median':>8}  pages")
+    for n in args.sizes:
+        analysis = make_analysis(n)
+        times, pages = [], 0
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            pages = render_pdf(analysis).page_count
+            times.append(time.perf_counter() - start)
+        times.sort()
+        print(f"{n:>6}  {times[0]:>7.3f}s  {times[len(times) // 2]:>7.3f}s  {pages}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+"""End-to-end pipeline benchmark against a local fake Groq backend.
+
+    python benchmarks/bench_pipeline.py [--sizes 20 200 1000] [--formats txt docx pdf]
+                                        [--latency 0.2] [--tokens-per-s 0] [--repeat 3]
+                                        [--baseline benchmarks/results/<commit>.json]
+
+Generates synthetic requirement documents of increasing size in each format
+and times every stage of a request: ``extract_text``, ``analyze_requirements``
+(HTTP round trip to the fake backend, parse and merge), JSON parsing on its
+own (including expansion of the compact format), ``generate_pdf`` and
+``score_html``. No API quota is used and the result
+cache is bypassed.
+
+Results (median of ``--repeat`` runs) are written to
+``benchmarks/results/<commit>.json``; pass ``--baseline`` with an earlier file
+to print the change per stage.
+"""
+import os, sys, json, time, argparse, platform, tempfile, subprocess, statistics
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+sys.path.insert(0, ROOT)
+sys.path.insert(0, HERE)
+
+from fake_groq import FakeGroq
+
+STAGES = ("extract_s", "analyze_s", "parse_s", "pdf_s", "score_html_s")
+MODULES = ["Checkout", "Catalog", "Accounts", "Payments", "Shipping", "Reporting", "Admin", "Search"]
+
+
+# ── Synthetic documents ──
+def make_lines(n: int) -> list:
+    """An SRS with ``n`` requirements grouped under numbered module headings."""
+    lines = ["ACME Order Platform", "Software Requirements Specification v2.1", ""]
+    for i in range(n):
+        if i % 25 == 0:
+            m = i // 25
+            lines += ["", f"{m + 1}. {MODULES[m % len(MODULES)]} Module", ""]
+        kind = "shall" if i % 7 else "should be fast and"
+        lines.append(f"REQ-{i + 1}: The system {kind} let a signed-in customer process order item {i + 1} "
+                     f"and confirm it within 2 seconds.")
+    return lines
+
+
+def write_txt(path: str, lines: list):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines))
+
+
+def write_docx(path: str, lines: list):
+    from docx import Document
+    doc = Document()
+    for line in lines:
+        if line:
+            doc.add_paragraph(line)
+    doc.save(path)
+
+
+def write_pdf(path: str, lines: list):
+    from reportlab.lib.pagesizes import A4
+    from reportlab.pdfgen import canvas
+    c = canvas.Canvas(path, pagesize=A4)
+    c.setFont("Helvetica", 8)
+    y = 800
+    for line in lines:
+        if y < 50:
+            c.showPage()
+            c.setFont("Helvetica", 8)
+            y = 800
+        c.drawString(40, y, line)
+        y -= 12
+    c.save()
+
+
+WRITERS = {"txt": write_txt, "docx": write_docx, "pdf": write_pdf}
+
+
+# ── Measurement ──
+def _timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    value = fn(*args, **kwargs)
+    return value, time.perf_counter() - start
+
+
+def run_once(path: str, out_dir: str) -> dict:
+    import extractor, analyzer
+    from pdf_generator import generate_pdf
+    from app import score_html
+
+    extractor._page_cache.clear()
+    text, extract_s = _timed(extractor.extract_text, path, parallel=False)
+    result, analyze_s = _timed(analyzer.analyze_requirements, text, use_cache=False)
+
+    # time parsing on its own, on the raw response of the first (or only) window
+    first = analyzer.split_sections(text, analyzer.CHUNK_TOKENS)[0] if result.get("chunking") else text
+    raw = analyzer._complete(analyzer._analyze_request(first, analyzer._analysis_plan(first)))
+    _, parse_s = _timed(analyzer._parse_analysis, raw)
+
+    _, pdf_s = _timed(generate_pdf, result, os.path.join(out_dir, "report.pdf"))
+    _, score_html_s = _timed(score_html, result)
+    return {
+        "chars": len(text), "response_chars": len(raw),
+        "frs": len(result.get("functional_requirements", [])),
+        "chunks": (result.get("chunking") or {}).get("chunks", 1),
+        "extract_s": extract_s, "analyze_s": analyze_s, "parse_s": parse_s,
+        "pdf_s": pdf_s, "score_html_s": score_html_s,
+    }
+
+
+def measure(path: str, out_dir: str, repeat: int) -> dict:
+    runs = [run_once(path, out_dir) for _ in range(repeat)]
+    row = {k: v for k, v in runs[0].items() if k not in STAGES}
+    for stage in STAGES:
+        row[stage] = round(statistics.median(r[stage] for r in runs), 5)
+    row["total_s"] = round(sum(row[s] for s in STAGES), 5)
+    return row
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True, cwd=ROOT).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def print_table(rows: list, baseline: dict = None):
+    base = {(r["format"], r["size"]): r for r in (baseline or {}).get("rows", [])}
+    cols = ("extract", "analyze", "parse", "pdf", "score_html", "total")
+    w    = 16 if base else 11
+    print(f"{'fmt':>4} {'reqs':>5} {'chars':>8} {'chunks':>6}  " + "  ".join(f"{c:>{w}}" for c in cols))
+    for r in rows:
+        old = base.get((r["format"], r["size"]))
+        cells = []
+        for c in cols:
+            v = r[c + "_s"]
+            cell = f"{v * 1000:.1f}ms"
+            if old and old.get(c + "_s"):
+                cell += f" {(v / old[c + '_s'] - 1) * 100:+.0f}%"
+            cells.append(f"{cell:>{w}}")
+        print(f"{r['format']:>4} {r['size']:>5} {r['chars']:>8} {r['chunks']:>6}  " + "  ".join(cells))
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", type=int, nargs="+", default=[20, 200, 1000], help="requirements per document")
+    ap.add_argument("--formats", nargs="+", default=list(WRITERS), choices=list(WRITERS))
+    ap.add_argument("--latency", type=float, default=0.2, help="fake backend time to first token (s)")
+    ap.add_argument("--tokens-per-s", type=float, default=0.0, help="fake generation rate, 0 for instant")
+    ap.add_argument("--frs", type=int, help="fixed FRs per fake response (default: scales with the prompt)")
+    ap.add_argument("--canned", help="JSON file the fake backend returns for every analysis")
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--out", help="results file (default: benchmarks/results/<commit>.json)")
+    ap.add_argument("--baseline", help="earlier results file to compare against")
+    args = ap.parse_args()
+
+    fake = FakeGroq(latency=args.latency, tokens_per_s=args.tokens_per_s, frs=args.frs,
+                    canned=args.canned).start()
+    # the analyzer builds its clients at import, so point them at the fake first
+    os.environ["GROQ_BASE_URL"] = fake.base_url
+    os.environ.setdefault("GROQ_API_KEY", "fake-key")
+
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in args.sizes:
+            lines = make_lines(n)
+            for fmt in args.formats:
+                path = os.path.join(tmp, f"srs_{n}.{fmt}")
+                WRITERS[fmt](path, lines)
+                rows.append({"format": fmt, "size": n, **measure(path, tmp, args.repeat)})
+    fake.stop()
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        print(f"baseline: {baseline['commit']} ({args.baseline})")
+    print_table(rows, baseline)
+
+    commit = git_commit()
+    out = args.out or os.path.join(HERE, "results", f"{commit}.json")
+    os.makedirs(os.path.dirname(out) or ".", exist_ok=True)
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump({
+            "commit": commit, "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(), "cpus": os.cpu_count(),
+            "backend": {"latency": args.latency, "tokens_per_s": args.tokens_per_s,
+                        "frs": args.frs, "canned": args.canned},
+            "output_format": os.environ.get("REQMIND_OUTPUT_FORMAT", "compact"),
+            "repeat": args.repeat, "rows": rows,
+        }, f, indent=2)
+    print(f"saved {out}  ({fake.requests} fake LLM calls)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""Time the rule-based pre-scan on a long synthetic SRS.
+
+    python benchmarks/bench_prescan.py [--pages 200] [--budget-ms 300]
+
+Exits non-zero if the median scan of ``--pages`` pages (~45 lines each)
+exceeds ``--budget-ms``.
+"""
+import os, sys, time, argparse, statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from prescan import scan
+
+LINES = [
+    "REQ-{n}: The system shall let a signed-in customer cancel order {n} within 24 hours of purchase.",
+    "REQ-{n}: Search results should be fast and user-friendly for all catalog pages.",
+    "REQ-{n}: Payment data shall be encrypted with AES-256 at rest and TLS 1.3 in transit.",
+    "REQ-{n}: Reports may include charts, exports, etc. as appropriate.",
+    "REQ-{n}: The administrator shall be notified by email when stock for item {n} drops below 10 units.",
+    "REQ-{n}: In the future we may add AI recommendations for returning customers.",
+    "REQ-{n}: Invoices should be generated and stored for seven years.",
+    "REQ-{n}: The mobile app shall support iOS 16+ and Android 12+.",
+]
+
+
+def make_document(pages: int) -> str:
+    lines = []
+    for p in range(pages):
+        lines.append(f"{p + 1}. Module {p + 1}")
+        lines += [LINES[(p + i) % len(LINES)].format(n=p * 45 + i) for i in range(44)]
+    return "\n".join(lines)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--pages", type=int, default=200)
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--budget-ms", type=float, default=300)
+    args = ap.parse_args()
+
+    text = make_document(args.pages)
+    times = []
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        result = scan(text)
+        times.append((time.perf_counter() - start) * 1000)
+    median = statistics.median(times)
+    print(f"{args.pages} pages, {len(text) / 1e6:.2f} MB: median {median:.1f} ms, best {min(times):.1f} ms")
+    print(f"ambiguities: {len(result['ambiguities'])}, scope creep: {len(result['scope_creep'])}")
+    for item in result["ambiguities"][:3] + result["scope_creep"][:2]:
+        start, end = item["span"]
+        assert text[start:end] == item["terms"][0], item
+        print(f"  {item['id']:>6} [{start}:{end}] {text[start:end]!r}")
+    return 0 if median <= args.budget_ms else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
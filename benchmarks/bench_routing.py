@@ -0,0 +1,105 @@
+"""Model routing vs. one fixed model and budget, on documents of very different sizes.
+
+    python benchmarks/bench_routing.py [--small-rate 1200] [--large-rate 300] [--latency 0.2]
+
+Runs a user story, a mid-sized SRS and a large SRS against the fake backend,
+once with a single tier (the large model with 6000 output tokens on every
+request, as before routing) and once with the default routing table. Prints
+every routing decision from the trace log (tier, model, output budget,
+outcome, latency and tokens) and the total output budget reserved, which is
+what Groq's tokens-per-minute limit counts. The fake backend generates at ``--small-rate`` tokens/s for the small
+model and ``--large-rate`` for the others. A last run makes the small model
+answer with prose to show the escalation to the next tier.
+
+Exits non-zero if routing is slower in total than the fixed tier or the
+escalation does not recover a valid result.
+"""
+import os, sys, json, time, argparse, tempfile
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+sys.path.insert(0, HERE)
+
+# spans are traced from the first metrics import on, so the log must be set before it
+TRACE = os.path.join(tempfile.mkdtemp(), "trace.jsonl")
+os.environ["REQMIND_TRACE_LOG"] = TRACE
+
+from fake_groq import FakeGroq
+import routing
+
+DOCUMENTS = {
+    "user story": 5,      # requirement lines
+    "srs":        40,
+    "large srs":  320,
+}
+
+
+def make_document(lines: int) -> str:
+    return "\n".join(f"REQ-{i}: The system shall let a signed-in customer process order item {i} "
+                     f"and confirm it within 2 seconds." for i in range(1, lines + 1))
+
+
+def route_spans() -> list:
+    if not os.path.exists(TRACE):
+        return []
+    with open(TRACE, encoding="utf-8") as f:
+        spans = [json.loads(line) for line in f if '"stage": "route"' in line]
+    os.remove(TRACE)
+    return spans
+
+
+def run(analyzer, label: str, routes: tuple) -> tuple:
+    """Analyze every document; returns total seconds and output tokens reserved (``max_tokens``)."""
+    routing.ROUTES = routes
+    total = reserved = 0
+    for name, lines in DOCUMENTS.items():
+        start = time.perf_counter()
+        result = analyzer.analyze_requirements(make_document(lines), use_cache=False)
+        seconds = time.perf_counter() - start
+        total += seconds
+        spans = route_spans()
+        reserved += sum(s["max_tokens"] * s.get("llm_calls", 1) for s in spans)
+        print(f"{label:>8}  {name:<10} {seconds:6.2f}s  {len(result['functional_requirements']):>3} FRs")
+        for s in spans:
+            print(f"{'':>10}  {s['route']:<6} {s['model']:<24} max_tokens={s['max_tokens']:<5} "
+                  f"{s['outcome']:<15} {s['seconds']:5.2f}s  {s.get('prompt_tokens', 0):>5}+"
+                  f"{s.get('completion_tokens', 0):<5} tokens"
+                  + (f"  (escalated: {s['escalated_for']})" if s.get("escalated_for") else ""))
+    return total, reserved
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--small-rate", type=float, default=1200, help="small model tokens/s")
+    ap.add_argument("--large-rate", type=float, default=300, help="other models tokens/s")
+    ap.add_argument("--latency", type=float, default=0.2)
+    args = ap.parse_args()
+
+    small = routing.DEFAULT_ROUTES[0].model
+    fake = FakeGroq(latency=args.latency, tokens_per_s=args.large_rate,
+                    model_rates={small: args.small_rate}).start()
+    os.environ["GROQ_BASE_URL"] = fake.base_url
+    os.environ.setdefault("GROQ_API_KEY", "fake-key")
+    import analyzer
+    try:
+        # before routing: the large model with its full budget on every request
+        base, routing.OUTPUT_BASE_TOKENS = routing.OUTPUT_BASE_TOKENS, 10 ** 6
+        fixed, fixed_reserved = run(analyzer, "fixed", routing.DEFAULT_ROUTES[-1:])
+        routing.OUTPUT_BASE_TOKENS = base
+        routed, routed_reserved = run(analyzer, "routed", routing.DEFAULT_ROUTES)
+        print(f"total: fixed {fixed:.2f}s, {fixed_reserved} max_tokens reserved; "
+              f"routed {routed:.2f}s, {routed_reserved} max_tokens reserved")
+
+        fake.invalid_models = {small}
+        routing.ROUTES = routing.DEFAULT_ROUTES
+        result = analyzer.analyze_requirements(make_document(DOCUMENTS["user story"]), use_cache=False)
+        outcomes = [(s["route"], s["outcome"]) for s in route_spans()]
+        escalated = outcomes == [("small", "invalid_json"), ("medium", "ok")] and result["functional_requirements"]
+        print(f"escalation with an invalid small model: {outcomes}  {'ok' if escalated else 'FAILED'}")
+    finally:
+        fake.stop()
+    return 0 if routed <= fixed and escalated else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,126 @@
+"""Rate-limited bursts, priority lanes and coalescing of identical requests.
+
+    python benchmarks/bench_scheduler.py [--burst 12] [--rpm 120] [--burst-s 2] [--latency 0.3]
+
+Starts the fake backend with a requests-per-minute limit (429 with
+``retry-after`` once exceeded) and runs:
+
+* a burst of different analyses with no retries (what a plain client sees),
+  with retries that honour ``retry-after``, and with the scheduler's own
+  buckets matching the backend's limit; prints failures, 429s and time;
+* batch analyses queued ahead of interactive ones under the same limit, and
+  the latency of each lane;
+* identical analyses started together (sync, async and streamed), and the
+  number of upstream calls they cost.
+
+Exits non-zero if a scheduled burst loses a request, draws more 429s than
+retrying blindly, interactive requests wait longer than batch ones, or
+identical requests are not coalesced into one call.
+"""
+import os, sys, time, asyncio, argparse
+from concurrent.futures import ThreadPoolExecutor
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+sys.path.insert(0, HERE)
+
+from fake_groq import FakeGroq
+from scheduler import Scheduler, lane
+import routing
+
+
+def make_document(n: int) -> str:
+    return "\n".join(f"REQ-{n}.{i}: The system shall let a customer process order {n}-{i} within 2 seconds."
+                     for i in range(1, 6))
+
+
+async def burst(analyzer, count: int) -> tuple:
+    """Analyze ``count`` different documents at once; returns (failures, seconds)."""
+    start = time.perf_counter()
+    outcomes = await asyncio.gather(*(analyzer.analyze_requirements_async(make_document(i), use_cache=False)
+                                      for i in range(count)), return_exceptions=True)
+    return sum(isinstance(o, Exception) for o in outcomes), time.perf_counter() - start
+
+
+async def lanes(analyzer, batch: int, interactive: int) -> dict:
+    """Queue ``batch`` batch analyses, then ``interactive`` interactive ones; mean latency per lane."""
+    async def timed(n):
+        start = time.perf_counter()
+        await analyzer.analyze_requirements_async(make_document(n), use_cache=False)
+        return time.perf_counter() - start
+
+    with lane("batch"):
+        queued = [asyncio.ensure_future(timed(1000 + i)) for i in range(batch)]
+    await asyncio.sleep(0.05)
+    urgent = [asyncio.ensure_future(timed(2000 + i)) for i in range(interactive)]
+    queued, urgent = await asyncio.gather(asyncio.gather(*queued), asyncio.gather(*urgent))
+    return {"batch": sum(queued) / len(queued), "interactive": sum(urgent) / len(urgent)}
+
+
+async def coalesced_async(analyzer, copies: int) -> list:
+    text = make_document(3000)
+
+    async def streamed():
+        return dict([item async for item in analyzer.stream_analysis_async(text, use_cache=False)])
+    results  = await asyncio.gather(*(analyzer.analyze_requirements_async(make_document(3001), use_cache=False)
+                                      for _ in range(copies)))
+    streams  = await asyncio.gather(*(streamed() for _ in range(copies)))
+    return [results, streams]
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--burst", type=int, default=12, help="concurrent analyses in the burst")
+    ap.add_argument("--rpm", type=float, default=120, help="the fake backend's requests-per-minute limit")
+    ap.add_argument("--burst-s", type=float, default=2.0, help="seconds of limit its bucket holds")
+    ap.add_argument("--latency", type=float, default=0.3)
+    args = ap.parse_args()
+
+    fake = FakeGroq(latency=args.latency, rpm=args.rpm, burst_s=args.burst_s).start()
+    os.environ["GROQ_BASE_URL"] = fake.base_url
+    os.environ.setdefault("GROQ_API_KEY", "fake-key")
+    import analyzer
+    ok = True
+    try:
+        # these documents all route to the small model; give the scheduler the backend's bucket size
+        limits = {routing.DEFAULT_ROUTES[0].model: {"burst_s": args.burst_s}}
+        rows = {}
+        for label, scheduler in (("no retries", Scheduler(limits={}, retries=0)),
+                                 ("retry-after", Scheduler(limits={})),
+                                 ("scheduled", Scheduler(rpm=args.rpm, limits=limits))):
+            fake._buckets.clear()      # every run starts with full backend buckets
+            analyzer._scheduler, before = scheduler, sum(fake.rejected.values())
+            failures, seconds = asyncio.run(burst(analyzer, args.burst))
+            rows[label] = (failures, sum(fake.rejected.values()) - before)
+            print(f"{label:>12}: {args.burst - failures:>3}/{args.burst} ok  {rows[label][1]:>3} x 429  {seconds:6.2f}s")
+        ok &= rows["scheduled"][0] == 0 and rows["scheduled"][1] <= rows["retry-after"][1]
+
+        fake._buckets.clear()
+        analyzer._scheduler = Scheduler(rpm=args.rpm, limits=limits)
+        latency = asyncio.run(lanes(analyzer, batch=8, interactive=2))
+        print(f"lanes: batch {latency['batch']:.2f}s, interactive {latency['interactive']:.2f}s mean latency")
+        ok &= latency["interactive"] < latency["batch"]
+
+        fake.limits, analyzer._scheduler = (0, 0, 60.0), Scheduler(limits={})
+        copies = 5
+        before = fake.requests
+        with ThreadPoolExecutor(copies) as pool:
+            results = list(pool.map(lambda _: analyzer.analyze_requirements(make_document(4000), use_cache=False),
+                                    range(copies)))
+        calls = {"sync": fake.requests - before}
+        before = fake.requests
+        async_results, streams = asyncio.run(coalesced_async(analyzer, copies))
+        calls["async + stream"] = fake.requests - before
+        same = all(r == results[0] for r in results) and all(r == async_results[0] for r in async_results) \
+            and all(r == streams[0] for r in streams) and all(r is not results[0] for r in results[1:])
+        print(f"coalescing {copies} identical requests: upstream calls {calls}  "
+              f"{'identical copies' if same else 'RESULTS DIFFER'}")
+        ok &= calls == {"sync": 1, "async + stream": 2} and same
+    finally:
+        fake.stop()
+    print("ok" if ok else "FAILED")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,85 @@
+"""Latency of section-selective analyses against the full analysis.
+
+    python benchmarks/bench_sections.py [--lines 160] [--rate 400] [--latency 0.2]
+
+Analyzes one document in full and with a few section selections against the
+fake backend (generating at ``--rate`` tokens/s), and prints each run's
+latency, focused requests and output tokens relative to the full analysis.
+Output tokens are read from the ``route`` spans of the trace log.
+
+Exits non-zero if a selection leaves a requested section empty, fills one that
+was not requested, or a selection of at most a third of the output takes more
+than half the full analysis' time.
+"""
+import os, sys, json, time, argparse, tempfile
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+sys.path.insert(0, HERE)
+
+# spans are traced from the first metrics import on, so the log must be set before it
+TRACE = os.path.join(tempfile.mkdtemp(), "trace.jsonl")
+os.environ["REQMIND_TRACE_LOG"] = TRACE
+
+from fake_groq import FakeGroq
+
+SELECTIONS = {
+    "full":                 None,
+    "risks + ambiguities":  ("risks", "ambiguities"),
+    "requirements":         ("functional_requirements", "non_functional_requirements"),
+    "score + summary":      ("quality_score", "summary"),
+    "questions + risks":    ("clarification_questions", "risks", "missing_information"),
+}
+
+
+def make_document(lines: int) -> str:
+    return "\n".join(f"REQ-{i}: The system shall let a signed-in customer process order item {i} "
+                     f"and confirm it within 2 seconds." for i in range(1, lines + 1))
+
+
+def route_spans() -> list:
+    if not os.path.exists(TRACE):
+        return []
+    with open(TRACE, encoding="utf-8") as f:
+        spans = [json.loads(line) for line in f if '"stage": "route"' in line]
+    os.remove(TRACE)
+    return spans
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--lines", type=int, default=160, help="requirement lines in the document")
+    ap.add_argument("--rate", type=float, default=400, help="fake backend tokens/s")
+    ap.add_argument("--latency", type=float, default=0.2)
+    args = ap.parse_args()
+
+    fake = FakeGroq(latency=args.latency, tokens_per_s=args.rate).start()
+    os.environ["GROQ_BASE_URL"] = fake.base_url
+    os.environ.setdefault("GROQ_API_KEY", "fake-key")
+    import analyzer
+    text, ok, full = make_document(args.lines), True, None
+    print(f"{'selection':<20} {'seconds':>8} {'requests':>8} {'output tokens':>13}  time / full  output / full")
+    try:
+        for label, sections in SELECTIONS.items():
+            route_spans()
+            start = time.perf_counter()
+            result = analyzer.analyze_requirements(text, use_cache=False, sections=sections)
+            seconds = time.perf_counter() - start
+            spans = route_spans()
+            output = sum(s.get("completion_tokens", 0) for s in spans)
+            full = full or (seconds, output)
+            wanted = sections or analyzer.ANALYSIS_SECTIONS
+            shaped = (all(result[s] for s in wanted)
+                      and not any(result[s] for s in analyzer.ANALYSIS_SECTIONS if s not in wanted))
+            fast = output / full[1] > 1 / 3 or seconds <= full[0] / 2
+            ok &= shaped and fast
+            print(f"{label:<20} {seconds:8.2f} {len(spans):>8} {output:>13}  {seconds / full[0]:>11.0%}  "
+                  f"{output / full[1]:>13.0%}" + ("" if shaped else "  SECTIONS WRONG") + ("" if fast else "  SLOW"))
+    finally:
+        fake.stop()
+    print("ok" if ok else "FAILED")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
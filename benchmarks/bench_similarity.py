@@ -0,0 +1,123 @@
+"""Near-duplicate and contradiction detection over a large statement set.
+
+    python benchmarks/bench_similarity.py [--statements 50000] [--budget 10]
+
+Generates requirement sentences from a varied vocabulary and plants reworded
+copies of some (duplicates) and copies with a changed number, an added
+negation or an opposite term (contradictions). Indexes them all, prints the
+time to index and report, the recall of each planted kind, and the share of
+reported findings that pair copies of the same sentence. Also checks that an
+index saved and loaded again reports the same, and that the MinHash/LSH
+candidates find what scoring every pair finds on a sample.
+
+Exits non-zero if indexing and reporting take longer than ``--budget``
+seconds, or recall or precision of either kind is below 90%.
+"""
+import os, sys, time, random, argparse, tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import similarity
+from similarity import SimilarityIndex
+
+ACTORS  = "customer clerk analyst nurse teacher driver auditor manager supplier student cashier pharmacist".split()
+VERBS   = "create update archive export approve assign review cancel schedule print import verify".split()
+OBJECTS = ("invoices orders refunds shipments prescriptions enrolments timesheets vouchers contracts "
+           "tickets claims appointments payslips quotes manifests").split()
+WHERE   = ["from the dashboard", "in bulk", "via the mobile app", "through the REST API", "from the archive page",
+           "using a CSV template", "during checkout", "after approval", "before the deadline", "in the audit log"]
+TAGS    = [f"{p}{s}" for p in "net geo tax fleet stock batch audit promo loyalty credit ward lab exam course route".split()
+           for s in ("", "-level", "-linked", "-tagged", "-scoped", "-based", "-wide", "-bound")]
+FLIPS   = [("shall be able to", "shall not be able to"), ("shall be able to", "may be able to")]
+
+
+def make_statements(count: int, rng: random.Random) -> tuple:
+    """``(texts, origins, duplicate pairs, contradiction pairs)``.
+
+    Pairs are index pairs into ``texts``; ``origins[n]`` is the generated
+    sentence that ``texts[n]`` was copied from (itself for the originals).
+    """
+    planted = count // 10
+    base = [(rng.choice(ACTORS), rng.choice(VERBS), " ".join(rng.sample(TAGS, 2)), rng.choice(OBJECTS),
+             rng.choice(WHERE), rng.choice([2, 3, 5, 10])) for _ in range(count - 2 * planted)]
+    texts = [f"The {a} shall be able to {v} {t} {o} {w} within {n} seconds." for a, v, t, o, w, n in base]
+    origins, dups, conflicts = list(range(len(base))), set(), set()
+    for k in rng.sample(range(len(base)), planted):
+        a, v, t, o, w, n = base[k]
+        dups.add((k, len(texts)))
+        origins.append(k)
+        texts.append(f"A {a} must {v} the {t} {o} {w} within {n} seconds.")
+    for k in rng.sample(range(len(base)), planted):
+        a, v, t, o, w, n = base[k]
+        conflicts.add((k, len(texts)))
+        origins.append(k)
+        if k % 3:
+            texts.append(texts[k].replace(f"within {n} seconds", f"within {n * 3} seconds"))
+        else:
+            texts.append(texts[k].replace(*FLIPS[k % 2]))
+    return texts, origins, dups, conflicts
+
+
+def found_pairs(report: dict, key: str) -> set:
+    """Index pairs of a report's duplicate clusters (every pair within a cluster) or contradictions."""
+    out = set()
+    for finding in report[key]:
+        ids = sorted(item["id"] for item in finding["items"])
+        out.update((a, b) for n, a in enumerate(ids) for b in ids[n + 1:])
+    return out
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--statements", type=int, default=50_000)
+    ap.add_argument("--budget", type=float, default=10.0, help="seconds allowed to index and report")
+    args = ap.parse_args()
+
+    rng = random.Random(7)
+    texts, origins, dups, conflicts = make_statements(args.statements, rng)
+    start = time.perf_counter()
+    index = SimilarityIndex()
+    index.add(texts, "sentence", ids=list(range(len(texts))))
+    indexed = time.perf_counter()
+    report = index.report()
+    seconds = time.perf_counter() - start
+    print(f"{len(texts)} statements: indexed in {indexed - start:.2f}s, reported in "
+          f"{seconds - (indexed - start):.2f}s, {seconds:.2f}s total (budget {args.budget:.0f}s)")
+
+    ok = seconds <= args.budget
+    for label, key, planted in (("duplicates", "duplicate_clusters", dups),
+                                ("contradictions", "contradictions", conflicts)):
+        found = found_pairs(report, key)
+        # copies of one sentence are related however they were planted (a reworded copy and a changed one clash too)
+        related = sum(origins[a] == origins[b] for a, b in found)
+        recall, precision = len(found & planted) / len(planted), related / max(len(found), 1)
+        ok &= recall >= 0.9 and precision >= 0.9
+        print(f"{label:>15}: {len(report[key]):>6} reported  recall {recall:.1%}  precision {precision:.1%}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "portfolio.npz")
+        index.save(path)
+        same = SimilarityIndex.load(path).report() == report
+    print(f"saved and reloaded index: {'same report' if same else 'REPORT DIFFERS'}")
+
+    sample = SimilarityIndex()
+    sample.add([t for t, o in zip(texts, origins) if o < 1000], "sentence")    # originals with their copies
+    limit = similarity.BRUTE_FORCE_MB
+    try:
+        similarity.BRUTE_FORCE_MB = float("inf")
+        exact = sample.pairs(similarity.CONFLICT_THRESHOLD)
+        similarity.BRUTE_FORCE_MB = 0
+        approx = sample.pairs(similarity.CONFLICT_THRESHOLD)
+    finally:
+        similarity.BRUTE_FORCE_MB = limit
+    exact, approx = set(zip(*map(list, exact[:2]))), set(zip(*map(list, approx[:2])))
+    lsh = len(exact & approx) / max(len(exact), 1)
+    print(f"LSH candidates vs all pairs on {len(sample)} statements: {lsh:.1%} of {len(exact)} pairs found")
+    ok &= same and lsh >= 0.95 and approx <= exact
+
+    print("ok" if ok else "FAILED")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
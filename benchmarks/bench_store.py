@@ -0,0 +1,115 @@
+"""Saving to and querying the analysis history.
+
+    python benchmarks/bench_store.py [--rows 20000] [--max-save-ms 1]
+
+Saves ``--rows`` generated analyses and prints how long ``save_analysis``
+holds the caller (it only queues the row) against a synchronous commit of
+each row, and how long the writer takes to drain the queue. Then times the
+history queries the History tab runs (by hash, by project type and score
+range, newest first) and a bulk export, and shows the query plan of each.
+
+Exits non-zero if a save holds the caller for more than ``--max-save-ms`` at
+the 99th percentile, a row is lost, a re-saved document makes a second row,
+or a history query scans the whole table instead of using an index.
+"""
+import os, sys, time, random, sqlite3, argparse, tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import store
+from store import AnalysisStore, document_hash
+
+TYPES = ["E-commerce", "Hospital System", "LMS", "FinTech", "ERP", "Social Media", "Other"]
+
+
+def make_analysis(n: int, rng: random.Random) -> tuple:
+    text = "\n".join(f"REQ-{n}.{i}: The system shall let a customer process order {n}-{i} within 2 seconds."
+                     for i in range(1, 6))
+    items = lambda k: [{"id": f"{k}{i}", "description": f"requirement {n}.{i}"} for i in range(rng.randint(0, 12))]
+    result = {"project_info": {"detected_type": rng.choice(TYPES), "complexity": "Medium"},
+              "quality_score": {f: rng.randint(20, 95) for f in store.SCORE_FIELDS},
+              "functional_requirements": items("FR"), "non_functional_requirements": items("NFR"),
+              "ambiguities": items("AMB"), "risks": items("RSK"), "summary": {"overall_quality": "Fair"}}
+    return text, result
+
+
+def percentile(values: list, p: float) -> float:
+    values = sorted(values)
+    return values[min(int(len(values) * p), len(values) - 1)]
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=20_000)
+    ap.add_argument("--max-save-ms", type=float, default=1.0)
+    args = ap.parse_args()
+
+    rng = random.Random(3)
+    docs = [make_analysis(n, rng) for n in range(args.rows)]
+    tmp = tempfile.mkdtemp()
+    history = AnalysisStore(os.path.join(tmp, "history.db"))
+
+    held, start = [], time.perf_counter()
+    for n, (text, result) in enumerate(docs):
+        t = time.perf_counter()
+        history.save_analysis(text, result, f"doc-{n}.pdf")
+        held.append(time.perf_counter() - t)
+    queued = time.perf_counter() - start
+    history.flush()
+    drained = time.perf_counter() - start
+    p99 = percentile(held, 0.99) * 1000
+
+    # the same rows committed one by one on the caller's thread, as a plain synchronous store would
+    sync = sqlite3.connect(os.path.join(tmp, "sync.db"))
+    sync.executescript(store.SCHEMA)
+    sync_held, sample = [], docs[:min(len(docs), 2000)]
+    for text, result in sample:
+        t = time.perf_counter()
+        row = store._analysis_row(text, result, "doc.pdf", None, time.time())
+        with sync:
+            sync.execute(store._upsert("analyses", row, ("doc_hash", "sections")), row)
+        sync_held.append(time.perf_counter() - t)
+    print(f"save_analysis holds the caller p50 {percentile(held, 0.5) * 1000:.3f} ms, p99 {p99:.3f} ms "
+          f"(synchronous commit: p50 {percentile(sync_held, 0.5) * 1000:.3f} ms, "
+          f"p99 {percentile(sync_held, 0.99) * 1000:.3f} ms)")
+    print(f"{args.rows} rows queued in {queued:.2f}s, written by {drained:.2f}s "
+          f"({args.rows / drained:,.0f} rows/s), {history.failed} failed")
+
+    count = history._conn().execute("SELECT COUNT(*) FROM analyses").fetchone()[0]
+    text, result = docs[0]
+    history.save_analysis(text, result, "doc-0-again.pdf")
+    history.flush()
+    again = history.history(doc_hash=document_hash(text))
+    ok = p99 <= args.max_save_ms and count == args.rows and len(again) == 1 and again[0]["source"] == "doc-0-again.pdf"
+    print(f"rows stored: {count}/{args.rows}; re-saved document: {len(again)} row, "
+          f"created {again[0]['created_at'] < again[0]['updated_at'] and 'before' or 'NOT before'} its update")
+
+    queries = {
+        "by hash":              dict(doc_hash=document_hash(docs[len(docs) // 2][0])),
+        "type + score range":   dict(project_type="FinTech", min_score=60, max_score=80),
+        "score range":          dict(min_score=90),
+        "newest first":         dict(),
+    }
+    conn = history._conn()
+    for label, filters in queries.items():
+        t = time.perf_counter()
+        rows = history.history(**filters)
+        ms = (time.perf_counter() - t) * 1000
+        sql, params = history._select("analysis", ("id",), **filters)
+        plan = " / ".join(r[-1] for r in conn.execute(f"EXPLAIN QUERY PLAN {sql} ORDER BY updated_at DESC LIMIT 200",
+                                                        params))
+        indexed = "USING" in plan and "SCAN analyses" != plan.split(" / ")[0].strip()
+        ok &= indexed
+        print(f"{label:>20}: {len(rows):>4} rows in {ms:6.2f} ms  [{plan}]" + ("" if indexed else "  FULL SCAN"))
+
+    t = time.perf_counter()
+    exported = history.export(os.path.join(tmp, "history.jsonl"))
+    print(f"export: {exported} rows as JSON lines in {time.perf_counter() - t:.2f}s")
+    ok &= exported == args.rows
+
+    print("ok" if ok else "FAILED")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,249 @@
+"""Local stand-in for the Groq chat completions endpoint, for benchmarks.
+
+    from fake_groq import FakeGroq
+    with FakeGroq(latency=0.2, tokens_per_s=400) as fake:
+        os.environ["GROQ_BASE_URL"] = fake.base_url     # before importing analyzer
+
+The server speaks the OpenAI-compatible wire format the groq SDK expects
+(plain and ``stream=True`` SSE responses, with ``usage``), so the real client,
+HTTP round trip and JSON parsing are all exercised. Responses are either a
+canned JSON file or an analysis generated in proportion to the prompt size
+(as compact rows when the prompt asks for them, and only the sections its
+schema lists), and are cut off at the
+request's ``max_tokens`` like the real API. With ``rpm``/``tpm`` set it
+enforces per-model rate limits the way Groq does: a 429 with ``retry-after``
+once a bucket is empty (``prompt + max_tokens`` is what a request costs).
+
+It can also be run on its own:
+
+    python benchmarks/fake_groq.py --port 8765 --latency 0.5 --tokens-per-s 300
+"""
+import os, re, sys, json, time, uuid, argparse, threading
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_pdf_render import make_analysis
+from compact_schema import compact
+from scheduler import TokenBucket
+
+COMPARE_RESPONSE = {
+    "added": [], "removed": [],
+    "modified": [{"id": "M1", "old": "within 2 seconds", "new": "within 1 second"}],
+    "scope_changes": ["Tighter response-time target."],
+    "quality_change": {"old_score": 60, "new_score": 64, "verdict": "Improved"},
+    "summary": "One performance requirement was tightened.",
+}
+
+
+KEYS_RE    = re.compile(r"ONLY a JSON object with these top-level keys[^:]*:\s*(.+)$")
+COMPACT_RE = re.compile(r"List items are rows")
+SCHEMA_RE  = re.compile(r'^\{?"(\w+)":', re.M)
+
+
+def _tokens(text: str) -> int:
+    return len(text) // 4 + 1
+
+
+class FakeGroq:
+    """Threaded fake backend; use as a context manager or call ``start``/``stop``.
+
+    ``latency`` is the time to first token, ``tokens_per_s`` the generation rate
+    (0 for instant), ``frs`` a fixed number of functional requirements per
+    response (default: one per ~120 prompt tokens) and ``canned`` a path to a
+    JSON file returned verbatim for every analysis. ``model_rates`` overrides
+    ``tokens_per_s`` per model, and models in ``invalid_models`` answer with
+    prose instead of JSON (to exercise escalation). ``rpm``/``tpm`` limit every
+    model, each bucket holding ``burst_s`` seconds' worth; ``rejected`` counts
+    the 429s.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency: float = 0.0,
+                 tokens_per_s: float = 0.0, frs: int = None, canned: str = None,
+                 model_rates: dict = None, invalid_models: tuple = (), rpm: float = 0, tpm: float = 0,
+                 burst_s: float = 60.0):
+        self.latency        = latency
+        self.tokens_per_s   = tokens_per_s
+        self.frs            = frs
+        self.canned         = open(canned, encoding="utf-8").read() if canned else None
+        self.model_rates    = model_rates or {}
+        self.invalid_models = set(invalid_models)
+        self.requests       = 0
+        self.models         = Counter()     # requests per model
+        self.rejected       = Counter()     # 429s per model
+        self.limits         = (rpm, tpm, burst_s)
+        self._buckets       = {}
+        self._lock          = threading.Lock()
+        self._server      = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread      = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    # ── Responses ──
+    def rate(self, model: str) -> float:
+        return self.model_rates.get(model, self.tokens_per_s)
+
+    def admit(self, body: dict):
+        """Seconds the request must wait under the model's limits, or None if it may run now."""
+        rpm, tpm, burst_s = self.limits
+        if not (rpm or tpm):
+            return None
+        cost = {"requests": 1,
+                "tokens": sum(_tokens(m["content"]) for m in body["messages"]) + (body.get("max_tokens") or 0)}
+        with self._lock:
+            if body["model"] not in self._buckets:
+                self._buckets[body["model"]] = {kind: TokenBucket(limit, burst_s)
+                                                for kind, limit in (("requests", rpm), ("tokens", tpm)) if limit}
+            buckets, now = self._buckets[body["model"]], time.monotonic()
+            for bucket in buckets.values():
+                bucket.refill(now)
+            wait = max(bucket.wait(cost[kind]) for kind, bucket in buckets.items())
+            if wait > 0:
+                self.rejected[body["model"]] += 1
+                return wait
+            for kind, bucket in buckets.items():
+                bucket.take(cost[kind])
+        return None
+
+    def content_for(self, body: dict) -> str:
+        if body["model"] in self.invalid_models:
+            return "I'm sorry, I can only summarise this document in prose."
+        system = body["messages"][0]["content"]
+        prompt = body["messages"][-1]["content"]
+        if "OLD" in system and "NEW" in system:
+            return json.dumps(COMPARE_RESPONSE)
+        if self.canned is not None:
+            return self.canned
+        n = self.frs if self.frs is not None else max(_tokens(prompt) // 120, 3)
+        analysis = make_analysis(n)
+        wanted = KEYS_RE.search(system)
+        # a continuation request names the sections it wants; a focused one lists only them in its schema
+        keys = [k.strip() for k in wanted.group(1).split(",")] if wanted else SCHEMA_RE.findall(system)
+        analysis = {k: analysis[k] for k in keys if k in analysis}
+        if COMPACT_RE.search(system):
+            return json.dumps(compact(analysis))
+        return json.dumps(analysis, indent=2)
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                if not self.path.rstrip("/").endswith("/chat/completions"):
+                    self.send_error(404)
+                    return
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+                fake.requests += 1
+                fake.models[body["model"]] += 1
+                wait = fake.admit(body)
+                if wait is not None:
+                    self._send_json({"error": {
+                        "message": f"Rate limit reached for model `{body['model']}`. Please try again in {wait:.3f}s.",
+                        "type": "tokens", "code": "rate_limit_exceeded"}},
+                        status=429, headers={"retry-after": f"{wait:.3f}"})
+                    return
+                content = fake.content_for(body)
+                finish  = "stop"
+                if body.get("max_tokens") and _tokens(content) > body["max_tokens"]:
+                    content, finish = content[:body["max_tokens"] * 4], "length"
+                usage = {
+                    "prompt_tokens":     sum(_tokens(m["content"]) for m in body["messages"]),
+                    "completion_tokens": _tokens(content),
+                }
+                usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+                meta = {"id": f"chatcmpl-{uuid.uuid4().hex}", "created": int(time.time()), "model": body["model"]}
+
+                time.sleep(fake.latency)
+                rate = fake.rate(body["model"])
+                if body.get("stream"):
+                    try:
+                        self._stream(meta, content, usage, finish, rate)
+                    except (BrokenPipeError, ConnectionResetError):
+                        pass    # the client abandoned the stream
+                else:
+                    if rate:
+                        time.sleep(usage["completion_tokens"] / rate)
+                    self._send_json({**meta, "object": "chat.completion", "usage": usage, "choices": [{
+                        "index": 0, "finish_reason": finish,
+                        "message": {"role": "assistant", "content": content}}]})
+
+            def _send_json(self, payload: dict, status: int = 200, headers: dict = None):
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _stream(self, meta: dict, content: str, usage: dict, finish: str, rate: float):
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Connection", "close")
+                self.end_headers()
+                step = 64     # ~16 tokens per chunk
+                for i in range(0, len(content), step):
+                    piece = content[i:i + step]
+                    if rate:
+                        time.sleep(_tokens(piece) / rate)
+                    self._event({**meta, "object": "chat.completion.chunk", "choices": [{
+                        "index": 0, "finish_reason": None, "delta": {"content": piece}}]})
+                self._event({**meta, "object": "chat.completion.chunk", "x_groq": {"usage": usage},
+                             "choices": [{"index": 0, "finish_reason": finish, "delta": {}}]})
+                self.wfile.write(b"data: [DONE]\n\n")
+                self.wfile.flush()
+                self.close_connection = True
+
+            def _event(self, payload: dict):
+                self.wfile.write(b"data: " + json.dumps(payload).encode() + b"\n\n")
+                self.wfile.flush()
+
+        return Handler
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Serve a fake Groq chat completions endpoint.")
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--latency", type=float, default=0.0, help="seconds before the first token")
+    ap.add_argument("--tokens-per-s", type=float, default=0.0, help="generation rate, 0 for instant")
+    ap.add_argument("--frs", type=int, help="functional requirements per response")
+    ap.add_argument("--canned", help="JSON file to return for every analysis")
+    args = ap.parse_args()
+
+    fake = FakeGroq(port=args.port, latency=args.latency, tokens_per_s=args.tokens_per_s,
+                    frs=args.frs, canned=args.canned).start()
+    print(f"GROQ_BASE_URL={fake.base_url}", flush=True)
+    try:
+        fake._thread.join()
+    except KeyboardInterrupt:
+        fake.stop()
+
+
+if __name__ == "__main__":
+    main()
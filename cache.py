@@ -0,0 +1,148 @@
+import os, json, time, hashlib, threading, tempfile
+from metrics import CACHE_EVENTS
+
+CACHE_DIR       = os.environ.get("REQMIND_CACHE_DIR", os.path.join(tempfile.gettempdir(), "reqmind_cache"))
+CACHE_ENABLED   = os.environ.get("REQMIND_CACHE", "1").lower() not in ("0", "false", "off", "no")
+CACHE_MAX_BYTES = int(os.environ.get("REQMIND_CACHE_MAX_MB", "200")) * 1024 * 1024
+CACHE_MAX_AGE   = int(os.environ.get("REQMIND_CACHE_MAX_AGE_DAYS", "30")) * 86400
+EVICT_EVERY     = 100     # writes between full scans (age expiry, entries written by other processes)
+
+
+def normalize_text(text: str) -> str:
+    lines = (" ".join(line.split()) for line in (text or "").strip().splitlines())
+    return "\n".join(line for line in lines if line)
+
+
+def make_key(*parts) -> str:
+    h = hashlib.sha256()
+    for p in parts:
+        if not isinstance(p, str):
+            p = json.dumps(p, sort_keys=True)
+        h.update(p.encode("utf-8"))
+        h.update(b"\x00")
+    return h.hexdigest()
+
+
+class ResultCache:
+    """Disk-backed JSON cache: one file per key, LRU by mtime, bounded by size and age."""
+
+    def __init__(self, directory=CACHE_DIR, max_bytes=CACHE_MAX_BYTES,
+                 max_age=CACHE_MAX_AGE, enabled=CACHE_ENABLED):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_age   = max_age
+        self.enabled   = enabled
+        self.hits      = 0
+        self.misses    = 0
+        self.failed    = 0        # writes lost to OSError (disk full, read-only directory)
+        self._size     = None     # bytes on disk as of the last scan plus our writes since
+        self._writes   = 0
+        self._lock     = threading.Lock()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], key + ".json")
+
+    def get(self, key):
+        if not self.enabled:
+            return None
+        path = self._path(key)
+        try:
+            if time.time() - os.path.getmtime(path) > self.max_age:
+                os.remove(path)
+                raise FileNotFoundError(path)
+            with open(path, "r", encoding="utf-8") as f:
+                value = json.load(f)
+            os.utime(path)
+        except (OSError, ValueError):
+            with self._lock:
+                self.misses += 1
+            CACHE_EVENTS.inc(event="miss")
+            return None
+        with self._lock:
+            self.hits += 1
+        CACHE_EVENTS.inc(event="hit")
+        return value
+
+    def set(self, key, value):
+        if not self.enabled:
+            return
+        path, tmp = self._path(key), None
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(value, f)
+            old = os.path.getsize(path) if os.path.exists(path) else 0
+            os.replace(tmp, path)
+            size = os.path.getsize(path)
+        except OSError:
+            # the result itself is fine; only its cached copy is lost
+            if tmp:
+                self._remove(tmp)
+            with self._lock:
+                self.failed += 1
+            CACHE_EVENTS.inc(event="write_error")
+            return
+        with self._lock:
+            self._writes += 1
+            if self._size is not None:
+                self._size += size - old
+            due = self._size is None or self._size > self.max_bytes or self._writes % EVICT_EVERY == 0
+        if due:
+            self.evict()
+
+    def evict(self):
+        entries, total, now = [], 0, time.time()
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                path = os.path.join(root, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                age = now - st.st_mtime
+                if name.endswith(".tmp"):
+                    if age > 60:
+                        self._remove(path)
+                    continue
+                if age > self.max_age:
+                    self._remove(path)
+                    continue
+                entries.append((st.st_mtime, st.st_size, path))
+                total += st.st_size
+        entries.sort()
+        # down to 90% of the bound, so the writes that follow do not each trigger a scan
+        for _, size, path in entries:
+            if total <= self.max_bytes * 0.9:
+                break
+            self._remove(path)
+            total -= size
+        with self._lock:
+            self._size = total
+
+    def clear(self):
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                self._remove(os.path.join(root, name))
+        with self._lock:
+            self._size = 0
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "enabled":  self.enabled,
+            "hits":     self.hits,
+            "misses":   self.misses,
+            "failed":   self.failed,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+        }
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+result_cache = ResultCache()
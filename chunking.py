@@ -0,0 +1,204 @@
+import re
+from collections import Counter
+
+# ── Splitting ─────────────────────────────────────────────────────────────────
+HEADING_RE = re.compile(
+    r"^\s*(?:#{1,6}\s+\S"                        # markdown headings
+    r"|\d+(?:\.\d+)*\.?\s+[A-Z]"                 # 1. / 3.2.1 Numbered headings
+    r"|(?i:section|chapter|appendix)\s+[\dA-Z]"   # Section 4 / Appendix A
+    r"|[A-Z][A-Z0-9 /&\-]{3,}$)"                 # ALL CAPS HEADINGS
+)
+
+
+def _is_heading(line: str) -> bool:
+    line = line.strip()
+    # numbered requirement sentences ("1. The system shall ...") are not headings
+    return len(line) <= 80 and not line.endswith((".", ";", ",")) and bool(HEADING_RE.match(line))
+
+
+def estimate_tokens(text: str) -> int:
+    # ~4 characters per token for English prose with the Llama tokenizer
+    return len(text) // 4 + 1
+
+
+def _sections(text: str) -> list:
+    lines = text.splitlines()
+    sections, current = [], []
+    for line in lines:
+        if current and _is_heading(line):
+            sections.append("\n".join(current))
+            current = []
+        current.append(line)
+    if current:
+        sections.append("\n".join(current))
+    return [s for s in sections if s.strip()]
+
+
+def _split_oversized(section: str, max_tokens: int) -> list:
+    pieces, current, size = [], [], 0
+    for line in section.splitlines():
+        t = estimate_tokens(line)
+        if current and size + t > max_tokens:
+            pieces.append("\n".join(current))
+            current, size = [], 0
+        oversized = t > max_tokens
+        while t > max_tokens:
+            cut = max_tokens * 4
+            pieces.append(line[:cut])
+            line = line[cut:]
+            t = estimate_tokens(line)
+        if oversized and not line:
+            continue        # cut evenly: no empty remainder chunk
+        current.append(line)
+        size += t
+    if current:
+        pieces.append("\n".join(current))
+    return pieces
+
+
+def split_sections(text: str, max_tokens: int) -> list:
+    """Greedily pack section-aligned pieces of ``text`` into chunks of at most ``max_tokens``."""
+    chunks, current, size = [], [], 0
+    for section in _sections(text):
+        for piece in _split_oversized(section, max_tokens):
+            t = estimate_tokens(piece)
+            if current and size + t > max_tokens:
+                chunks.append("\n".join(current))
+                current, size = [], 0
+            current.append(piece)
+            size += t
+    if current:
+        chunks.append("\n".join(current))
+    return chunks
+
+
+# ── Merging ───────────────────────────────────────────────────────────────────
+# section -> (id prefix, field used for near-duplicate detection)
+LIST_SECTIONS = {
+    "functional_requirements":     ("FR",  "description"),
+    "non_functional_requirements": ("NFR", "description"),
+    "constraints":                 ("CON", "description"),
+    "risks":                       ("RSK", "description"),
+    "ambiguities":                 ("AMB", "text"),
+    "missing_information":         ("MI",  "description"),
+    "scope_creep":                 ("SC",  "statement"),
+}
+QUESTION_ROLES = {"client": "CQ", "developer": "DQ", "tester": "TQ", "project_manager": "PQ"}
+SCORE_FIELDS   = ("overall", "clarity", "completeness", "consistency", "testability")
+COMPLEXITY     = ["Small", "Medium", "Large"]
+DUP_THRESHOLD  = 0.85
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+
+def _tokens(s) -> frozenset:
+    return frozenset(_WORD_RE.findall(str(s or "").lower()))
+
+
+def _dedupe(items: list, field: str) -> list:
+    kept, seen = [], []
+    for item in items:
+        if not isinstance(item, dict):
+            continue
+        toks = _tokens(item.get(field))
+        if toks and any(len(toks & s) / len(toks | s) >= DUP_THRESHOLD for s in seen):
+            continue
+        seen.append(toks)
+        kept.append(item)
+    return kept
+
+
+def _renumber(items: list, prefix: str) -> list:
+    return [{**item, "id": f"{prefix}{i}"} for i, item in enumerate(items, 1)]
+
+
+def _num(v) -> float:
+    try:
+        return float(v)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def _score(v):
+    try:
+        return float(v)
+    except (TypeError, ValueError):
+        return None
+
+
+def _weighted_score(partials: list, weights: list, field: str):
+    """Weighted mean of ``field`` over the chunks that scored it, or None if none did."""
+    values = [(_score((p.get("quality_score") or {}).get(field)), w) for p, w in zip(partials, weights)]
+    scored = [(v, w) for v, w in values if v is not None]
+    if not scored:
+        return None
+    total = sum(w for _, w in scored) or 1
+    return round(sum(v * w for v, w in scored) / total)
+
+
+def quality_label(score) -> str:
+    score = _num(score)
+    return "Good" if score >= 70 else ("Fair" if score >= 40 else "Poor")
+
+
+def recompute_summary(result: dict) -> dict:
+    summ = result.setdefault("summary", {})
+    summ["total_fr"]          = len(result.get("functional_requirements", []))
+    summ["total_nfr"]         = len(result.get("non_functional_requirements", []))
+    summ["total_ambiguities"] = len(result.get("ambiguities", []))
+    summ["total_risks"]       = len(result.get("risks", []))
+    summ["total_scope_creep"] = len(result.get("scope_creep", []))
+    result.setdefault("project_info", {})["total_requirements_count"] = summ["total_fr"] + summ["total_nfr"]
+    return result
+
+
+def merge_results(partials: list, weights: list = None) -> dict:
+    """Deterministically merge per-chunk analyses into one result in the standard schema.
+
+    ``weights`` (e.g. chunk lengths) control how much each chunk contributes to the
+    quality scores and project classification; items keep document order.
+    """
+    if not partials:
+        raise ValueError("no partial results to merge")
+    weights = weights or [1] * len(partials)
+    lead    = partials[max(range(len(partials)), key=lambda i: weights[i])]
+
+    merged = {}
+
+    # project info: weighted majority type, largest complexity
+    types, complexity = Counter(), 0
+    for p, w in zip(partials, weights):
+        pi = p.get("project_info", {})
+        if pi.get("detected_type"):
+            types[pi["detected_type"]] += w
+        if pi.get("complexity") in COMPLEXITY:
+            complexity = max(complexity, COMPLEXITY.index(pi["complexity"]))
+    lead_pi = lead.get("project_info", {})
+    merged["project_info"] = {
+        "detected_type":     min(types, key=lambda t: (-types[t], t)) if types else "Other",
+        "complexity":        COMPLEXITY[complexity],
+        "complexity_reason": lead_pi.get("complexity_reason", ""),
+        "total_requirements_count": 0,
+    }
+
+    # quality score: length-weighted mean over the chunks that were scored
+    qs = {f: _weighted_score(partials, weights, f) for f in SCORE_FIELDS}
+    qs["breakdown"] = lead.get("quality_score", {}).get("breakdown", "")
+    merged["quality_score"] = qs
+
+    for section, (prefix, field) in LIST_SECTIONS.items():
+        items = [item for p in partials for item in (p.get(section) or [])]
+        merged[section] = _renumber(_dedupe(items, field), prefix)
+
+    merged["clarification_questions"] = {
+        role: _renumber(_dedupe(
+            [q for p in partials for q in ((p.get("clarification_questions") or {}).get(role) or [])],
+            "question"), prefix)
+        for role, prefix in QUESTION_ROLES.items()
+    }
+
+    merged["summary"] = {
+        "overall_quality": quality_label(qs["overall"]) if qs["overall"] is not None else "Not scored",
+        "recommendation":  lead.get("summary", {}).get("recommendation", ""),
+    }
+    return recompute_summary(merged)
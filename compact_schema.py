@@ -0,0 +1,80 @@
+"""Compact wire format for the analysis the model returns.
+
+List sections arrive as positional rows (``["desc", "H", "Core"]``) with no
+ids or keys, clarification questions as plain strings, and ``summary`` without
+the totals; ``expand`` turns that back into the standard schema that
+``pdf_generator`` and the UI read, numbering ids and recomputing the totals
+from the lists. Sections already in the standard form pass through, so a model
+that ignores the format still yields a valid result.
+"""
+from chunking import LIST_SECTIONS, QUESTION_ROLES, _renumber, recompute_summary
+
+# section -> row fields, in the order the model emits them
+ROWS = {
+    "functional_requirements":     ("description", "priority", "category"),
+    "non_functional_requirements": ("category", "description"),
+    "constraints":                 ("description",),
+    "risks":                       ("type", "description", "severity"),
+    "ambiguities":                 ("text", "issue", "suggestion"),
+    "missing_information":         ("area", "description", "impact"),
+    "scope_creep":                 ("statement", "reason"),
+}
+LEVEL_FIELDS = ("priority", "severity", "impact")
+LEVELS       = {"H": "High", "M": "Medium", "L": "Low"}
+SHORT_LEVELS = {v: k for k, v in LEVELS.items()}
+COMPUTED     = {"project_info": ("total_requirements_count",),
+                "summary": ("total_fr", "total_nfr", "total_ambiguities", "total_risks", "total_scope_creep")}
+
+
+def _expand_row(row, fields: tuple) -> dict:
+    if isinstance(row, dict):
+        return row
+    if not isinstance(row, list):
+        row = [row]
+    item = {field: (row[i] if i < len(row) else "") for i, field in enumerate(fields)}
+    for field in LEVEL_FIELDS:
+        if field in item:
+            item[field] = LEVELS.get(str(item[field]).strip().upper(), item[field])
+    return {"id": "", **item}
+
+
+def expand_section(section: str, value):
+    """Return one section in the standard schema; values already in it are renumbered but kept."""
+    if section in ROWS and isinstance(value, list):
+        return _renumber([_expand_row(r, ROWS[section]) for r in value if r not in (None, [], "")],
+                         LIST_SECTIONS[section][0])
+    if section == "clarification_questions" and isinstance(value, dict):
+        return {role: _renumber([q if isinstance(q, dict) else {"id": "", "question": q}
+                                 for q in (value.get(role) or [])], prefix)
+                for role, prefix in QUESTION_ROLES.items()}
+    if section == "summary" and isinstance(value, dict):
+        # keep the standard key order: totals first, filled in by recompute_summary
+        return {**{k: 0 for k in COMPUTED["summary"]}, **value}
+    return value
+
+
+def expand(result: dict) -> dict:
+    """Expand every section of ``result`` in place; totals are recomputed once ``summary`` is present."""
+    for section in list(result):
+        result[section] = expand_section(section, result[section])
+    if "summary" in result:
+        recompute_summary(result)
+    return result
+
+
+def compact(result: dict) -> dict:
+    """The compact form of a standard-schema result (what the model is asked to return)."""
+    out = {}
+    for section, value in result.items():
+        if section in ROWS:
+            fields = ROWS[section]
+            rows = [[SHORT_LEVELS.get(item.get(f), item.get(f)) if f in LEVEL_FIELDS else item.get(f)
+                     for f in fields] for item in value]
+            out[section] = [r[0] for r in rows] if len(fields) == 1 else rows
+        elif section == "clarification_questions":
+            out[section] = {role: [q["question"] for q in value.get(role, [])] for role in QUESTION_ROLES}
+        elif section in COMPUTED:
+            out[section] = {k: v for k, v in value.items() if k not in COMPUTED[section]}
+        else:
+            out[section] = value
+    return out
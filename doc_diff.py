@@ -0,0 +1,74 @@
+import re
+from difflib import SequenceMatcher
+from typing import NamedTuple
+
+
+class Hunk(NamedTuple):
+    old: list           # replaced lines from the old document
+    new: list           # their replacement in the new document
+    before: str         # unchanged line just before the hunk, for context
+    after: str          # unchanged line just after the hunk
+
+
+class DocDiff(NamedTuple):
+    unchanged: int
+    added: list
+    removed: list
+    hunks: list
+
+    @property
+    def identical(self) -> bool:
+        return not (self.added or self.removed or self.hunks)
+
+    @property
+    def changed_chars(self) -> int:
+        return (sum(map(len, self.added)) + sum(map(len, self.removed))
+                + sum(len(l) for h in self.hunks for l in h.old + h.new))
+
+
+_SPACE_RE = re.compile(r"\s+")
+
+
+def split_blocks(text: str) -> list:
+    """Non-empty lines with whitespace collapsed: the unit requirements are written in."""
+    return [b for b in (_SPACE_RE.sub(" ", line).strip() for line in (text or "").splitlines()) if b]
+
+
+def diff_documents(old_text: str, new_text: str) -> DocDiff:
+    # blocks compare with their case kept: "must" -> "MUST" or a renamed product is a real change
+    old, new = split_blocks(old_text), split_blocks(new_text)
+    sm = SequenceMatcher(None, old, new, autojunk=False)
+
+    unchanged, added, removed, hunks = 0, [], [], []
+    for op, i1, i2, j1, j2 in sm.get_opcodes():
+        if op == "equal":
+            unchanged += i2 - i1
+        elif op == "insert":
+            added.extend(new[j1:j2])
+        elif op == "delete":
+            removed.extend(old[i1:i2])
+        else:
+            hunks.append(Hunk(
+                old=old[i1:i2], new=new[j1:j2],
+                before=old[i1 - 1] if i1 > 0 else "",
+                after=old[i2] if i2 < len(old) else "",
+            ))
+    return DocDiff(unchanged, added, removed, hunks)
+
+
+def render_hunks(diff: DocDiff) -> str:
+    """Compact text of just the changed regions, for the LLM."""
+    parts = []
+    for n, h in enumerate(diff.hunks, 1):
+        lines = [f"## CHANGE {n}"]
+        if h.before:
+            lines.append(f"(context before) {h.before}")
+        lines += [f"- {l}" for l in h.old] + [f"+ {l}" for l in h.new]
+        if h.after:
+            lines.append(f"(context after) {h.after}")
+        parts.append("\n".join(lines))
+    if diff.added:
+        parts.append("## ADDED LINES\n" + "\n".join(f"+ {l}" for l in diff.added))
+    if diff.removed:
+        parts.append("## REMOVED LINES\n" + "\n".join(f"- {l}" for l in diff.removed))
+    return "\n\n".join(parts)
@@ -0,0 +1,270 @@
+import os, re, time, hashlib, zipfile, threading
+import xml.etree.ElementTree as ET
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, wait
+from typing import NamedTuple
+from metrics import span
+from normalize import strip_page_furniture
+
+SUPPORTED_EXTS = (".pdf", ".docx", ".txt", ".md")
+
+PDF_MAX_PAGES      = int(os.environ.get("REQMIND_PDF_MAX_PAGES", "500"))
+PDF_TIMEOUT        = float(os.environ.get("REQMIND_PDF_TIMEOUT", "60"))
+PDF_WORKERS        = int(os.environ.get("REQMIND_PDF_WORKERS", str(os.cpu_count() or 2)))
+PDF_PAGES_PER_TASK = 16
+PAGE_CACHE_SIZE    = int(os.environ.get("REQMIND_PAGE_CACHE_SIZE", "5000"))
+PDF_BACKEND        = os.environ.get("REQMIND_PDF_BACKEND", "auto")   # auto / pypdf / pdfplumber
+
+
+class PdfPage(NamedTuple):
+    index: int
+    text: str
+    backend: str    # "pypdf", "pdfplumber", or "" when the page was skipped
+
+
+# ── Page cache ────────────────────────────────────────────────────────────────
+# (file sha256, page index) -> (page text, backend), so re-uploading a file is instant.
+_page_cache = OrderedDict()
+_page_lock  = threading.Lock()
+
+
+def _cache_get(key):
+    with _page_lock:
+        if key in _page_cache:
+            _page_cache.move_to_end(key)
+            return _page_cache[key]
+    return None
+
+
+def _cache_put(key, text):
+    with _page_lock:
+        _page_cache[key] = text
+        _page_cache.move_to_end(key)
+        while len(_page_cache) > PAGE_CACHE_SIZE:
+            _page_cache.popitem(last=False)
+
+
+def file_hash(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+# ── PDF ───────────────────────────────────────────────────────────────────────
+_pool      = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=PDF_WORKERS)
+        return _pool
+
+
+# ── Page quality heuristic ──
+_WORD_RE = re.compile(r"\S+")
+
+
+def page_text_ok(text: str) -> bool:
+    """Cheap check that a fast-path page extraction is usable as-is."""
+    stripped = text.strip()
+    if not stripped:
+        return False
+    chars = [c for c in stripped if not c.isspace()]
+    # garbled glyphs: replacement chars, control/private-use codepoints, or few letters/digits
+    bad = sum(1 for c in chars if c == "\ufffd" or ord(c) < 32 or 0xE000 <= ord(c) <= 0xF8FF)
+    if bad / len(chars) > 0.02 or sum(c.isalnum() for c in chars) / len(chars) < 0.5:
+        return False
+    words = _WORD_RE.findall(stripped)
+    # broken spacing: letters split apart ("T h e") or words run together ("Thesystemshall")
+    singles = sum(1 for w in words if len(w) == 1 and w.isalpha())
+    runons  = sum(1 for w in words if len(w) > 25)
+    return singles / len(words) < 0.3 and runons / len(words) < 0.1
+
+
+def _extract_page_range(path: str, start: int, stop: int, backend: str = PDF_BACKEND,
+                        deadline: float = None) -> list:
+    """Text of pages ``start:stop``; pages not started by ``deadline`` (``time.time()``) stay None."""
+    texts   = [None] * (stop - start)
+    expired = lambda: deadline is not None and time.time() > deadline
+    if backend != "pdfplumber":
+        from pypdf import PdfReader
+        reader = PdfReader(path)
+        for i in range(start, stop):
+            if expired():
+                return texts
+            try:
+                t = reader.pages[i].extract_text() or ""
+            except Exception:
+                continue
+            if backend == "pypdf" or page_text_ok(t):
+                texts[i - start] = (t, "pypdf")
+
+    retry = [i for i in range(start, stop) if texts[i - start] is None]
+    if retry and not expired():
+        import pdfplumber     # only for pages pypdf could not read well
+        with pdfplumber.open(path) as pdf:
+            for i in retry:
+                if expired():
+                    break
+                texts[i - start] = (pdf.pages[i].extract_text() or "", "pdfplumber")
+    return texts
+
+
+def _ranges(indices: list, size: int) -> list:
+    """Group sorted page indices into contiguous (start, stop) runs of at most ``size`` pages."""
+    runs = []
+    for i in indices:
+        if runs and runs[-1][1] == i and i - runs[-1][0] < size:
+            runs[-1][1] = i + 1
+        else:
+            runs.append([i, i + 1])
+    return [tuple(r) for r in runs]
+
+
+def _page_count(path: str) -> int:
+    from pypdf import PdfReader     # PDF libraries load with the first PDF, not with the app
+    return len(PdfReader(path).pages)
+
+
+def extract_pdf_pages(file_path: str, parallel: bool = True, max_pages: int = None,
+                      timeout: float = None) -> list:
+    """Return a ``PdfPage`` per page (up to ``max_pages``), extracting uncached pages in parallel.
+
+    Each page goes through pypdf first and only falls back to pdfplumber when
+    ``page_text_ok`` rejects the fast output. Pages not started within
+    ``timeout`` seconds come back empty rather than holding the caller hostage
+    to one pathological file; workers check the deadline between pages, so the
+    shared pool is never torn down under other callers. In the pool, a file
+    whose pages cannot even be counted in time raises ``TimeoutError``; a
+    worker that fails raises its error instead of returning blank pages.
+    """
+    max_pages = PDF_MAX_PAGES if max_pages is None else max_pages
+    timeout   = PDF_TIMEOUT if timeout is None else timeout
+    deadline  = time.time() + timeout
+    digest    = file_hash(file_path)
+
+    pool = _get_pool() if parallel else None
+    if pool is None:
+        n = _page_count(file_path)
+    else:
+        counting = pool.submit(_page_count, file_path)
+        done, _  = wait([counting], timeout=max(deadline - time.time(), 0))
+        if not done:
+            counting.cancel()
+            raise TimeoutError(f"could not read the page count of {os.path.basename(file_path)} "
+                               f"within {timeout:g}s")
+        n = counting.result()
+    n       = min(n, max_pages)
+    pages   = [_cache_get((digest, i)) for i in range(n)]
+    missing = [i for i, t in enumerate(pages) if t is None]
+
+    runs = _ranges(missing, PDF_PAGES_PER_TASK)
+    if not runs:
+        results = {}
+    elif pool is None:
+        results = {r: _extract_page_range(file_path, *r, PDF_BACKEND, deadline) for r in runs}
+    else:
+        futures = {pool.submit(_extract_page_range, file_path, *r, PDF_BACKEND, deadline): r for r in runs}
+        done, not_done = wait(futures, timeout=max(deadline - time.time(), 0))
+        for f in not_done:
+            f.cancel()      # queued runs never start; running ones stop at their next page
+        results = {futures[f]: f.result() for f in done}
+
+    for (start, stop), texts in results.items():
+        for i, entry in zip(range(start, stop), texts):
+            pages[i] = entry
+            if entry is not None:       # pages cut off by the deadline are tried again next time
+                _cache_put((digest, i), entry)
+    return [PdfPage(i, *(entry or ("", ""))) for i, entry in enumerate(pages)]
+
+
+# ── DOCX ──────────────────────────────────────────────────────────────────────
+W_NS = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+
+
+def iter_docx_blocks(file_path: str):
+    """Yield paragraphs and table rows of a .docx in document order.
+
+    Streams ``word/document.xml`` straight out of the zip with ``iterparse`` and
+    drops each element once read, so memory stays flat for any document size.
+    Table rows come out pipe-delimited; nested tables are flattened into the
+    cell that holds them.
+    """
+    with zipfile.ZipFile(file_path) as zf, zf.open("word/document.xml") as xml:
+        para, cell, row, body = [], None, None, None
+        depth = 0       # table nesting depth
+        for event, el in ET.iterparse(xml, events=("start", "end")):
+            tag = el.tag
+            if event == "start":
+                if tag == W_NS + "body":
+                    body = el
+                elif tag == W_NS + "tbl":
+                    depth += 1
+                elif tag == W_NS + "tr" and depth == 1:
+                    row = []
+                elif tag == W_NS + "tc" and depth == 1:
+                    cell = []
+                continue
+
+            if tag == W_NS + "t":
+                para.append(el.text or "")
+            elif tag == W_NS + "tab":
+                para.append("\t")
+            elif tag in (W_NS + "br", W_NS + "cr"):
+                para.append("\n")
+            elif tag == W_NS + "p":
+                text = "".join(para).strip()
+                para = []
+                if cell is not None:
+                    if text:
+                        cell.append(text)
+                elif text:
+                    yield text
+            elif tag == W_NS + "tc" and depth == 1:
+                row.append(" ".join(cell))
+                cell = None
+            elif tag == W_NS + "tr" and depth == 1:
+                if any(row):
+                    yield "| " + " | ".join(row) + " |"
+                row = None
+            elif tag == W_NS + "tbl":
+                depth -= 1
+            elif tag == W_NS + "body":
+                break
+            # keep only the open path in memory
+            if tag in (W_NS + "p", W_NS + "tbl", W_NS + "sdt"):
+                el.clear()
+                if depth == 0 and body is not None:
+                    body.clear()
+
+
+def extract_docx_text(file_path: str) -> str:
+    return "\n".join(iter_docx_blocks(file_path))
+
+
+# ── Text extraction ───────────────────────────────────────────────────────────
+def extract_text(file_path: str, parallel: bool = True) -> str:
+    if not file_path:
+        return ""
+    ext = os.path.splitext(file_path)[1].lower()
+    with span("extract", ext=ext, bytes=os.path.getsize(file_path)) as attrs:
+        text = _extract(file_path, ext, parallel)
+        attrs["chars"] = len(text)
+    return text
+
+
+def _extract(file_path: str, ext: str, parallel: bool) -> str:
+    if ext == ".pdf":
+        pages = [p.text for p in extract_pdf_pages(file_path, parallel) if p.text]
+        return "\n".join(strip_page_furniture(pages)).strip()
+    elif ext == ".docx":
+        return extract_docx_text(file_path)
+    elif ext in (".txt", ".md"):
+        with open(file_path, "r", encoding="utf-8", errors="ignore") as f:
+            return f.read().strip()
+    return ""
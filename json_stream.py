@@ -0,0 +1,137 @@
+import json
+from typing import NamedTuple
+
+
+class SectionStreamParser:
+    """Incremental parser for a streamed top-level JSON object.
+
+    Feed it text as it arrives; every ``"key": value`` member of the outer
+    object is returned as soon as its value is closed, so callers can render
+    ``project_info`` long before ``summary`` has been generated.
+    """
+
+    def __init__(self):
+        self._buf       = []      # characters of the current top-level member
+        self._depth     = 0
+        self._in_string = False
+        self._escape    = False
+        self._started   = False
+        self.done       = False
+        self.sections   = {}
+
+    def feed(self, text: str) -> list:
+        out = []
+        for ch in text:
+            if self.done:
+                break
+            if not self._started:
+                # skip ```json fences or stray prose before the object
+                if ch == "{":
+                    self._started, self._depth = True, 1
+                continue
+
+            if self._in_string:
+                self._buf.append(ch)
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                continue
+
+            if ch == '"':
+                self._in_string = True
+            elif ch in "{[":
+                self._depth += 1
+            elif ch in "}]":
+                self._depth -= 1
+
+            if self._depth == 1 and ch == ",":
+                out.extend(self._flush())
+            elif self._depth == 0:
+                out.extend(self._flush())
+                self.done = True
+            else:
+                self._buf.append(ch)
+        return out
+
+    def _flush(self) -> list:
+        member = "".join(self._buf).strip()
+        self._buf = []
+        if not member:
+            return []
+        key, value = next(iter(json.loads("{" + member + "}").items()))
+        self.sections[key] = value
+        return [(key, value)]
+
+
+# ── Recovery ──────────────────────────────────────────────────────────────────
+class Recovered(NamedTuple):
+    value: dict
+    complete: bool      # False when anything had to be dropped or closed
+    open_key: str       # top-level member that was cut off mid-value, if any
+
+
+_CLOSERS = {"{": "}", "[": "]"}
+MAX_REPAIR_ATTEMPTS = 64
+
+
+def recover_json(raw: str) -> Recovered:
+    """Parse the first JSON object in ``raw``, salvaging what precedes a truncation.
+
+    Prose or code fences around the object are ignored. If the object is cut
+    short (``max_tokens``) or breaks off into garbage, it is cut back to the
+    last complete value and its open arrays and objects are closed. Objects
+    and rows inside arrays are kept whole or dropped, so every salvaged list
+    item is complete; sections themselves may come back shortened.
+    """
+    start = raw.find("{")
+    if start < 0:
+        raise json.JSONDecodeError("no JSON object in response", raw, 0)
+    try:
+        return Recovered(json.JSONDecoder().raw_decode(raw, start)[0], True, None)
+    except json.JSONDecodeError as e:
+        error = e
+
+    # (end offset, open containers) just after each complete value
+    cuts, stack = [], []
+    in_string = escape = False
+    for i in range(start, len(raw)):
+        ch = raw[i]
+        if in_string:
+            if escape:
+                escape = False
+            elif ch == "\\":
+                escape = True
+            elif ch == '"':
+                in_string = False
+            continue
+        if ch == '"':
+            in_string = True
+        elif ch in "{[":
+            stack.append(ch)
+            cuts.append((i + 1, tuple(stack)))
+        elif ch in "}]":
+            if len(stack) <= 1:
+                break
+            stack.pop()
+            cuts.append((i + 1, tuple(stack)))
+        elif ch == ",":
+            cuts.append((i, tuple(stack)))
+
+    attempts = 0
+    for end, open_ in reversed(cuts):
+        if len(open_) >= 2 and open_[-2] == "[" and open_[-1] in _CLOSERS:
+            continue        # inside a list item (object or row): only whole items are kept
+        attempts += 1
+        if attempts > MAX_REPAIR_ATTEMPTS:
+            break
+        try:
+            value = json.loads(raw[start:end] + "".join(_CLOSERS[c] for c in reversed(open_)))
+        except json.JSONDecodeError:
+            continue
+        if value:
+            return Recovered(value, False, next(reversed(value)) if len(open_) > 1 else None)
+        break
+    raise error
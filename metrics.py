@@ -0,0 +1,174 @@
+"""Lightweight in-process metrics: stage timings, token usage and document sizes.
+
+Exposed in Prometheus text format (``render``, or ``serve`` on its own port)
+and, when ``REQMIND_TRACE_LOG`` is set, appended one span per line to a JSONL
+trace file. Stdlib only, so it costs nothing when nobody scrapes it.
+"""
+import os, json, time, bisect, asyncio, threading
+from contextlib import contextmanager
+
+TRACE_LOG = os.environ.get("REQMIND_TRACE_LOG", "")
+
+TIME_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+SIZE_BUCKETS = (1e3, 5e3, 1e4, 2.5e4, 5e4, 1e5, 2.5e5, 5e5, 1e6)
+
+
+# ── Metric types ──────────────────────────────────────────────────────────────
+_registry = []
+
+
+def _labels(names: tuple, values: tuple) -> str:
+    if not names:
+        return ""
+    esc = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for v in values)
+    return "{" + ",".join(f'{n}="{v}"' for n, v in zip(names, esc)) + "}"
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labels: tuple = ()):
+        self.name, self.help, self.labels = name, help, labels
+        self._values = {}
+        self._lock   = threading.Lock()
+        _registry.append(self)
+
+    def inc(self, amount: float = 1, **labels):
+        key = tuple(labels.get(n, "") for n in self.labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(tuple(labels.get(n, "") for n in self.labels), 0)
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, v in sorted(self._values.items()):
+                lines.append(f"{self.name}{_labels(self.labels, key)} {v:g}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, buckets: tuple, labels: tuple = ()):
+        self.name, self.help, self.labels = name, help, labels
+        self.buckets = tuple(buckets)
+        self._series = {}     # label values -> [bucket counts..., +Inf count, sum]
+        self._lock   = threading.Lock()
+        _registry.append(self)
+
+    def observe(self, value: float, **labels):
+        key = tuple(labels.get(n, "") for n in self.labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * (len(self.buckets) + 2)
+            series[bisect.bisect_left(self.buckets, value)] += 1
+            series[-1] += value
+
+    def count(self, **labels) -> int:
+        series = self._series.get(tuple(labels.get(n, "") for n in self.labels))
+        return sum(series[:-1]) if series else 0
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, series in sorted(self._series.items()):
+                cumulative = 0
+                for bound, n in zip(self.buckets + ("+Inf",), series):
+                    cumulative += n
+                    le = bound if bound == "+Inf" else f"{bound:g}"
+                    lines.append(f"{self.name}_bucket{_labels(self.labels + ('le',), key + (le,))} {cumulative}")
+                lines.append(f"{self.name}_sum{_labels(self.labels, key)} {series[-1]:g}")
+                lines.append(f"{self.name}_count{_labels(self.labels, key)} {cumulative}")
+        return lines
+
+
+STAGE_SECONDS  = Histogram("reqmind_stage_seconds", "Wall time of each pipeline stage.",
+                           TIME_BUCKETS, ("stage", "status"))
+DOCUMENT_CHARS = Histogram("reqmind_document_chars", "Characters of text sent for analysis.",
+                           SIZE_BUCKETS, ("kind",))
+LLM_TOKENS     = Counter("reqmind_llm_tokens_total", "Tokens reported by the LLM API.", ("model", "kind"))
+INPUT_TOKENS   = Counter("reqmind_input_tokens_total", "Estimated document tokens before and after normalization.",
+                         ("stage",))
+ROUTE_ATTEMPTS = Counter("reqmind_route_attempts_total", "LLM requests per routing tier and outcome.",
+                         ("kind", "route", "outcome"))
+CACHE_EVENTS   = Counter("reqmind_cache_events_total", "Result cache lookups (hit/miss) and failed writes.",
+                         ("event",))
+
+
+# ── Spans ─────────────────────────────────────────────────────────────────────
+_trace_lock = threading.Lock()
+
+
+def trace(record: dict):
+    if not TRACE_LOG:
+        return
+    line = json.dumps(record, ensure_ascii=False, default=str)
+    with _trace_lock, open(TRACE_LOG, "a", encoding="utf-8") as f:
+        f.write(line + "\n")
+
+
+@contextmanager
+def span(stage: str, **attrs):
+    """Time the enclosed block as ``stage``; the yielded dict takes extra trace attributes.
+
+    Works around ``await`` too, where it measures wall time including waiting.
+    """
+    start, status = time.perf_counter(), "ok"
+    try:
+        yield attrs
+    except BaseException as e:
+        # an abandoned stream or a closed browser tab is not a failure
+        status = "cancelled" if isinstance(e, (GeneratorExit, asyncio.CancelledError)) else "error"
+        if status == "error":
+            attrs.setdefault("error", f"{type(e).__name__}: {e}")
+        raise
+    finally:
+        seconds = time.perf_counter() - start
+        STAGE_SECONDS.observe(seconds, stage=stage, status=status)
+        trace({"ts": round(time.time(), 3), "stage": stage, "status": status,
+               "seconds": round(seconds, 5), **attrs})
+
+
+def observe_document(text: str, kind: str = "analyze"):
+    DOCUMENT_CHARS.observe(len(text), kind=kind)
+
+
+def record_usage(model: str, usage, attrs: dict = None):
+    """Count ``response.usage`` prompt/completion tokens; ``usage`` may be None (e.g. a stream without it)."""
+    if usage is None:
+        return
+    prompt, completion = getattr(usage, "prompt_tokens", 0) or 0, getattr(usage, "completion_tokens", 0) or 0
+    LLM_TOKENS.inc(prompt, model=model, kind="prompt")
+    LLM_TOKENS.inc(completion, model=model, kind="completion")
+    if attrs is not None:
+        attrs.update(prompt_tokens=prompt, completion_tokens=completion)
+
+
+# ── Exposition ────────────────────────────────────────────────────────────────
+def render() -> str:
+    return "\n".join(line for metric in _registry for line in metric.render()) + "\n"
+
+
+def serve(port: int, host: str = "0.0.0.0"):
+    """Serve ``/metrics`` from a daemon thread, next to the Gradio server."""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            if self.path.split("?")[0] not in ("/", "/metrics"):
+                self.send_error(404)
+                return
+            body = render().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
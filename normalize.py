@@ -0,0 +1,125 @@
+"""Input normalization: strip what costs tokens but carries no requirements.
+
+Repeated page headers/footers, page numbers, table-of-contents lines,
+copyright/confidentiality boilerplate and whitespace runs are removed before
+the text is sent to the LLM.
+
+    python normalize.py srs.pdf          # report input tokens before/after
+"""
+import re, sys
+from collections import Counter
+from chunking import estimate_tokens
+
+# "Page 3", "3 of 40", "- 3 -" are page numbers wherever they stand; a bare "3" only when it
+# repeats at the edges of the pages (strip_page_furniture), since "2024" or "500" may be content
+PAGE_LABEL_RE  = re.compile(r"^page\s*\d{1,4}(?:\s*(?:of|/)\s*\d{1,4})?$|^\d{1,4}\s+of\s+\d{1,4}$"
+                            r"|^[-–—]\s*\d{1,4}\s*[-–—]$", re.I)
+BARE_NUMBER_RE = re.compile(r"^\d{1,4}$")
+PAGE_REF_RE    = re.compile(r"\bpage\s+\d{1,4}\b", re.I)
+TOC_HEADING_RE = re.compile(r"^(?:table of contents|contents)$", re.I)
+TOC_LINE_RE    = re.compile(r"^\S.{1,150}?(?:\s?\.){4,}\s*\d{1,4}$|^\S.{1,150}?\s?…+\s*\d{1,4}$")
+BOILERPLATE_RE = re.compile(
+    r"^(?:©|\(c\)\s|copyright\b).{0,150}$"
+    r"|^all rights reserved\.?$"
+    r"|^(?:strictly |company )?(?:confidential|proprietary)(?: (?:and|&) (?:confidential|proprietary))?"
+    r"(?:\s*[-–—:|].{0,60})?$",
+    re.I,
+)
+SPACE_RE  = re.compile(r"[ \t\u00a0\u2000-\u200b\u3000]+")
+DIGITS_RE = re.compile(r"\d+")
+
+FURNITURE_EDGE_LINES = 3      # header/footer lines looked at on each page
+FURNITURE_MIN_SHARE  = 0.5    # ... that repeat on at least this share of pages
+
+
+def _page_number(line: str, outer: bool = False) -> bool:
+    """A page number; bare numbers only as a page's first or last line (``outer``)."""
+    return bool(PAGE_REF_RE.search(line) or PAGE_LABEL_RE.match(line) or (outer and BARE_NUMBER_RE.match(line)))
+
+
+def _key(line: str, outer: bool = False) -> str:
+    line = SPACE_RE.sub(" ", line).strip().lower()
+    # "Page 3 of 40" and "Page 4 of 40" are the same furniture; "FR3 ..." and "FR4 ..." are not
+    if _page_number(line, outer):
+        return DIGITS_RE.sub("#", line)
+    return line
+
+
+def strip_page_furniture(pages: list) -> list:
+    """Drop header/footer lines that repeat (numbers aside) at the edges of most pages.
+
+    The first occurrence is kept, so a repeated table header still labels its
+    columns once.
+    """
+    if len(pages) < 3:
+        return pages
+    split = [p.splitlines() for p in pages]
+    edges, outers = [], []
+    for lines in split:
+        nonblank = [i for i, l in enumerate(lines) if l.strip()]
+        edges.append(set(nonblank[:FURNITURE_EDGE_LINES] + nonblank[-FURNITURE_EDGE_LINES:]))
+        outers.append(set(nonblank[:1] + nonblank[-1:]))
+
+    counts = Counter()
+    for lines, edge, outer in zip(split, edges, outers):
+        counts.update({_key(lines[i], i in outer) for i in edge})
+    threshold = max(3, FURNITURE_MIN_SHARE * len(pages))
+    furniture = {k for k, n in counts.items() if n >= threshold}
+    if not furniture:
+        return pages
+
+    out, seen = [], set()
+    for lines, edge, outer in zip(split, edges, outers):
+        kept = []
+        for i, line in enumerate(lines):
+            key = _key(line, i in outer) if i in edge else None
+            if key in furniture:
+                if key in seen or _page_number(line.strip(), i in outer):
+                    continue
+                seen.add(key)
+            kept.append(line)
+        out.append("\n".join(kept))
+    return out
+
+
+def normalize_document(text: str) -> str:
+    """Collapse whitespace and drop page numbers, TOC entries, boilerplate and repeated page headers."""
+    lines = [SPACE_RE.sub(" ", l).strip() for l in (text or "").splitlines()]
+
+    # pasted text has no page boundaries: repeated short lines that cite a page number are furniture
+    counts   = Counter(_key(l) for l in lines if len(l) <= 100 and PAGE_REF_RE.search(l))
+    repeated = {k for k, n in counts.items() if n >= 3}
+
+    out, blank = [], False
+    for line in lines:
+        if not line:
+            blank = bool(out)
+            continue
+        if (PAGE_LABEL_RE.match(line) or TOC_HEADING_RE.match(line) or TOC_LINE_RE.match(line)
+                or BOILERPLATE_RE.match(line) or (repeated and _key(line) in repeated)):
+            continue
+        if blank:
+            out.append("")
+            blank = False
+        out.append(line)
+    return "\n".join(out)
+
+
+def token_report(raw: str, normalized: str) -> dict:
+    before, after = estimate_tokens(raw), estimate_tokens(normalized)
+    return {"tokens_before": before, "tokens_after": after,
+            "saved_pct": round(100 * (before - after) / before, 1) if before else 0.0}
+
+
+def main(argv=None):
+    from extractor import extract_text, extract_pdf_pages
+    for path in (argv if argv is not None else sys.argv[1:]):
+        if path.lower().endswith(".pdf"):
+            raw = "\n".join(p.text for p in extract_pdf_pages(path, parallel=False) if p.text)
+        else:
+            raw = extract_text(path, parallel=False)
+        print(path, token_report(raw, normalize_document(extract_text(path, parallel=False))))
+
+
+if __name__ == "__main__":
+    main()
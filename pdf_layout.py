@@ -0,0 +1,365 @@
+"""ReportLab template and story of the analysis report.
+
+Imported by ``pdf_generator`` on the first render, so importing the rest of the
+app does not load ReportLab.
+"""
+from reportlab.lib.pagesizes import letter
+from reportlab.lib import colors
+from reportlab.lib.units import inch
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.pdfbase.pdfmetrics import stringWidth
+from reportlab.platypus import (
+    SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, HRFlowable
+)
+from xml.sax.saxutils import escape
+
+INDIGO       = colors.HexColor("#4338ca")
+INDIGO_LIGHT = colors.HexColor("#ede9fe")
+PURPLE       = colors.HexColor("#6366f1")
+SLATE_DARK   = colors.HexColor("#1e293b")
+SLATE_MID    = colors.HexColor("#475569")
+SLATE_LIGHT  = colors.HexColor("#f8faff")
+GREEN        = colors.HexColor("#16a34a")
+GREEN_LIGHT  = colors.HexColor("#dcfce7")
+AMBER        = colors.HexColor("#d97706")
+AMBER_LIGHT  = colors.HexColor("#fef3c7")
+RED          = colors.HexColor("#dc2626")
+RED_LIGHT    = colors.HexColor("#fee2e2")
+BLUE         = colors.HexColor("#2563eb")
+BLUE_LIGHT   = colors.HexColor("#dbeafe")
+BORDER       = colors.HexColor("#e2e8f0")
+WHITE        = colors.white
+
+
+def _priority_color(p):
+    p = (p or "").lower()
+    if p == "high":   return RED
+    if p == "medium": return AMBER
+    return GREEN
+
+
+def _severity_color(s):
+    s = (s or "").lower()
+    if s == "high":   return RED
+    if s == "medium": return AMBER
+    return GREEN
+
+
+def _scored(v) -> bool:
+    return isinstance(v, (int, float)) and not isinstance(v, bool)
+
+
+def _score_text(v) -> str:
+    return "Not scored" if v is None else f"{escape(str(v))}/100"
+
+
+# ── Report template (built once at import) ────────────────────────────────────
+# Styles, table styles and column layouts are immutable and shared by every
+# render; only the flowables themselves are created per report.
+W = letter[0] - 1.5*inch
+
+_styles = getSampleStyleSheet()
+
+
+def _S(name, **kw):
+    base = kw.pop("parent", "Normal")
+    return ParagraphStyle(name, parent=_styles[base], **kw)
+
+
+sTitle  = _S("sTitle",  parent="Title", fontSize=20, textColor=WHITE, spaceAfter=2, leading=24)
+sSub    = _S("sSub",    fontSize=9,  textColor=colors.HexColor("#c7d2fe"))
+sH2     = _S("sH2",     fontSize=12, textColor=INDIGO, fontName="Helvetica-Bold", spaceBefore=12, spaceAfter=5)
+sBody   = _S("sBody",   fontSize=8.5, textColor=SLATE_DARK, leading=12)
+sSmall  = _S("sSmall",  fontSize=8,  textColor=SLATE_MID)
+sWhite  = _S("sWhite",  fontSize=8.5, textColor=WHITE, fontName="Helvetica-Bold")
+sFoot   = _S("sFoot",   fontSize=7.5, textColor=SLATE_MID, alignment=1)
+
+CELL_PAD = 7    # left/right padding of section table cells
+
+HEADER_STYLE = TableStyle([
+    ("BACKGROUND",   (0,0),(-1,-1), INDIGO),
+    ("TOPPADDING",   (0,0),(-1,-1), 16),
+    ("BOTTOMPADDING",(0,0),(-1,-1), 16),
+    ("LEFTPADDING",  (0,0),(-1,-1), 18),
+    ("RIGHTPADDING", (0,0),(-1,-1), 18),
+])
+
+BANNER_STYLE = TableStyle([
+    ("ALIGN",        (0,0),(-1,-1), "CENTER"),
+    ("VALIGN",       (0,0),(-1,-1), "MIDDLE"),
+    ("TOPPADDING",   (0,0),(-1,-1), 8),
+    ("BOTTOMPADDING",(0,0),(-1,-1), 8),
+    ("BOX",          (0,0),(-1,-1), 1, BORDER),
+    ("INNERGRID",    (0,0),(-1,-1), 0.4, BORDER),
+])
+PROJECT_STYLE = TableStyle([("BACKGROUND", (0,0),(-1,-1), INDIGO_LIGHT)], parent=BANNER_STYLE)
+SUMMARY_STYLE = TableStyle([("BACKGROUND", (0,0),(-1,-1), SLATE_LIGHT)],  parent=BANNER_STYLE)
+
+SCORE_STYLES = {
+    c: TableStyle([
+        ("BACKGROUND",   (0,0),(0,0), c),
+        ("TEXTCOLOR",    (0,0),(0,0), WHITE),
+        ("BACKGROUND",   (1,0),(2,0), SLATE_LIGHT),
+        ("ALIGN",        (0,0),(0,0), "CENTER"),
+        ("VALIGN",       (0,0),(-1,-1), "MIDDLE"),
+        ("TOPPADDING",   (0,0),(-1,-1), 10),
+        ("BOTTOMPADDING",(0,0),(-1,-1), 10),
+        ("LEFTPADDING",  (0,0),(-1,-1), 10),
+        ("BOX",          (0,0),(-1,-1), 1, BORDER),
+        ("INNERGRID",    (0,0),(-1,-1), 0.4, BORDER),
+    ])
+    for c in (GREEN, AMBER, RED, SLATE_MID)
+}
+
+
+def _section_style(header, stripes):
+    return TableStyle([
+        ("BACKGROUND",    (0,0),(-1,0),  header),
+        ("TEXTCOLOR",     (0,0),(-1,0),  WHITE),
+        ("FONTNAME",      (0,0),(-1,0),  "Helvetica-Bold"),
+        ("FONTSIZE",      (0,0),(-1,0),  8.5),
+        ("ROWBACKGROUNDS",(0,1),(-1,-1), stripes),
+        ("TEXTCOLOR",     (0,1),(-1,-1), SLATE_DARK),
+        ("FONTNAME",      (0,1),(-1,-1), "Helvetica"),
+        ("FONTSIZE",      (0,1),(-1,-1), 8.5),
+        ("LEADING",       (0,0),(-1,-1), 12),
+        ("GRID",          (0,0),(-1,-1), 0.4, BORDER),
+        ("TOPPADDING",    (0,0),(-1,-1), 5),
+        ("BOTTOMPADDING", (0,0),(-1,-1), 5),
+        ("LEFTPADDING",   (0,0),(-1,-1), CELL_PAD),
+        ("RIGHTPADDING",  (0,0),(-1,-1), CELL_PAD),
+        ("VALIGN",        (0,0),(-1,-1), "TOP"),
+    ])
+
+
+SECTION_STYLES = {
+    "indigo": _section_style(INDIGO, [WHITE, SLATE_LIGHT]),
+    "amber":  _section_style(AMBER,  [AMBER_LIGHT, WHITE]),
+    "red":    _section_style(RED,    [RED_LIGHT, WHITE]),
+    "client":          _section_style(BLUE,   [BLUE_LIGHT, WHITE]),
+    "developer":       _section_style(GREEN,  [GREEN_LIGHT, WHITE]),
+    "tester":          _section_style(PURPLE, [INDIGO_LIGHT, WHITE]),
+    "project_manager": _section_style(AMBER,  [AMBER_LIGHT, WHITE]),
+}
+
+# section -> (title, empty message, color scheme, [(header, field, width)], colored field)
+SECTIONS = {
+    "functional_requirements": ("🔍  Functional Requirements", "No items identified.", "indigo", [
+        ("ID", "id", 0.45*inch), ("Description", "description", W-2.1*inch),
+        ("Category", "category", 0.9*inch), ("Priority", "priority", 0.75*inch)], "priority"),
+    "non_functional_requirements": ("⚙️  Non-Functional Requirements", "No items identified.", "indigo", [
+        ("ID", "id", 0.45*inch), ("Category", "category", 1.1*inch),
+        ("Description", "description", W-1.55*inch)], None),
+    "constraints": ("🔒  Constraints", "No items identified.", "indigo", [
+        ("ID", "id", 0.45*inch), ("Description", "description", W-0.45*inch)], None),
+    "risks": ("🚨  Risk Analysis", "No items identified.", "indigo", [
+        ("ID", "id", 0.45*inch), ("Type", "type", 1.0*inch),
+        ("Description", "description", W-2.2*inch), ("Severity", "severity", 0.75*inch)], "severity"),
+    "ambiguities": ("⚠️  Detected Ambiguities", "No ambiguities found.", "amber", [
+        ("ID", "id", 0.45*inch), ("Statement", "text", W*0.28),
+        ("Issue", "issue", W*0.25), ("Suggestion (Fix)", "suggestion", W*0.28)], None),
+    "missing_information": ("🔎  Missing Information", "No missing information identified.", "red", [
+        ("ID", "id", 0.45*inch), ("Area", "area", 0.9*inch),
+        ("Description", "description", W-1.9*inch), ("Impact", "impact", 0.55*inch)], None),
+    "scope_creep": ("🎯  Scope Creep Warnings", "No items identified.", "indigo", [
+        ("ID", "id", 0.45*inch), ("Statement", "statement", W*0.45), ("Reason", "reason", W*0.42)], None),
+}
+QUESTION_ROLES = [
+    ("client", "👤 Client"), ("developer", "💻 Developer"),
+    ("tester", "🧪 Tester"), ("project_manager", "📋 Project Manager"),
+]
+QUESTION_COLUMNS = [0.7*inch, W-0.7*inch]
+
+
+def _cell(value, width):
+    """Plain string when it fits on one line without markup, else an escaped wrapping Paragraph."""
+    text = "" if value is None else str(value)
+    if "\n" not in text and stringWidth(text, "Helvetica", 8.5) <= width - 2*CELL_PAD:
+        return text
+    return Paragraph(escape(text), sBody)
+
+
+# ── Story ─────────────────────────────────────────────────────────────────────
+def document(buf) -> SimpleDocTemplate:
+    return SimpleDocTemplate(
+        buf, pagesize=letter,
+        leftMargin=0.75*inch, rightMargin=0.75*inch,
+        topMargin=0.75*inch,  bottomMargin=0.75*inch,
+    )
+
+
+class LazyStory(list):
+    """Flowable list that pulls from a generator as ``doc.build`` consumes it (large reports).
+
+    ReportLab only ever looks at the head of the story (and pushes split
+    remainders back onto it), so keeping a few flowables buffered is enough.
+    """
+
+    def __init__(self, source, ahead: int = 4):
+        super().__init__()
+        self._source = iter(source)
+        self._ahead  = ahead
+
+    def _fill(self):
+        while self._source is not None and list.__len__(self) < self._ahead:
+            try:
+                self.append(next(self._source))
+            except StopIteration:
+                self._source = None
+
+    def __len__(self):
+        self._fill()
+        return list.__len__(self)
+
+    def __getitem__(self, i):
+        self._fill()
+        return list.__getitem__(self, i)
+
+
+def _header(text, width):
+    if stringWidth(text, "Helvetica-Bold", 8.5) <= width - 2*CELL_PAD:
+        return text
+    return Paragraph(f"<b>{escape(text)}</b>", sWhite)
+
+
+def _table(rows, columns, scheme, colored=None, colorize=None):
+    data = [[_header(h, w) for h, _, w in columns]]
+    cmds = []
+    fields = [f for _, f, _ in columns]
+    for r, item in enumerate(rows, 1):
+        data.append([_cell(item.get(f, ""), w) for _, f, w in columns])
+        if colored:
+            c = fields.index(colored)
+            cmds += [("TEXTCOLOR", (c, r), (c, r), colorize(item.get(colored))),
+                     ("FONTNAME",  (c, r), (c, r), "Helvetica-Bold")]
+    tbl = Table(data, colWidths=[w for _, _, w in columns], repeatRows=1)
+    tbl.setStyle(SECTION_STYLES[scheme])
+    if cmds:
+        tbl.setStyle(TableStyle(cmds))
+    return tbl
+
+
+def _tables(rows, columns, scheme, colored=None, colorize=None, block_rows=None):
+    """One table, or in large-report mode consecutive tables of ``block_rows`` rows each.
+
+    Fixed-size blocks keep ReportLab's per-page table splitting proportional to
+    the block rather than the whole section, and are only built when consumed.
+    """
+    step = block_rows or len(rows)
+    for i in range(0, len(rows), step):
+        yield _table(rows[i:i + step], columns, scheme, colored, colorize)
+
+
+def _section(analysis, name, block_rows=None):
+    title, empty, scheme, columns, colored = SECTIONS[name]
+    rows = [r for r in analysis.get(name, []) if isinstance(r, dict)]
+    yield Paragraph(title, sH2)
+    if not rows:
+        yield Paragraph(empty, sSmall)
+        yield Spacer(1, 6)
+        return
+    colorize = _priority_color if colored == "priority" else _severity_color
+    yield from _tables(rows, columns, scheme, colored, colorize, block_rows)
+    yield Spacer(1, 8)
+
+
+def iter_story(analysis: dict, block_rows: int = None):
+    esc = lambda v: escape(str(v))
+
+    # ── HEADER ──────────────────────────────────────────────────────────────
+    hdr = Table([[
+        Paragraph("🧠  reqMind AI — Requirements Analysis Report", sTitle),
+        Paragraph("HEC Hackathon 2026 · Group 26", sSub),
+    ]], colWidths=[W])
+    hdr.setStyle(HEADER_STYLE)
+    yield hdr
+    yield Spacer(1, 10)
+
+    # ── PROJECT INFO BANNER ─────────────────────────────────────────────────
+    pi = analysis.get("project_info", {})
+    ptype  = esc(pi.get("detected_type", "N/A"))
+    comp   = esc(pi.get("complexity", "N/A"))
+    creason= esc(pi.get("complexity_reason", ""))
+    total  = esc(pi.get("total_requirements_count", "N/A"))
+
+    pi_tbl = Table([[
+        Paragraph(f"<b>Project Type</b><br/><font size='9'>{ptype}</font>",    sBody),
+        Paragraph(f"<b>Complexity</b><br/><font size='9'>{comp}</font>",       sBody),
+        Paragraph(f"<b>Total Requirements</b><br/><font size='9'>{total}</font>", sBody),
+        Paragraph(f"<b>Reason</b><br/><font size='8'>{creason}</font>",        sSmall),
+    ]], colWidths=[W/4]*4)
+    pi_tbl.setStyle(PROJECT_STYLE)
+    yield pi_tbl
+    yield Spacer(1, 8)
+
+    # ── QUALITY SCORE ───────────────────────────────────────────────────────
+    qs = analysis.get("quality_score", {})
+    overall   = qs.get("overall", 0)
+    clarity   = _score_text(qs.get("clarity", 0))
+    complete  = _score_text(qs.get("completeness", 0))
+    consist   = _score_text(qs.get("consistency", 0))
+    testabil  = _score_text(qs.get("testability", 0))
+    breakdown = esc(qs.get("breakdown", ""))
+
+    if _scored(overall):
+        score_color = GREEN if overall >= 70 else (AMBER if overall >= 40 else RED)
+        headline    = f"<b><font size='22'>{esc(overall)}</font>/100</b>"
+    else:       # merged from chunks none of which were scored
+        score_color = SLATE_MID
+        headline    = "<b><font size='14'>Not scored</font></b>"
+
+    score_tbl = Table([[
+        Paragraph(f"{headline}<br/><font size='8'>Overall Score</font>", sBody),
+        Paragraph(f"<b>Clarity:</b> {clarity}<br/><b>Completeness:</b> {complete}<br/><b>Consistency:</b> {consist}<br/><b>Testability:</b> {testabil}", sBody),
+        Paragraph(f"<b>Assessment:</b><br/>{breakdown}", sSmall),
+    ]], colWidths=[W*0.18, W*0.27, W*0.55])
+    score_tbl.setStyle(SCORE_STYLES[score_color])
+    yield Paragraph("📊  Requirement Quality Score", sH2)
+    yield score_tbl
+    yield Spacer(1, 4)
+    yield HRFlowable(width=W, color=BORDER, thickness=0.5)
+
+    # ── SUMMARY STATS ───────────────────────────────────────────────────────
+    summ = analysis.get("summary", {})
+    yield Paragraph("📋  Summary", sH2)
+    counts = [
+        (summ.get("total_fr",          len(analysis.get("functional_requirements", []))),     "Functional"),
+        (summ.get("total_nfr",         len(analysis.get("non_functional_requirements", []))), "Non-Functional"),
+        (summ.get("total_ambiguities", len(analysis.get("ambiguities", []))),                 "Ambiguities"),
+        (summ.get("total_risks",       len(analysis.get("risks", []))),                       "Risks"),
+        (summ.get("total_scope_creep", len(analysis.get("scope_creep", []))),                 "Scope Creep"),
+        (summ.get("overall_quality", "N/A"),                                                  "Quality"),
+    ]
+    s_tbl = Table([[Paragraph(f"<b>{esc(v)}</b><br/><font size='7'>{label}</font>", sBody) for v, label in counts]],
+                  colWidths=[W/6]*6)
+    s_tbl.setStyle(SUMMARY_STYLE)
+    yield s_tbl
+    if summ.get("recommendation"):
+        yield Spacer(1, 5)
+        yield Paragraph(f"<b>Recommendation:</b> {esc(summ['recommendation'])}", sSmall)
+    yield Spacer(1, 4)
+    yield HRFlowable(width=W, color=BORDER, thickness=0.5)
+
+    # ── REQUIREMENT, RISK, AMBIGUITY, MISSING INFO & SCOPE SECTIONS ─────────
+    for name in SECTIONS:
+        yield from _section(analysis, name, block_rows)
+
+    # ── STAKEHOLDER QUESTIONS ───────────────────────────────────────────────
+    yield Paragraph("💬  Stakeholder Clarification Questions", sH2)
+    cq = analysis.get("clarification_questions", {})
+    for role, label in QUESTION_ROLES:
+        questions = [q for q in cq.get(role, []) if isinstance(q, dict)]
+        if not questions:
+            continue
+        columns = [(label, "id", QUESTION_COLUMNS[0]), ("Question", "question", QUESTION_COLUMNS[1])]
+        yield from _tables(questions, columns, role, block_rows=block_rows)
+        yield Spacer(1, 5)
+
+    # ── FOOTER ──────────────────────────────────────────────────────────────
+    yield Spacer(1, 6)
+    yield HRFlowable(width=W, color=BORDER, thickness=0.5)
+    yield Spacer(1, 4)
+    yield Paragraph(
+        "Generated by reqMind AI  ·  HEC Hackathon 2026  ·  Cohort 02 · Group 26",
+        sFoot
+    )
@@ -0,0 +1,206 @@
+"""Deterministic pre-scan for ambiguous wording and scope creep.
+
+Runs compiled lexicon patterns over the raw document and returns findings in
+the analysis schema (``ambiguities`` / ``scope_creep``), each with the exact
+character ``span`` of the flagged wording. Cheap enough to run on every
+request: the UI paints it instantly and falls back to it when the LLM is down.
+"""
+import re
+from bisect import bisect_right
+from chunking import LIST_SECTIONS, _renumber, recompute_summary
+
+# ── Lexicons ──────────────────────────────────────────────────────────────────
+# pattern -> (issue, suggestion); lower-case patterns, matched on whole words
+WEAK_TERMS = {
+    r"fast|quick(?:ly)?|rapid(?:ly)?|responsive|real[- ]time|instant(?:ly)?|high[- ]performance":
+        ("Speed is not measurable as written.", "State a response time and load, e.g. 'within 2 s for 95% of requests'."),
+    r"user[- ]friendly|easy to use|easy|intuitive|simple|seamless(?:ly)?|convenient":
+        ("Usability claim with no acceptance criterion.", "Define a measurable usability target (task time, error rate, SUS score)."),
+    r"secure(?:ly)?|safe(?:ly)?|protected":
+        ("Security requirement names no threat or control.", "Name the control: encryption, authentication method, OWASP level."),
+    r"scalable|robust|reliable|flexible|efficient(?:ly)?|modern|state[- ]of[- ]the[- ]art|optimal|best":
+        ("Quality attribute without a measure.", "Give a number: users, throughput, uptime or resource budget."),
+    r"etc\.?|and so on|and/or|such as|including but not limited to":
+        ("Open-ended list; the full scope is not stated.", "Enumerate every item that is in scope."),
+    r"as appropriate|as needed|as required|if necessary|where possible|when possible|if possible"
+    r"|as much as possible|as soon as possible|to the extent possible":
+        ("Escape clause leaves the obligation undefined.", "State the exact condition under which it applies."),
+    r"adequate|sufficient|reasonable|appropriate|acceptable|normal(?:ly)?|usually|typically|approximately"
+    r"|several|some|many|various|few|minimal|significant(?:ly)?":
+        ("Vague quantity or qualifier.", "Replace with a concrete number or range."),
+    r"somehow|something|some kind of|tbd|tba|to be determined|to be decided":
+        ("Requirement is unspecified or left open.", "Specify the behaviour or record it as an open question."),
+    r"always|never|unlimited|at all times|any number of|all the time|24/7":
+        ("Unbounded requirement; impossible to verify exhaustively.", "Bound it: which users, data or time window."),
+}
+
+PASSIVE = (
+    r"(?:shall|should|must|will|can|may)\s+be\s+(?:\w+ly\s+)?\w+(?:ed|en)\b(?!\s+by\b)",
+    ("Passive requirement with no responsible actor.", "Name who or what performs the action."),
+)
+
+SCOPE_TERMS = {
+    r"in (?:the )?future|future (?:release|version|phase)s?|later (?:on|stage|phase|release)|eventually":
+        "Deferred to a future release; not part of the committed scope.",
+    r"(?:may|might|could) (?:also |later |eventually )?(?:include|add|support|offer|provide|integrate|have|be added)":
+        "Optional capability phrased as a possibility, not a requirement.",
+    r"nice to have|would be (?:nice|good|great)|if time permits|optional(?:ly)?|bonus|stretch goal":
+        "Optional feature that can silently grow the project.",
+    r"phase (?:2|3|ii|iii|two|three)|next (?:release|version|phase)|road ?map|v2|version 2":
+        "Belongs to a later phase or roadmap, not this delivery.",
+    r"possibly|potentially|perhaps|maybe":
+        "Speculative wording; commitment is unclear.",
+}
+
+
+def _alternatives(pattern: str) -> list:
+    """Split ``pattern`` on its top-level ``|``."""
+    parts, depth, last = [], 0, 0
+    for i, ch in enumerate(pattern):
+        if ch == "(" and pattern[i - 1:i] != "\\":
+            depth += 1
+        elif ch == ")" and pattern[i - 1:i] != "\\":
+            depth -= 1
+        elif ch == "|" and depth == 0:
+            parts.append(pattern[last:i])
+            last = i + 1
+    return parts + [pattern[last:]]
+
+
+def _first_chars(pattern: str) -> set:
+    """Lower-case letters/digits any match of ``pattern`` can start with (lexicon patterns only)."""
+    chars = set()
+    for alt in _alternatives(pattern):
+        if alt.startswith("(?:"):
+            chars |= _first_chars(alt[3:alt.index(")")] if ")" in alt else alt[3:])
+        else:
+            chars.add(alt[0])
+    return chars
+
+
+def _compile(rules: list) -> tuple:
+    """One regex for every ``(section, pattern, info)`` rule, matched on lower-cased text.
+
+    A single pass with a leading character-class lookahead lets the engine skip
+    most word starts without trying every alternative. Earlier rules win where
+    two could match at the same place.
+    """
+    parts, meta, first = [], [], set()
+    for i, (section, pattern, info) in enumerate(rules):
+        parts.append(f"(?P<g{i}>{pattern})")
+        meta.append((section, info))
+        first |= _first_chars(pattern)
+    lead = "".join(sorted(first))
+    return re.compile(f"\\b(?=[{re.escape(lead)}])(?:{'|'.join(parts)})(?!\\w)"), meta
+
+
+# scope phrasing first, so "may be added" reads as scope creep rather than passive voice
+RULES_RE, RULES_META = _compile(
+    [("scope_creep", p, info) for p, info in SCOPE_TERMS.items()]
+    + [("ambiguities", *PASSIVE)]
+    + [("ambiguities", p, info) for p, info in WEAK_TERMS.items()]
+)
+SENTENCE_END_RE = re.compile(r"[.!?](?=\s)")
+
+
+# ── Scanning ──────────────────────────────────────────────────────────────────
+class _Sentences:
+    """Maps a character offset to the sentence around it, splitting only lines that have findings."""
+
+    def __init__(self, text: str):
+        self.text  = text
+        self.lines = {}     # line start -> sentence start offsets within the document
+
+    def around(self, pos: int) -> tuple:
+        text  = self.text
+        first = text.rfind("\n", 0, pos) + 1
+        starts = self.lines.get(first)
+        if starts is None:
+            last = text.find("\n", pos)
+            last = len(text) if last < 0 else last
+            starts = self.lines[first] = [first] + [m.end() for m in SENTENCE_END_RE.finditer(text, first, last)]
+            starts.append(last)
+        i = bisect_right(starts, pos) - 1
+        if i == len(starts) - 1:    # pos sits on the newline itself
+            i -= 1
+        start, end = starts[i], starts[i + 1]
+        return start, end, text[start:end].strip()
+
+
+def scan(text: str) -> dict:
+    """Return ``{"ambiguities": [...], "scope_creep": [...]}`` for ``text``.
+
+    One finding per flagged sentence and kind of problem; ``span`` is the
+    ``[start, end)`` offset of the first flagged wording in ``text`` and
+    ``terms`` lists every flagged wording in that sentence.
+    """
+    sentences = _Sentences(text)
+    found = {}     # (section, sentence start, issue) -> finding
+    # the lexicons are lower-case; lower() keeps offsets unless a character changes length (e.g. "İ")
+    lowered = text.lower()
+    if len(lowered) != len(text):
+        lowered = "".join(c if len(c.lower()) != 1 else c.lower() for c in text)
+
+    def add(section, m, info):
+        start, _, sentence = sentences.around(m.start())
+        key = (section, start, info if isinstance(info, str) else info[0])
+        term = text[m.start():m.end()]
+        if key in found:
+            if term.lower() not in (t.lower() for t in found[key]["terms"]):
+                found[key]["terms"].append(term)
+            return
+        item = {LIST_SECTIONS[section][1]: sentence}
+        if section == "ambiguities":
+            item.update(issue=info[0], suggestion=info[1])
+        else:
+            item["reason"] = info
+        item.update(terms=[term], span=[m.start(), m.end()], source="rules")
+        found[key] = item
+
+    for m in RULES_RE.finditer(lowered):
+        section, info = RULES_META[int(m.lastgroup[1:])]
+        add(section, m, info)
+
+    result = {"ambiguities": [], "scope_creep": []}
+    for (section, _, _), item in sorted(found.items(), key=lambda kv: kv[1]["span"][0]):
+        if section == "ambiguities":
+            term = ", ".join(f"'{t}'" for t in item["terms"])
+            item["issue"] = f"{term}: {item['issue']}"
+        result[section].append(item)
+    for section in result:
+        result[section] = _renumber(result[section], LIST_SECTIONS[section][0])
+    return result
+
+
+# ── Combining with LLM output ─────────────────────────────────────────────────
+def _covered(sentence: str, quotes: list) -> bool:
+    sentence = sentence.lower()
+    return any(q and (q in sentence or sentence in q) for q in quotes)
+
+
+def merge_section(result: dict, section: str, items: list) -> dict:
+    """Append rule findings for sentences the LLM did not already quote; LLM items keep their place."""
+    prefix, field = LIST_SECTIONS[section]
+    llm    = [i for i in (result.get(section) or []) if isinstance(i, dict) and i.get("source") != "rules"]
+    quotes = [str(i.get(field) or "").strip().strip('"').lower() for i in llm]
+    extra  = [i for i in items if not _covered(i[field], quotes)]
+    result[section] = _renumber(llm + extra, prefix)
+    return result
+
+
+def merge_findings(result: dict, findings: dict) -> dict:
+    for section, items in findings.items():
+        merge_section(result, section, items)
+    return recompute_summary(result)
+
+
+def fallback_result(text: str, findings: dict = None) -> dict:
+    """A schema-shaped result from the pre-scan alone, for when the LLM is unavailable."""
+    result = {section: [] for section in LIST_SECTIONS}
+    result.update(findings if findings is not None else scan(text))
+    result["summary"] = {
+        "overall_quality": "Not scored",
+        "recommendation": "Rule-based pre-scan only; run the full AI analysis for requirements, risks and scores.",
+    }
+    result["source"] = "rules"
+    return recompute_summary(result)
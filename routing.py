@@ -0,0 +1,163 @@
+"""Model routing: pick the model and output budget for each LLM request.
+
+The request's size and number of requirement statements are estimated locally
+and matched against ``ROUTES``, smallest tier first; the output budget grows
+with the estimated requirements up to the tier's ``max_tokens``, and a request
+for only some sections gets their share of it (``SECTION_SHARES``). A response
+that is invalid or looks unreliable is retried one tier up, with the tier's
+full budget. Every attempt is traced as a ``route`` span carrying its
+decision, latency and token cost.
+
+The table can be replaced with ``REQMIND_ROUTES``: a JSON list of tiers
+(``[{"name": "small", "model": "...", "max_tokens": 2000, "max_input_tokens":
+1500, "max_requirements": 15}, ...]``) or the path of a file holding one.
+"""
+import os, re, json
+from contextlib import contextmanager
+from typing import NamedTuple
+from chunking import estimate_tokens
+from metrics import span, ROUTE_ATTEMPTS
+
+
+class Route(NamedTuple):
+    name: str
+    model: str
+    max_tokens: int                 # output budget ceiling
+    max_input_tokens: int = None    # tier applies up to this input size; None for no limit
+    max_requirements: int = None    # ... and up to this many requirement statements
+
+
+DEFAULT_ROUTES = (
+    Route("small",  "llama-3.1-8b-instant",    2000, max_input_tokens=1500, max_requirements=15),
+    Route("medium", "llama-3.3-70b-versatile", 4000, max_input_tokens=4000, max_requirements=60),
+    Route("large",  "llama-3.3-70b-versatile", 6000),
+)
+OUTPUT_BASE_TOKENS      = 1200    # scores, summary and questions
+OUTPUT_TOKENS_PER_REQ   = 60      # one requirement row plus its share of risks, ambiguities, ...
+MIN_REQUIREMENTS_CHECK  = 3       # an analysis that finds none of at least this many is doubted
+MIN_SECTION_TOKENS      = 300     # floor for a request covering only a few small sections
+
+# each section's rough share of a full analysis' output tokens
+SECTION_SHARES = {
+    "project_info": .03, "quality_score": .05, "functional_requirements": .35,
+    "non_functional_requirements": .08, "constraints": .04, "risks": .08, "ambiguities": .08,
+    "missing_information": .06, "scope_creep": .06, "clarification_questions": .12, "summary": .05,
+}
+
+MODAL_RE = re.compile(r"\b(?:shall|must|should|will|needs? to)\b", re.I)
+REQ_ID_RE = re.compile(r"^\s*(?:[A-Z]{1,5}[-_]?\d+(?:\.\d+)*)\b")
+
+
+def load_routes(spec: str = None) -> tuple:
+    """The routing table from ``spec`` (JSON or a file path), ``REQMIND_ROUTES`` or the default."""
+    spec = os.environ.get("REQMIND_ROUTES", "") if spec is None else spec
+    if not spec.strip():
+        return DEFAULT_ROUTES
+    if not spec.lstrip().startswith("["):
+        with open(spec, encoding="utf-8") as f:
+            spec = f.read()
+    routes = tuple(Route(**tier) for tier in json.loads(spec))
+    if not routes:
+        raise ValueError("REQMIND_ROUTES defines no routes")
+    return routes
+
+
+ROUTES = load_routes()
+
+
+class Estimate(NamedTuple):
+    tokens: int
+    requirements: int
+
+
+def estimate(text: str) -> Estimate:
+    """Input tokens and requirement-like lines (a modal verb or a leading ``FR-3``-style id)."""
+    requirements = sum(1 for line in text.splitlines() if MODAL_RE.search(line) or REQ_ID_RE.match(line))
+    return Estimate(estimate_tokens(text), requirements)
+
+
+def routes_key(routes: tuple = None) -> str:
+    """Identifies the routing table in cache keys: a different table may give different results."""
+    return json.dumps([r._asdict() for r in (routes or ROUTES)], sort_keys=True)
+
+
+class RoutePlan:
+    """The tier one request runs on, and the tiers above it to escalate to."""
+
+    def __init__(self, text: str, kind: str = "analyze", routes: tuple = None, budget_scale: float = 1.0,
+                 sections: tuple = None):
+        self.kind     = kind
+        self.scale    = budget_scale  # output tokens per requirement relative to compact rows
+        self.sections = sections      # the analysis sections asked for; None for all of them
+        self.routes   = routes or ROUTES
+        self.estimate = estimate(text)
+        self.index    = next((i for i, r in enumerate(self.routes) if self._fits(r)), len(self.routes) - 1)
+        self.reason   = None      # why the current tier was escalated to
+        self.usage    = {}
+
+    def _fits(self, route: Route) -> bool:
+        return ((route.max_input_tokens is None or self.estimate.tokens <= route.max_input_tokens)
+                and (route.max_requirements is None or self.estimate.requirements <= route.max_requirements))
+
+    @property
+    def route(self) -> Route:
+        return self.routes[self.index]
+
+    @property
+    def max_tokens(self) -> int:
+        if self.reason:
+            return self.route.max_tokens
+        budget = self.scale * (OUTPUT_BASE_TOKENS + OUTPUT_TOKENS_PER_REQ * self.estimate.requirements)
+        if self.sections is not None:
+            budget = max(budget * sum(SECTION_SHARES.get(s, 0) for s in self.sections), MIN_SECTION_TOKENS)
+        return min(self.route.max_tokens, int(budget))
+
+    def wants(self, section: str) -> bool:
+        return self.sections is None or section in self.sections
+
+    def request(self, request: dict) -> dict:
+        """``request`` with this tier's model and output budget."""
+        return {**request, "model": self.route.model, "max_tokens": self.max_tokens}
+
+    def charge(self, attrs: dict):
+        """Add one LLM call's usage (the attrs ``metrics.record_usage`` filled in) to this attempt."""
+        self.usage["llm_calls"] = self.usage.get("llm_calls", 0) + 1
+        for k in ("prompt_tokens", "completion_tokens"):
+            self.usage[k] = self.usage.get(k, 0) + attrs.get(k, 0)
+
+    def doubt(self, result: dict):
+        """Why ``result`` should be retried on a larger tier, or None if it looks sound."""
+        if "partial" in result:
+            return "truncated"
+        if self.kind == "compare":
+            return None if isinstance(result.get("quality_change"), dict) else "incomplete"
+        if self.wants("quality_score") and not isinstance((result.get("quality_score") or {}).get("overall"),
+                                                          (int, float)):
+            return "no_score"
+        listed = ("functional_requirements", "non_functional_requirements")
+        if (self.estimate.requirements >= MIN_REQUIREMENTS_CHECK and any(self.wants(s) for s in listed)
+                and not any(result.get(s) for s in listed)):
+            return "no_requirements"
+        return None
+
+    def escalate(self, reason: str) -> bool:
+        """Move one tier up; False when already on the largest."""
+        if self.index + 1 >= len(self.routes):
+            return False
+        self.index, self.reason = self.index + 1, reason
+        return True
+
+    @contextmanager
+    def attempt(self):
+        """Trace one attempt on the current tier; set ``outcome`` on the yielded attrs."""
+        self.usage = {}
+        route = self.route
+        with span("route", kind=self.kind, route=route.name, model=route.model, max_tokens=self.max_tokens,
+                  input_tokens=self.estimate.tokens, requirements=self.estimate.requirements,
+                  sections=list(self.sections) if self.sections else None, escalated_for=self.reason) as attrs:
+            try:
+                yield attrs
+            finally:
+                attrs.update(self.usage)
+                attrs.setdefault("outcome", "aborted")     # raised or cancelled before a result
+                ROUTE_ATTEMPTS.inc(kind=self.kind, route=route.name, outcome=attrs["outcome"])
@@ -0,0 +1,385 @@
+"""Rate-limit-aware scheduling of LLM calls, and coalescing of identical requests.
+
+``Scheduler.call``/``acall`` wrap one chat completion: they wait for room in
+the model's requests-per-minute and tokens-per-minute buckets (interactive
+requests ahead of batch ones), send it, and retry 429s, 5xx and dropped
+connections with jittered exponential backoff. A 429's ``retry-after`` is
+honoured and pauses the whole model, not just the request that hit it.
+
+Limits come from ``REQMIND_RPM``/``REQMIND_TPM`` (every model; 0 = no limit)
+and ``REQMIND_RATE_LIMITS``, a JSON object of per-model overrides such as
+``{"llama-3.1-8b-instant": {"rpm": 30, "tpm": 6000}}``.
+
+``SingleFlight``, ``AsyncSingleFlight`` and ``StreamFlight`` let concurrent
+callers with the same key share one in-flight computation; every caller gets
+its own copy of the result.
+"""
+import os, sys, copy, json, time, random, asyncio, itertools, threading
+from collections import deque
+from concurrent.futures import Future
+from contextlib import contextmanager
+from contextvars import ContextVar
+from email.utils import parsedate_to_datetime
+
+from chunking import estimate_tokens
+from metrics import Counter
+
+DEFAULT_RPM   = float(os.environ.get("REQMIND_RPM", "0"))
+DEFAULT_TPM   = float(os.environ.get("REQMIND_TPM", "0"))
+RATE_LIMITS   = json.loads(os.environ.get("REQMIND_RATE_LIMITS", "") or "{}")
+MAX_RETRIES   = int(os.environ.get("REQMIND_LLM_RETRIES", "4"))
+BACKOFF_BASE  = 0.5     # seconds; doubles per attempt
+BACKOFF_CAP   = 30.0
+RETRY_JITTER  = 0.2     # share of retry-after added at random, so waiters don't return in lockstep
+POLL_S        = 0.01    # how often a request that is not first in line looks again
+
+LANES = ("interactive", "batch")     # earlier lanes are served first
+RETRYABLE = ("RateLimitError", "InternalServerError", "APIConnectionError")     # groq exception classes
+
+LLM_RETRIES = Counter("reqmind_llm_retries_total", "LLM calls retried, by model and error.", ("model", "error"))
+
+_lane = ContextVar("reqmind_lane", default="interactive")
+
+
+@contextmanager
+def lane(name: str):
+    """Schedule the LLM calls made inside the block in lane ``name``."""
+    if name not in LANES:
+        raise ValueError(f"unknown lane {name!r}; expected one of {LANES}")
+    token = _lane.set(name)
+    try:
+        yield
+    finally:
+        _lane.reset(token)
+
+
+def current_lane() -> str:
+    return _lane.get()
+
+
+# ── Limits ────────────────────────────────────────────────────────────────────
+class TokenBucket:
+    """``per_minute`` units, refilled continuously; holds at most ``burst_s`` seconds' worth."""
+
+    def __init__(self, per_minute: float, burst_s: float = 60.0):
+        self.rate     = per_minute / 60.0
+        self.capacity = self.rate * burst_s
+        self.level    = self.capacity
+        self.stamp    = time.monotonic()
+
+    def refill(self, now: float):
+        self.level = min(self.capacity, self.level + (now - self.stamp) * self.rate)
+        self.stamp = now
+
+    def wait(self, amount: float) -> float:
+        """Seconds until ``amount`` is available; a request larger than the bucket waits for a full one."""
+        return max(min(amount, self.capacity) - self.level, 0) / self.rate
+
+    def take(self, amount: float):
+        self.level -= min(amount, self.capacity)
+
+    def give(self, amount: float):
+        self.level = min(self.capacity, self.level + amount)
+
+
+class Limiter:
+    """The RPM and TPM buckets of one model, served in lane order and first come first served within a lane."""
+
+    def __init__(self, rpm: float = 0, tpm: float = 0, burst_s: float = 60.0):
+        self.requests = TokenBucket(rpm, burst_s) if rpm else None
+        self.tokens   = TokenBucket(tpm, burst_s) if tpm else None
+        self.paused_until = 0.0
+        self._lock    = threading.Lock()
+        self._queues  = {name: deque() for name in LANES}
+        self._tickets = itertools.count()
+
+    def _try(self, ticket: int, cost: float) -> float:
+        """Take ``cost`` for ``ticket`` if it is first in line and it fits; else the seconds to wait."""
+        with self._lock:
+            now  = time.monotonic()
+            head = next((q for q in self._queues.values() if q), None)
+            if self.requests is None and self.tokens is None and now >= self.paused_until:
+                for queue in self._queues.values():
+                    if ticket in queue:
+                        queue.remove(ticket)
+                return 0.0      # no limits and no 429 pause: nothing to wait for or order
+            if head is None or head[0] != ticket:
+                return POLL_S
+            delay = self.paused_until - now
+            for bucket, amount in ((self.requests, 1), (self.tokens, cost)):
+                if bucket is not None:
+                    bucket.refill(now)
+                    delay = max(delay, bucket.wait(amount))
+            if delay > 0:
+                return delay
+            for bucket, amount in ((self.requests, 1), (self.tokens, cost)):
+                if bucket is not None:
+                    bucket.take(amount)
+            head.popleft()
+            return 0.0
+
+    def _enqueue(self, lane_name: str) -> int:
+        with self._lock:
+            ticket = next(self._tickets)
+            self._queues[lane_name].append(ticket)
+            return ticket
+
+    def _leave(self, lane_name: str, ticket: int):
+        with self._lock:
+            queue = self._queues[lane_name]
+            if ticket in queue:
+                queue.remove(ticket)
+
+    def acquire(self, cost: float, lane_name: str = "interactive"):
+        ticket = self._enqueue(lane_name)
+        try:
+            while (delay := self._try(ticket, cost)) > 0:
+                time.sleep(delay)
+        finally:
+            self._leave(lane_name, ticket)
+
+    async def acquire_async(self, cost: float, lane_name: str = "interactive"):
+        ticket = self._enqueue(lane_name)
+        try:
+            while (delay := self._try(ticket, cost)) > 0:
+                await asyncio.sleep(delay)
+        finally:
+            self._leave(lane_name, ticket)
+
+    def refund(self, amount: float):
+        if self.tokens is not None and amount > 0:
+            with self._lock:
+                self.tokens.give(amount)
+
+    def pause(self, seconds: float):
+        """Hold every request to this model for ``seconds`` (after a 429)."""
+        with self._lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+
+def _groq_error(error: Exception, names: tuple) -> bool:
+    # only the client that raised imports the SDK, so an error not raised by it cannot be one of its classes
+    groq = sys.modules.get("groq")
+    return groq is not None and isinstance(error, tuple(getattr(groq, n) for n in names))
+
+
+def retryable(error: Exception) -> bool:
+    return _groq_error(error, RETRYABLE)
+
+
+def rate_limited(error: Exception) -> bool:
+    """Whether ``error`` is the API's 429 (what a caller shows as "busy")."""
+    return _groq_error(error, ("RateLimitError",))
+
+
+def retry_after(error: Exception):
+    """Seconds the server asked us to wait (``retry-after-ms`` or ``retry-after``), or None."""
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000
+        value = headers.get("retry-after")
+        if not value:
+            return None
+        try:
+            return float(value)
+        except ValueError:
+            return max(parsedate_to_datetime(value).timestamp() - time.time(), 0)
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff(attempt: int, after: float = None) -> float:
+    """Delay before retry ``attempt`` (0-based): ``after`` plus jitter, else full-jitter exponential."""
+    if after is not None:
+        return after + random.uniform(0, RETRY_JITTER * max(after, BACKOFF_BASE))
+    return random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt))
+
+
+class Scheduler:
+    def __init__(self, rpm: float = DEFAULT_RPM, tpm: float = DEFAULT_TPM, limits: dict = None,
+                 retries: int = MAX_RETRIES):
+        self.rpm, self.tpm = rpm, tpm
+        self.limits  = RATE_LIMITS if limits is None else limits
+        self.retries = retries
+        self._limiters = {}
+        self._lock = threading.Lock()
+
+    def configure(self, rpm: float = None, tpm: float = None):
+        """Change the default limits; per-model ``limits`` still override them."""
+        with self._lock:
+            self.rpm = self.rpm if rpm is None else rpm
+            self.tpm = self.tpm if tpm is None else tpm
+            self._limiters.clear()
+
+    def limiter(self, model: str) -> Limiter:
+        with self._lock:
+            if model not in self._limiters:
+                cfg = {"rpm": self.rpm, "tpm": self.tpm, **self.limits.get(model, {})}
+                self._limiters[model] = Limiter(cfg["rpm"], cfg["tpm"], cfg.get("burst_s", 60.0))
+            return self._limiters[model]
+
+    @staticmethod
+    def cost(request: dict) -> int:
+        """Tokens reserved for ``request``: its prompt plus the whole output budget."""
+        prompt = sum(estimate_tokens(m["content"]) for m in request["messages"])
+        return prompt + (request.get("max_tokens") or 0)
+
+    def settle(self, request: dict, usage):
+        """Return the part of the reservation ``usage`` shows was not spent."""
+        if usage is None:
+            return
+        spent = (getattr(usage, "prompt_tokens", 0) or 0) + (getattr(usage, "completion_tokens", 0) or 0)
+        self.limiter(request["model"]).refund(self.cost(request) - spent)
+
+    def _retry_delay(self, request: dict, attempt: int, error: Exception):
+        if attempt >= self.retries or not retryable(error):
+            return None
+        after = retry_after(error)
+        delay = backoff(attempt, after)
+        if rate_limited(error):
+            self.limiter(request["model"]).pause(after if after is not None else delay)
+        LLM_RETRIES.inc(model=request["model"], error=type(error).__name__)
+        return delay
+
+    def call(self, request: dict, send):
+        """``send()`` once there is room for ``request``, retrying transient failures."""
+        limiter = self.limiter(request["model"])
+        for attempt in itertools.count():
+            limiter.acquire(self.cost(request), current_lane())
+            try:
+                response = send()
+            except Exception as e:
+                delay = self._retry_delay(request, attempt, e)
+                if delay is None:
+                    raise
+                time.sleep(delay)
+                continue
+            self.settle(request, getattr(response, "usage", None))
+            return response
+
+    async def acall(self, request: dict, send):
+        """Async ``call``; ``send`` returns an awaitable."""
+        limiter = self.limiter(request["model"])
+        for attempt in itertools.count():
+            await limiter.acquire_async(self.cost(request), current_lane())
+            try:
+                response = await send()
+            except Exception as e:
+                delay = self._retry_delay(request, attempt, e)
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
+                continue
+            self.settle(request, getattr(response, "usage", None))
+            return response
+
+
+# ── Coalescing ────────────────────────────────────────────────────────────────
+class SingleFlight:
+    """Threads calling ``run`` with the same key while one is running wait for its result."""
+
+    def __init__(self):
+        self._futures = {}
+        self._lock = threading.Lock()
+
+    def run(self, key: str, fn):
+        with self._lock:
+            future = self._futures.get(key)
+            leader = future is None
+            if leader:
+                future = self._futures[key] = Future()
+        if not leader:
+            return copy.deepcopy(future.result())
+        try:
+            result = fn()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                self._futures.pop(key, None)
+
+
+class AsyncSingleFlight:
+    """``SingleFlight`` for coroutines; the shared task is cancelled once nobody awaits it."""
+
+    def __init__(self):
+        self._tasks = {}      # key -> [task, waiters]
+
+    async def run(self, key: str, make_coro):
+        entry = self._tasks.get(key)
+        leader = entry is None
+        if leader:
+            entry = self._tasks[key] = [asyncio.ensure_future(make_coro()), 0]
+            entry[0].add_done_callback(lambda _: self._tasks.pop(key, None) if self._tasks.get(key) is entry else None)
+        entry[1] += 1
+        try:
+            result = await asyncio.shield(entry[0])
+        finally:
+            entry[1] -= 1
+            if not entry[1] and not entry[0].done():
+                entry[0].cancel()
+        return result if leader else copy.deepcopy(result)
+
+
+class StreamFlight:
+    """Concurrent readers of the same key share one async generator; late readers replay what they missed."""
+
+    class _Flight:
+        def __init__(self):
+            self.items   = []
+            self.done    = False
+            self.error   = None
+            self.readers = 0
+            self.changed = asyncio.Condition()
+            self.task    = None
+
+    def __init__(self):
+        self._flights = {}
+
+    async def _produce(self, key: str, flight, agen):
+        try:
+            async for item in agen:
+                async with flight.changed:
+                    flight.items.append(item)
+                    flight.changed.notify_all()
+        except BaseException as e:
+            flight.error = e
+        finally:
+            await agen.aclose()
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+            async with flight.changed:
+                flight.done = True
+                flight.changed.notify_all()
+
+    async def stream(self, key: str, make_agen):
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = self._flights[key] = self._Flight()
+            flight.task = asyncio.ensure_future(self._produce(key, flight, make_agen()))
+        flight.readers += 1
+        try:
+            seen = 0
+            while True:
+                async with flight.changed:
+                    await flight.changed.wait_for(lambda: seen < len(flight.items) or flight.done)
+                    items = flight.items[seen:]
+                for item in items:
+                    yield copy.deepcopy(item)
+                seen += len(items)
+                if flight.done and seen == len(flight.items):
+                    if flight.error is not None:
+                        raise flight.error
+                    return
+        finally:
+            flight.readers -= 1
+            if not flight.readers and not flight.done:
+                # the last reader left (e.g. every tab closed): stop paying for the upstream call
+                flight.task.cancel()
+                if self._flights.get(key) is flight:
+                    del self._flights[key]
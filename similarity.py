@@ -0,0 +1,401 @@
+"""Local near-duplicate and contradiction detection over requirement statements.
+
+Each statement is reduced to its content words (lower case, boilerplate such as
+"the system shall" dropped). Numbers, negations and opposed terms ("enable" /
+"disable", "shall" / "may") are set aside as the statement's *claims*, so two
+statements that differ only there still look alike. Content words and their
+bigrams are hashed into TF-IDF vectors. When their dense matrix fits in
+``BRUTE_FORCE_MB``, every pair is scored with batched cosine similarity. Larger
+sets only score the candidate pairs that MinHash/LSH buckets together.
+
+Pairs at ``DUP_THRESHOLD`` with the same claims are duplicates, clustered
+transitively. Pairs at ``CONFLICT_THRESHOLD`` whose claims differ are likely
+contradictions. Requirements from analyses and raw document sentences are only
+compared with their own kind.
+
+``SimilarityIndex`` accumulates statements from many documents, so one index
+can cover a whole portfolio; ``save``/``load`` keep it on disk:
+
+    python similarity.py results.jsonl [--docs DIR] [--index portfolio.npz] [-o report.json]
+"""
+import os, re, sys, json, zlib, argparse
+import numpy as np
+
+from metrics import span
+from prescan import SENTENCE_END_RE
+
+DUP_THRESHOLD      = 0.85
+CONFLICT_THRESHOLD = 0.75
+BRUTE_FORCE_MB     = 8        # largest dense statements x vocabulary matrix scored all-pairs; above, MinHash/LSH
+BLOCK_ROWS         = 512      # rows per block of the all-pairs similarity matrix
+PAIR_BATCH         = 200_000  # candidate pairs scored per batch
+MINHASH_ROWS       = 2048     # statements hashed per batch
+MINHASH_PERMS      = 64
+LSH_BANDS          = 16       # of MINHASH_PERMS // LSH_BANDS rows each: pairs with Jaccard ~0.5 become candidates
+MAX_BUCKET         = 50       # larger LSH buckets are chained instead of fully paired
+FEATURE_BITS       = 24
+MIN_WORDS          = 3        # raw sentences with fewer content words (headings, labels) are skipped
+
+KINDS = ("requirement", "sentence")
+REQUIREMENT_SECTIONS = ("functional_requirements", "non_functional_requirements")
+
+_WORD_RE   = re.compile(r"[a-z][a-z0-9'-]*|\d+(?:\.\d+)?")
+_NUMBER_RE = re.compile(r"\d+(?:\.\d+)?$")
+STOP_WORDS = frozenset("""
+a an the to of and or in on for with by be is are as at it its this that these those from into via all any each
+system application app software platform solution able ability also so such their they them there then than
+can could would will should using
+""".split())
+NEGATIONS = frozenset("not no never cannot can't won't shouldn't mustn't without neither nor".split())
+# axis -> (positive terms, negative terms); a statement's terms on an axis are one of its claims
+OPPOSITES = {
+    "obligation": ("shall must required mandatory", "may optional optionally"),
+    "permission": ("allow allows allowed permit permits permitted grant grants", "prevent prevents prevented deny denies "
+                   "denied forbid forbids forbidden block blocks blocked prohibit prohibits prohibited"),
+    "enabled":    ("enable enables enabled", "disable disables disabled"),
+    "encryption": ("encrypt encrypts encrypted", "unencrypted plaintext"),
+    "inclusion":  ("include includes included", "exclude excludes excluded"),
+    "acceptance": ("accept accepts accepted", "reject rejects rejected"),
+    "visibility": ("public visible", "private hidden"),
+    "frequency":  ("always", "never"),
+    "limit":      ("maximum max", "minimum min"),
+    "connection": ("online", "offline"),
+    "sync":       ("synchronous synchronously", "asynchronous asynchronously"),
+}
+POLARITY = {term: (axis, sign) for axis, pair in OPPOSITES.items()
+            for sign, terms in zip((1, -1), pair) for term in terms.split()}
+POLARITY = {t: v for t, v in POLARITY.items() if t not in NEGATIONS}     # "never" is a negation first
+
+_MASK = np.uint64((1 << FEATURE_BITS) - 1)
+_rng  = np.random.default_rng(0x5EED)
+# multiply-shift hash family; odd multipliers keep each one a bijection on uint64
+_HASH_A = _rng.integers(1, 2 ** 63, MINHASH_PERMS, dtype=np.uint64) | np.uint64(1)
+_HASH_B = _rng.integers(0, 2 ** 63, MINHASH_PERMS, dtype=np.uint64)
+_BAND_MIX = _rng.integers(1, 2 ** 63, MINHASH_PERMS // LSH_BANDS, dtype=np.uint64) | np.uint64(1)
+_feature_ids = {}
+
+
+def _feature(term: str) -> int:
+    fid = _feature_ids.get(term)
+    if fid is None:
+        fid = _feature_ids[term] = zlib.crc32(term.encode())
+    return fid
+
+
+def analyze_statement(text: str) -> tuple:
+    """``(content words, claims)``; claims are ``(numbers, negated, ((axis, sign), ...))``."""
+    words, numbers, negated, polarity = [], [], False, {}
+    for w in _WORD_RE.findall(text.lower()):
+        if _NUMBER_RE.match(w):
+            numbers.append(w)
+        elif w in NEGATIONS or w.endswith("n't"):
+            negated = True
+        elif w in POLARITY:
+            axis, sign = POLARITY[w]
+            polarity.setdefault(axis, sign)
+        elif w not in STOP_WORDS and len(w) > 1:
+            words.append(w)
+    return words, (tuple(sorted(set(numbers))), negated, tuple(sorted(polarity.items())))
+
+
+def _features(words: list) -> list:
+    """Hashed ids of ``words`` and their bigrams, repeats included."""
+    return [_feature(t) for t in words] + [_feature(f"{a} {b}") for a, b in zip(words, words[1:])]
+
+
+def split_sentences(text: str) -> list:
+    """Sentences of ``text``, one line at a time, skipping those with fewer than ``MIN_WORDS`` content words."""
+    out = []
+    for line in text.splitlines():
+        start = 0
+        for end in [m.end() for m in SENTENCE_END_RE.finditer(line)] + [len(line)]:
+            sentence = line[start:end].strip(" \t-*•")
+            start = end
+            if len(analyze_statement(sentence)[0]) >= MIN_WORDS:
+                out.append(sentence)
+    return out
+
+
+def conflict(a: tuple, b: tuple):
+    """Why two statements' claims contradict each other, or None."""
+    (nums_a, neg_a, pol_a), (nums_b, neg_b, pol_b) = a, b
+    if neg_a != neg_b:
+        return "one is negated"
+    pol_a, pol_b = dict(pol_a), dict(pol_b)
+    for axis in pol_a.keys() & pol_b.keys():
+        if pol_a[axis] != pol_b[axis]:
+            return f"opposite {axis}"
+    if nums_a and nums_b and nums_a != nums_b:
+        return f"different values: {', '.join(nums_a)} vs {', '.join(nums_b)}"
+    return None
+
+
+class SimilarityIndex:
+    """Requirement statements from any number of documents, with their features and MinHash signatures."""
+
+    def __init__(self):
+        self.statements = []     # {"text", "kind", "doc", "section", "id"}
+        self.claims     = []
+        self._lengths, self._ids, self._counts, self._sigs = [], [], [], []
+
+    def __len__(self) -> int:
+        return len(self.statements)
+
+    # ── Adding statements ──
+    def add(self, texts: list, kind: str = "requirement", doc: str = None, section: str = None,
+            ids: list = None):
+        if kind not in KINDS:
+            raise ValueError(f"unknown kind {kind!r}; expected one of {KINDS}")
+        with span("similarity_add", statements=len(texts), kind=kind):
+            features, owners = [], []
+            for n, text in enumerate(texts):
+                words, claims = analyze_statement(text)
+                terms = _features(words)
+                features.extend(terms)
+                owners.extend([n] * len(terms))
+                self.claims.append(claims)
+                self.statements.append({"text": text, "kind": kind, "doc": doc, "section": section,
+                                        "id": ids[n] if ids else None})
+            if not texts:
+                return
+            # one sort for the whole batch: distinct (statement, feature) keys with their counts
+            keys, counts = np.unique(np.array(owners, np.uint64) << np.uint64(FEATURE_BITS)
+                                     | np.array(features, np.uint64) & _MASK, return_counts=True)
+            self._lengths.append(np.bincount((keys >> np.uint64(FEATURE_BITS)).astype(np.int64),
+                                             minlength=len(texts)))
+            self._ids.append(keys & _MASK)
+            self._counts.append(counts.astype(np.float32))
+            self._sigs.append(_minhash(self._lengths[-1], self._ids[-1]))
+
+    def add_analysis(self, result: dict, doc: str = None):
+        """Add an analysis' functional and non-functional requirements."""
+        for section in REQUIREMENT_SECTIONS:
+            items = [i for i in (result.get(section) or []) if isinstance(i, dict) and i.get("description")]
+            self.add([i["description"] for i in items], "requirement", doc, section, [i.get("id") for i in items])
+
+    def add_text(self, text: str, doc: str = None):
+        """Add a document's raw sentences."""
+        self.add(split_sentences(text), "sentence", doc)
+
+    # ── Scoring ──
+    def _matrix(self) -> tuple:
+        """Row-normalized TF-IDF vectors as CSR arrays ``(indptr, columns, weights)``."""
+        lengths = np.concatenate(self._lengths)
+        indptr  = np.concatenate([[0], np.cumsum(lengths)])
+        vocab, columns = np.unique(np.concatenate(self._ids), return_inverse=True)
+        rows    = np.repeat(np.arange(len(lengths)), lengths)
+        df      = np.bincount(columns, minlength=len(vocab))
+        weights = np.concatenate(self._counts) * (np.log((1 + len(lengths)) / (1 + df)) + 1)[columns].astype(np.float32)
+        norms   = np.sqrt(np.bincount(rows, weights=weights * weights, minlength=len(lengths)))
+        weights /= np.maximum(norms, 1e-12)[rows].astype(np.float32)
+        return indptr, columns, weights
+
+    def pairs(self, threshold: float) -> tuple:
+        """``(i, j, similarity)`` arrays of same-kind statement pairs at or above ``threshold``, ``i < j``."""
+        if len(self) < 2:
+            return np.empty(0, np.int64), np.empty(0, np.int64), np.empty(0, np.float32)
+        with span("similarity_pairs", statements=len(self)) as attrs:
+            indptr, columns, weights = self._matrix()
+            dense_mb = len(self) * (columns.max() + 1 if len(columns) else 1) * 4 / 2**20
+            if dense_mb <= BRUTE_FORCE_MB:
+                i, j, sim = _all_pairs(indptr, columns, weights, threshold)
+            else:
+                i, j = _lsh_candidates(np.concatenate(self._sigs), np.concatenate(self._lengths) > 0)
+                sim  = _pair_cosines(indptr, columns, weights, i, j)
+                keep = sim >= threshold - 1e-6
+                i, j, sim = i[keep], j[keep], sim[keep]
+            kinds = np.array([KINDS.index(s["kind"]) for s in self.statements])
+            same  = kinds[i] == kinds[j]
+            attrs["pairs"] = int(same.sum())
+            return i[same], j[same], sim[same]
+
+    def _scored(self, threshold: float, pairs: tuple = None) -> tuple:
+        if pairs is None:
+            return self.pairs(threshold)
+        keep = pairs[2] >= threshold - 1e-6
+        return tuple(p[keep] for p in pairs)
+
+    def duplicates(self, threshold: float = DUP_THRESHOLD, pairs: tuple = None) -> list:
+        """Clusters of statements that say the same thing; ``pairs`` reuses a ``pairs()`` result."""
+        i, j, sim = self._scored(threshold, pairs)
+        same = [conflict(self.claims[a], self.claims[b]) is None for a, b in zip(i.tolist(), j.tolist())]
+        i, j, sim = i[same], j[same], sim[same]
+        parent = list(range(len(self)))
+
+        def root(x):
+            while parent[x] != x:
+                parent[x] = parent[parent[x]]
+                x = parent[x]
+            return x
+        for a, b in zip(i.tolist(), j.tolist()):
+            parent[root(a)] = root(b)
+        clusters, floor = {}, {}
+        for a, b, s in zip(i.tolist(), j.tolist(), sim.tolist()):
+            r = root(a)
+            clusters.setdefault(r, set()).update((a, b))
+            floor[r] = min(floor.get(r, 1.0), s)
+        ordered = sorted(clusters, key=lambda r: min(clusters[r]))
+        return [{"id": f"DUP{n}", "similarity": round(floor[r], 3),
+                 "items": [self._item(m) for m in sorted(clusters[r])]} for n, r in enumerate(ordered, 1)]
+
+    def contradictions(self, threshold: float = CONFLICT_THRESHOLD, pairs: tuple = None) -> list:
+        """Pairs of similar statements whose numbers, negation or opposed terms disagree."""
+        i, j, sim = self._scored(threshold, pairs)
+        found = []
+        for a, b, s in zip(i.tolist(), j.tolist(), sim.tolist()):
+            reason = conflict(self.claims[a], self.claims[b])
+            if reason:
+                found.append((a, b, s, reason))
+        found.sort()
+        return [{"id": f"CTR{n}", "similarity": round(s, 3), "reason": reason,
+                 "items": [self._item(a), self._item(b)]} for n, (a, b, s, reason) in enumerate(found, 1)]
+
+    def report(self) -> dict:
+        pairs = self.pairs(min(DUP_THRESHOLD, CONFLICT_THRESHOLD))
+        return {"statements": len(self), "duplicate_clusters": self.duplicates(pairs=pairs),
+                "contradictions": self.contradictions(pairs=pairs)}
+
+    def _item(self, n: int) -> dict:
+        return {k: v for k, v in self.statements[n].items() if v is not None}
+
+    # ── Persistence ──
+    def save(self, path: str):
+        np.savez_compressed(
+            path, lengths=np.concatenate(self._lengths or [np.empty(0, np.int64)]),
+            ids=np.concatenate(self._ids or [np.empty(0, np.uint64)]),
+            counts=np.concatenate(self._counts or [np.empty(0, np.float32)]),
+            sigs=np.concatenate(self._sigs or [np.empty((0, MINHASH_PERMS), np.uint64)]),
+            meta=np.array(json.dumps({"statements": self.statements, "claims": self.claims})))
+
+    @classmethod
+    def load(cls, path: str) -> "SimilarityIndex":
+        index = cls()
+        with np.load(path) as data:
+            meta = json.loads(str(data["meta"]))
+            index.statements = meta["statements"]
+            index.claims = [(tuple(n), neg, tuple(tuple(p) for p in pol)) for n, neg, pol in meta["claims"]]
+            if len(data["lengths"]):
+                index._lengths, index._ids = [data["lengths"]], [data["ids"]]
+                index._counts, index._sigs = [data["counts"]], [data["sigs"]]
+        return index
+
+
+def _minhash(lengths: np.ndarray, ids: np.ndarray) -> np.ndarray:
+    """``MINHASH_PERMS`` minimum hashes per statement; a statement with no features keeps the maximum."""
+    sigs   = np.full((len(lengths), MINHASH_PERMS), np.iinfo(np.uint64).max, np.uint64)
+    indptr = np.concatenate([[0], np.cumsum(lengths)])
+    for lo in range(0, len(lengths), MINHASH_ROWS):
+        hi   = min(lo + MINHASH_ROWS, len(lengths))
+        rows = lo + np.flatnonzero(lengths[lo:hi])
+        if not len(rows):
+            continue
+        hashes = ids[indptr[lo]:indptr[hi], None] * _HASH_A + _HASH_B      # wraps mod 2**64
+        sigs[rows] = np.minimum.reduceat(hashes, indptr[rows] - indptr[lo], axis=0)
+    return sigs
+
+
+def _all_pairs(indptr, columns, weights, threshold) -> tuple:
+    n = len(indptr) - 1
+    dense = np.zeros((n, columns.max() + 1 if len(columns) else 1), np.float32)
+    dense[np.repeat(np.arange(n), np.diff(indptr)), columns] = weights
+    found = []
+    for start in range(0, n, BLOCK_ROWS):
+        sims = dense[start:start + BLOCK_ROWS] @ dense.T
+        i, j = np.nonzero(sims >= threshold - 1e-6)
+        keep = j > i + start
+        found.append((i[keep] + start, j[keep], sims[i[keep], j[keep]]))
+    return tuple(np.concatenate(parts) for parts in zip(*found))
+
+
+def _lsh_candidates(sigs: np.ndarray, filled: np.ndarray) -> tuple:
+    """Statement pairs sharing at least one LSH band, ``i < j``."""
+    rows = np.flatnonzero(filled)
+    per_band = MINHASH_PERMS // LSH_BANDS
+    found = []
+    for band in range(LSH_BANDS):
+        keys  = (sigs[rows, band * per_band:(band + 1) * per_band] * _BAND_MIX).sum(axis=1)
+        order = np.argsort(keys, kind="stable")
+        keys, members = keys[order], rows[order]
+        starts = np.flatnonzero(np.concatenate([[True], keys[1:] != keys[:-1]]))
+        sizes  = np.diff(np.append(starts, len(keys)))
+        # neighbours in a bucket always pair up; small buckets pair every member
+        chained = np.flatnonzero(np.concatenate([keys[1:] == keys[:-1], [False]]))
+        found.append((members[chained], members[chained + 1]))
+        for size in np.unique(sizes[(sizes > 2) & (sizes <= MAX_BUCKET)]):
+            a, b = np.triu_indices(size, 2)
+            first = starts[sizes == size][:, None]
+            found.append((members[first + a].ravel(), members[first + b].ravel()))
+    i, j = (np.concatenate(parts) for parts in zip(*found))
+    i, j = np.minimum(i, j), np.maximum(i, j)
+    pairs = np.unique(i * len(sigs) + j)
+    return pairs // len(sigs), pairs % len(sigs)
+
+
+def _pair_cosines(indptr, columns, weights, i, j) -> np.ndarray:
+    """Cosine similarity of each ``(i[p], j[p])`` pair: matching columns of the two rows, multiplied."""
+    sims = np.zeros(len(i), np.float32)
+    width = np.int64(columns.max() + 1 if len(columns) else 1)
+    for lo in range(0, len(i), PAIR_BATCH):
+        a, b = i[lo:lo + PAIR_BATCH], j[lo:lo + PAIR_BATCH]
+        keys, vals, owners = [], [], []
+        for rows in (a, b):
+            lengths = indptr[rows + 1] - indptr[rows]
+            pair    = np.repeat(np.arange(len(rows)), lengths)
+            entry   = np.repeat(indptr[rows] - np.cumsum(lengths) + lengths, lengths) + np.arange(lengths.sum())
+            keys.append(pair * width + columns[entry])
+            vals.append(weights[entry])
+            owners.append(pair)
+        keys, vals, owners = np.concatenate(keys), np.concatenate(vals), np.concatenate(owners)
+        order = np.argsort(keys, kind="stable")
+        keys, vals, owners = keys[order], vals[order], owners[order]
+        # a row has each column once, so equal neighbouring keys are one entry from each row
+        same = np.flatnonzero(keys[1:] == keys[:-1])
+        sims[lo:lo + len(a)] = np.bincount(owners[same], weights=vals[same] * vals[same + 1], minlength=len(a))
+    return sims
+
+
+def check(result: dict, text: str = None) -> dict:
+    """Duplicates and contradictions within one analyzed document (and its raw sentences)."""
+    index = SimilarityIndex()
+    index.add_analysis(result)
+    if text:
+        index.add_text(text)
+    report = index.report()
+    del report["statements"]
+    return report
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Find duplicate and conflicting requirements across a portfolio.")
+    ap.add_argument("results", nargs="?", help="JSONL written by batch.py")
+    ap.add_argument("--docs", help="also compare the raw sentences of the documents in this directory")
+    ap.add_argument("--index", help="load this index first if it exists, and save the grown index to it")
+    ap.add_argument("-o", "--output", help="write the JSON report here (default: stdout)")
+    args = ap.parse_args(argv)
+
+    index = SimilarityIndex.load(args.index) if args.index and os.path.exists(args.index) else SimilarityIndex()
+    if args.results:
+        with open(args.results, encoding="utf-8") as f:
+            for line in f:
+                rec = json.loads(line)
+                if rec.get("result"):
+                    index.add_analysis(rec["result"], rec["path"])
+    if args.docs:
+        from extractor import extract_text
+        from batch import find_documents
+        for path in find_documents(args.docs):
+            index.add_text(extract_text(path), path)
+    if args.index:
+        index.save(args.index)
+
+    report = json.dumps(index.report(), ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(report)
+    else:
+        print(report)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,317 @@
+"""Persistent history of analyses and comparisons in an embedded SQLite database.
+
+Each saved analysis keeps the document hash, source name, first/last saved
+times, quality sub-scores, item counts per section and the full JSON, indexed
+for lookup by hash, project type, score range and recency. Saving only queues
+the row: one writer thread commits queued rows in batches, so the request path
+never waits on disk. Reads use their own connection per thread (WAL mode lets
+them run alongside the writer).
+
+    python store.py export history.jsonl [--kind analysis] [--type FinTech] [--min-score 60] [--max-score 90]
+"""
+import os, csv, sys, json, time, queue, sqlite3, argparse, threading
+
+from cache import make_key, normalize_text
+from metrics import span
+
+STORE_PATH    = os.environ.get("REQMIND_STORE", "reqmind_history.db")
+STORE_ENABLED = os.environ.get("REQMIND_STORE_ENABLED", "1").lower() not in ("0", "false", "off", "no")
+WRITE_BATCH   = 256     # queued rows committed per transaction at most
+HISTORY_LIMIT = 200
+
+KINDS = ("analysis", "comparison")
+SCORE_FIELDS = ("overall", "clarity", "completeness", "consistency", "testability")
+# column -> result section counted into it
+ANALYSIS_COUNTS = {
+    "functional_count":     "functional_requirements",
+    "non_functional_count": "non_functional_requirements",
+    "ambiguity_count":      "ambiguities",
+    "missing_count":        "missing_information",
+    "risk_count":           "risks",
+    "question_count":       "clarification_questions",
+}
+COMPARISON_COUNTS = {"added_count": "added", "removed_count": "removed", "modified_count": "modified"}
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS analyses (
+    id           INTEGER PRIMARY KEY,
+    doc_hash     TEXT NOT NULL,
+    sections     TEXT NOT NULL DEFAULT '',
+    source       TEXT,
+    created_at   REAL NOT NULL,
+    updated_at   REAL NOT NULL,
+    project_type TEXT,
+    complexity   TEXT,
+    {", ".join(f"{f} REAL" for f in SCORE_FIELDS)},
+    {", ".join(f"{c} INTEGER" for c in ANALYSIS_COUNTS)},
+    result       TEXT NOT NULL,
+    UNIQUE (doc_hash, sections)
+);
+CREATE INDEX IF NOT EXISTS analyses_type_score ON analyses (project_type, overall);
+CREATE INDEX IF NOT EXISTS analyses_score      ON analyses (overall);
+CREATE INDEX IF NOT EXISTS analyses_updated    ON analyses (updated_at);
+
+CREATE TABLE IF NOT EXISTS comparisons (
+    id           INTEGER PRIMARY KEY,
+    old_hash     TEXT NOT NULL,
+    new_hash     TEXT NOT NULL,
+    old_source   TEXT,
+    new_source   TEXT,
+    created_at   REAL NOT NULL,
+    updated_at   REAL NOT NULL,
+    old_score    REAL,
+    new_score    REAL,
+    verdict      TEXT,
+    {", ".join(f"{c} INTEGER" for c in COMPARISON_COUNTS)},
+    result       TEXT NOT NULL,
+    UNIQUE (old_hash, new_hash)
+);
+CREATE INDEX IF NOT EXISTS comparisons_new     ON comparisons (new_hash);
+CREATE INDEX IF NOT EXISTS comparisons_updated ON comparisons (updated_at);
+"""
+# summary columns listed in the history (everything but the JSON)
+LIST_COLUMNS = {
+    "analysis":   ("id", "doc_hash", "sections", "source", "created_at", "updated_at", "project_type", "complexity",
+                   *SCORE_FIELDS, *ANALYSIS_COUNTS),
+    "comparison": ("id", "old_hash", "new_hash", "old_source", "new_source", "created_at", "updated_at",
+                   "old_score", "new_score", "verdict", *COMPARISON_COUNTS),
+}
+TABLES = {"analysis": "analyses", "comparison": "comparisons"}
+
+
+def document_hash(text: str) -> str:
+    """Hash of ``text`` after whitespace normalization, so re-extracted copies of a document match."""
+    return make_key(normalize_text(text))
+
+
+def _number(value):
+    return value if isinstance(value, (int, float)) and not isinstance(value, bool) else None
+
+
+def _count(value):
+    """Items in a list section, or across the lists of a grouped one (clarification_questions by role)."""
+    if isinstance(value, list):
+        return len(value)
+    if isinstance(value, dict):
+        return sum(len(v) for v in value.values() if isinstance(v, list))
+    return None
+
+
+def _analysis_row(text: str, result: dict, source: str, sections, now: float) -> dict:
+    qs, pi = result.get("quality_score") or {}, result.get("project_info") or {}
+    return {"doc_hash": document_hash(text), "sections": ",".join(sorted(sections or ())), "source": source,
+            "created_at": now, "updated_at": now,
+            "project_type": pi.get("detected_type"), "complexity": pi.get("complexity"),
+            **{f: _number(qs.get(f)) for f in SCORE_FIELDS},
+            **{c: _count(result.get(s)) if not sections or s in sections else None
+               for c, s in ANALYSIS_COUNTS.items()},
+            "result": json.dumps(result, ensure_ascii=False)}
+
+
+def _comparison_row(old_text: str, new_text: str, result: dict, old_source: str, new_source: str,
+                    now: float) -> dict:
+    qc = result.get("quality_change") or {}
+    return {"old_hash": document_hash(old_text), "new_hash": document_hash(new_text),
+            "old_source": old_source, "new_source": new_source, "created_at": now, "updated_at": now,
+            "old_score": _number(qc.get("old_score")), "new_score": _number(qc.get("new_score")),
+            "verdict": qc.get("verdict"),
+            **{c: _count(result.get(s)) for c, s in COMPARISON_COUNTS.items()},
+            "result": json.dumps(result, ensure_ascii=False)}
+
+
+def _upsert(table: str, row: dict, unique: tuple) -> str:
+    """INSERT for ``row`` that refreshes an existing row with the same ``unique`` key but keeps its created_at."""
+    columns = ", ".join(row)
+    updates = ", ".join(f"{c} = excluded.{c}" for c in row if c not in unique and c != "created_at")
+    return (f"INSERT INTO {table} ({columns}) VALUES ({', '.join(':' + c for c in row)}) "
+            f"ON CONFLICT ({', '.join(unique)}) DO UPDATE SET {updates}")
+
+
+class AnalysisStore:
+    """SQLite history of results; ``save_*`` return at once and a background thread writes."""
+
+    def __init__(self, path=STORE_PATH, enabled=STORE_ENABLED):
+        self.path    = path
+        self.enabled = enabled
+        self.written = 0
+        self.failed  = 0
+        self._queue  = queue.Queue()
+        self._local  = threading.local()
+        self._lock   = threading.Lock()
+        self._writer = None
+        self._ready  = False
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _conn(self) -> sqlite3.Connection:
+        """This thread's read connection, creating the schema on first use."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            if os.path.dirname(self.path):
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            conn = self._local.conn = self._connect()
+            with self._lock:
+                if not self._ready:
+                    conn.executescript(SCHEMA)
+                    self._ready = True
+        return conn
+
+    # ── Writes (queued) ──
+    def save_analysis(self, text: str, result: dict, source: str = None, sections=None):
+        """Queue ``result`` of analyzing ``text``; ``sections`` is the selection it covers (None for all)."""
+        self._put(("analyses", ("doc_hash", "sections"), _analysis_row, (text, result, source, sections)))
+
+    def save_comparison(self, old_text: str, new_text: str, result: dict, old_source: str = None,
+                        new_source: str = None):
+        self._put(("comparisons", ("old_hash", "new_hash"), _comparison_row,
+                   (old_text, new_text, result, old_source, new_source)))
+
+    def _put(self, item):
+        if not self.enabled:
+            return
+        # the row is built from the caller's arguments when written; they are not copied
+        self._queue.put((time.time(), item))
+        with self._lock:
+            if self._writer is None or not self._writer.is_alive():
+                self._writer = threading.Thread(target=self._write_loop, name="store-writer", daemon=True)
+                self._writer.start()
+
+    def _write_loop(self):
+        conn = self._conn()
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < WRITE_BATCH:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            rows = [entry for entry in batch if not isinstance(entry, threading.Event)]
+            try:
+                with span("store_write", rows=len(rows)), conn:
+                    for entry in rows:
+                        self._execute(conn, *entry)
+                self.written += len(rows)
+            except (sqlite3.Error, TypeError, ValueError):
+                # one bad row must not cost the rest of the batch
+                for entry in rows:
+                    try:
+                        with conn:
+                            self._execute(conn, *entry)
+                        self.written += 1
+                    except (sqlite3.Error, TypeError, ValueError):
+                        self.failed += 1
+            for entry in batch:
+                if isinstance(entry, threading.Event):
+                    entry.set()
+
+    @staticmethod
+    def _execute(conn, now, item):
+        table, unique, build, args = item
+        row = build(*args, now)
+        conn.execute(_upsert(table, row, unique), row)
+
+    def flush(self, timeout: float = None) -> bool:
+        """Wait until everything queued so far is written; False on timeout."""
+        with self._lock:
+            if self._writer is None:
+                return True
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    # ── Reads ──
+    def history(self, kind: str = "analysis", project_type: str = None, min_score: float = None,
+                max_score: float = None, doc_hash: str = None, limit: int = HISTORY_LIMIT, offset: int = 0) -> list:
+        """Summary rows (no JSON), newest first. Score bounds filter analyses on ``overall`` and
+        comparisons on ``new_score``; ``doc_hash`` matches an analysed or new compared document."""
+        sql, params = self._select(kind, LIST_COLUMNS[kind], project_type, min_score, max_score, doc_hash)
+        rows = self._conn().execute(sql + " ORDER BY updated_at DESC LIMIT ? OFFSET ?", (*params, limit, offset))
+        return [dict(r) for r in rows]
+
+    def load(self, row_id: int, kind: str = "analysis"):
+        """The full result saved as ``row_id``, or None."""
+        row = self._conn().execute(f"SELECT result FROM {self._table(kind)} WHERE id = ?", (row_id,)).fetchone()
+        return json.loads(row["result"]) if row else None
+
+    def project_types(self) -> list:
+        rows = self._conn().execute("SELECT DISTINCT project_type FROM analyses WHERE project_type IS NOT NULL "
+                                    "ORDER BY project_type")
+        return [r[0] for r in rows]
+
+    def export(self, path: str, kind: str = "analysis", project_type: str = None, min_score: float = None,
+               max_score: float = None) -> int:
+        """Write matching rows to ``path``: JSON lines with the full result, or CSV of the summary columns
+        for a ``.csv`` path. Streams from the database; returns the number of rows."""
+        csv_out = path.lower().endswith(".csv")
+        columns = LIST_COLUMNS[kind] + (() if csv_out else ("result",))
+        sql, params = self._select(kind, columns, project_type, min_score, max_score)
+        count = 0
+        with span("store_export", kind=kind) as attrs, open(path, "w", encoding="utf-8", newline="") as f:
+            writer = csv.writer(f) if csv_out else None
+            if writer:
+                writer.writerow(columns)
+            for row in self._conn().execute(sql + " ORDER BY id", params):
+                if writer:
+                    writer.writerow(tuple(row))
+                else:
+                    rec = dict(row)
+                    rec["result"] = json.loads(rec["result"])
+                    f.write(json.dumps(rec, ensure_ascii=False) + "\n")
+                count += 1
+            attrs["rows"] = count
+        return count
+
+    def _table(self, kind: str) -> str:
+        if kind not in TABLES:
+            raise ValueError(f"unknown kind {kind!r}; expected one of {KINDS}")
+        return TABLES[kind]
+
+    def _select(self, kind, columns, project_type=None, min_score=None, max_score=None, doc_hash=None) -> tuple:
+        table = self._table(kind)
+        score = "overall" if kind == "analysis" else "new_score"
+        where, params = [], []
+        if project_type:
+            if kind != "analysis":
+                raise ValueError("comparisons have no project type")
+            where.append("project_type = ?")
+            params.append(project_type)
+        if min_score is not None:
+            where.append(f"{score} >= ?")
+            params.append(min_score)
+        if max_score is not None:
+            where.append(f"{score} <= ?")
+            params.append(max_score)
+        if doc_hash:
+            where.append("doc_hash = ?" if kind == "analysis" else "new_hash = ?")
+            params.append(doc_hash)
+        sql = f"SELECT {', '.join(columns)} FROM {table}" + (" WHERE " + " AND ".join(where) if where else "")
+        return sql, params
+
+
+analysis_store = AnalysisStore()
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Export saved analyses or comparisons.")
+    sub = ap.add_subparsers(dest="command", required=True)
+    exp = sub.add_parser("export", help="write rows as JSON lines (or CSV summaries for a .csv path)")
+    exp.add_argument("output")
+    exp.add_argument("--kind", choices=KINDS, default="analysis")
+    exp.add_argument("--type", dest="project_type", help="only this detected project type")
+    exp.add_argument("--min-score", type=float)
+    exp.add_argument("--max-score", type=float)
+    ap.add_argument("--db", default=STORE_PATH, help="database file (default: $REQMIND_STORE or %(default)s)")
+    args = ap.parse_args(argv)
+
+    count = AnalysisStore(args.db).export(args.output, args.kind, args.project_type, args.min_score, args.max_score)
+    print(f"exported {count} {args.kind} row(s) to {args.output}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,45 @@
+import json
+
+import pytest
+
+from batch import main, drop_partial_line, load_done
+
+
+def test_resume_drops_a_cut_off_record(tmp_path):
+    out = tmp_path / "results.jsonl"
+    out.write_text('{"path": "a.txt"}\n{"path": "b.txt"}\n{"path": "c.t')
+    drop_partial_line(str(out))
+    assert out.read_text() == '{"path": "a.txt"}\n{"path": "b.txt"}\n'
+    assert load_done(str(out)) == {"a.txt", "b.txt"}
+
+
+def test_resume_keeps_complete_output(tmp_path):
+    out = tmp_path / "results.jsonl"
+    out.write_text('{"path": "a.txt"}\n')
+    drop_partial_line(str(out))
+    assert out.read_text() == '{"path": "a.txt"}\n'
+
+    out.write_text('{"path": "a.t')          # nothing complete yet
+    drop_partial_line(str(out))
+    assert out.read_text() == ""
+
+
+@pytest.fixture
+def scheduler():
+    import analyzer
+    limits = analyzer._scheduler.rpm, analyzer._scheduler.tpm
+    yield analyzer._scheduler
+    analyzer._scheduler.configure(*limits)
+
+
+def test_retry_errors_replaces_the_failed_record(tmp_path, scheduler):
+    docs = tmp_path / "docs"
+    docs.mkdir()
+    (docs / "short.txt").write_text("too short")        # fails without an LLM call
+    out = tmp_path / "results.jsonl"
+    main([str(docs), "-o", str(out), "--extract-procs", "1", "--rpm", "12", "--tpm", "3000"])
+    assert (scheduler.rpm, scheduler.tpm) == (12, 3000)
+
+    main([str(docs), "-o", str(out), "--extract-procs", "1", "--resume", "--retry-errors"])
+    records = [json.loads(line) for line in out.read_text().splitlines()]
+    assert [r["name"] for r in records] == ["short.txt"]
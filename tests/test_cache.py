@@ -0,0 +1,31 @@
+import os
+
+import cache
+from cache import ResultCache
+from metrics import CACHE_EVENTS
+
+
+def test_write_error_keeps_the_result(tmp_path):
+    blocked = tmp_path / "not-a-dir"
+    blocked.write_text("")                   # makedirs under a file fails with an OSError
+    rc = ResultCache(str(blocked), enabled=True)
+    failed, misses = CACHE_EVENTS.value(event="write_error"), CACHE_EVENTS.value(event="miss")
+    rc.set("ab" * 32, {"ok": True})
+    assert rc.failed == 1
+    assert rc.get("ab" * 32) is None
+    assert CACHE_EVENTS.value(event="write_error") == failed + 1
+    assert CACHE_EVENTS.value(event="miss") == misses + 1
+
+
+def test_size_bound_without_rescanning_each_write(tmp_path, monkeypatch):
+    rc = ResultCache(str(tmp_path), max_bytes=4000, enabled=True)
+    scans = []
+    evict = rc.evict
+    monkeypatch.setattr(rc, "evict", lambda: (scans.append(1), evict()))
+    monkeypatch.setattr(cache, "EVICT_EVERY", 1000)
+    for i in range(100):
+        rc.set(f"{i:064x}", {"text": "x" * 100})
+    on_disk = sum(os.path.getsize(os.path.join(r, f)) for r, _, fs in os.walk(tmp_path) for f in fs)
+    assert on_disk <= 4000
+    assert len(scans) <= 25
+    assert rc.get(f"{99:064x}") == {"text": "x" * 100}
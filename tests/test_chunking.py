@@ -0,0 +1,87 @@
+import io
+
+import pytest
+
+from chunking import estimate_tokens, merge_results, split_sections
+
+DOC = """1. Introduction
+This document describes the order portal.
+
+2. Functional Requirements
+REQ-1: The system shall let a customer place an order.
+REQ-2: The system shall email a receipt after payment.
+
+3. Performance
+REQ-3: Search results shall load within 2 seconds.
+"""
+
+
+def _chunk(frs, score=None, **extra):
+    part = {"functional_requirements": [{"id": f"FR{i}", "description": d} for i, d in enumerate(frs, 1)],
+            "ambiguities": [], "summary": {"recommendation": "r"}, **extra}
+    if score is not None:
+        part["quality_score"] = {"overall": score, "clarity": score, "completeness": score,
+                                 "consistency": score, "testability": score}
+    return part
+
+
+def test_split_keeps_sections_together_and_within_budget():
+    chunks = split_sections(DOC, 40)
+    assert len(chunks) > 1
+    assert all(estimate_tokens(c) <= 40 for c in chunks)
+    assert "REQ-1" in chunks[1] and "REQ-2" in chunks[1]        # one section, one chunk
+    assert "".join(chunks).replace("\n", "") == DOC.replace("\n", "")
+
+
+def test_split_cuts_an_oversized_line():
+    chunks = split_sections("x" * 400, 20)
+    assert len(chunks) == 5 and all(len(c) <= 20 * 4 for c in chunks)     # ~4 characters per token
+    assert "".join(chunks) == "x" * 400
+
+
+def test_merge_dedupes_and_renumbers_in_document_order():
+    merged = merge_results([
+        _chunk(["The system shall let a customer place an order.", "Customers can cancel orders."], 60),
+        _chunk(["The system shall let a customer place an order", "Receipts are emailed after payment."], 80),
+    ])
+    frs = merged["functional_requirements"]
+    assert [f["id"] for f in frs] == ["FR1", "FR2", "FR3"]
+    assert [f["description"] for f in frs] == ["The system shall let a customer place an order.",
+                                               "Customers can cancel orders.", "Receipts are emailed after payment."]
+
+
+def test_merge_recomputes_summary_totals():
+    merged = merge_results([
+        _chunk(["Export invoices as PDF."], 70, ambiguities=[{"id": "AMB1", "text": "fast enough"}]),
+        _chunk(["Import invoices from CSV."], 70, ambiguities=[{"id": "AMB1", "text": "user friendly"}]),
+    ])
+    assert merged["summary"]["total_fr"] == 2
+    assert merged["summary"]["total_ambiguities"] == 2
+    assert [a["id"] for a in merged["ambiguities"]] == ["AMB1", "AMB2"]
+    assert merged["project_info"]["total_requirements_count"] == 2
+
+
+def test_merge_skips_unscored_chunks_in_the_weighted_score():
+    merged = merge_results([_chunk(["A."], 80), _chunk(["B."]), _chunk(["C."], 60)], weights=[1, 5, 3])
+    assert merged["quality_score"]["overall"] == round((80 * 1 + 60 * 3) / 4)
+    assert merged["summary"]["overall_quality"] == "Fair"
+
+    unscored = merge_results([_chunk(["A."]), _chunk(["B."])])
+    assert unscored["quality_score"]["overall"] is None
+    assert unscored["summary"]["overall_quality"] == "Not scored"
+
+
+def test_unscored_merge_renders():
+    from pdf_generator import render_pdf
+    from pypdf import PdfReader
+
+    unscored = merge_results([_chunk(["Export invoices as PDF."]), _chunk(["Import invoices from CSV."])])
+    text = "".join(p.extract_text() for p in PdfReader(io.BytesIO(render_pdf(unscored).data)).pages)
+    assert "Not scored" in text
+
+
+def test_unscored_merge_score_card():
+    app = pytest.importorskip("app")
+    unscored = merge_results([_chunk(["Export invoices as PDF."])])
+    html = app.score_html(unscored)
+    assert "Not scored" in html and "None" not in html
@@ -0,0 +1,14 @@
+from doc_diff import diff_documents
+
+OLD = "REQ-1: Users must log in with SSO.\nREQ-2: Reports export as   PDF.\n"
+
+
+def test_whitespace_only_changes_are_identical():
+    assert diff_documents(OLD, "REQ-1:  Users must log in with SSO.\n\nREQ-2: Reports export as PDF.").identical
+
+
+def test_case_only_changes_are_kept():
+    diff = diff_documents(OLD, OLD.replace("must", "MUST"))
+    assert not diff.identical
+    assert diff.hunks[0].old == ["REQ-1: Users must log in with SSO."]
+    assert diff.hunks[0].new == ["REQ-1: Users MUST log in with SSO."]
@@ -0,0 +1,39 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import extractor
+
+
+@pytest.fixture
+def pdf(tmp_path):
+    canvas = pytest.importorskip("reportlab.pdfgen.canvas")
+    path = str(tmp_path / "srs.pdf")
+    c = canvas.Canvas(path)
+    for page in range(20):
+        for line in range(40):
+            c.drawString(40, 800 - line * 18, f"REQ-{page}.{line}: The system shall archive order {line} nightly.")
+        c.showPage()
+    c.save()
+    return path
+
+
+def test_timeout_leaves_other_callers_intact(pdf, monkeypatch):
+    monkeypatch.setattr(extractor, "PDF_PAGES_PER_TASK", 2)
+    extractor._page_cache.clear()
+    with ThreadPoolExecutor(2) as threads:
+        rushed = threads.submit(extractor.extract_pdf_pages, pdf, timeout=0.001)
+        patient = threads.submit(extractor.extract_pdf_pages, pdf, timeout=60)
+        try:
+            rushed.result()
+        except TimeoutError:
+            pass
+        pages = patient.result()
+    assert len(pages) == 20 and all("REQ-" in p.text for p in pages)
+
+
+def test_worker_errors_are_raised(tmp_path):
+    broken = tmp_path / "broken.pdf"
+    broken.write_bytes(b"%PDF-1.4 not really a pdf")
+    with pytest.raises(Exception):
+        extractor.extract_pdf_pages(str(broken))
@@ -0,0 +1,32 @@
+import os, re, sys, subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CORE      = "import analyzer, extractor, pdf_generator, store, batch, routing, scheduler, prescan"
+BUDGET_MS = 400
+HEAVY     = ("gradio", "numpy", "pandas", "pypdf", "pdfplumber")
+STARTUP   = ("site", "encodings")     # interpreter start-up, not ours
+LINE_RE   = re.compile(r"import time:\s+\d+ \|\s+(\d+) \|( *)(\S+)")
+
+
+def _import_core() -> tuple:
+    """``(milliseconds, top-level modules loaded)`` for one cold import of the core modules."""
+    env = {k: v for k, v in os.environ.items() if k != "GROQ_API_KEY"}
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", CORE], cwd=ROOT, env=env,
+                          capture_output=True, text=True)
+    assert proc.returncode == 0, proc.stderr[-2000:]
+    total, modules = 0, set()
+    for m in map(LINE_RE.match, proc.stderr.splitlines()):
+        if m:
+            modules.add(m.group(3).split(".")[0])
+            if len(m.group(2)) == 1 and m.group(3) not in STARTUP:
+                total += int(m.group(1)) / 1000
+    return total, modules
+
+
+def test_core_import_is_light():
+    # best of three: a cold interpreter on a busy machine is noisy
+    runs = [_import_core() for _ in range(3)]
+    ms, modules = min(runs, key=lambda r: r[0])
+    assert not set(HEAVY) & modules
+    assert ms <= BUDGET_MS, f"core modules import in {ms:.0f} ms (budget {BUDGET_MS} ms)"
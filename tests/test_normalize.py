@@ -0,0 +1,17 @@
+from normalize import normalize_document, strip_page_furniture
+
+
+def test_numbers_in_content_survive():
+    text = "Supported years:\n2023\n2024\nMax users:\n500\nREQ-1: The system shall archive records."
+    assert normalize_document(text) == text
+
+
+def test_page_labels_are_dropped():
+    text = "REQ-1: Export invoices.\nPage 3\n3 of 40\n- 3 -\nREQ-2: Import invoices."
+    assert normalize_document(text) == "REQ-1: Export invoices.\nREQ-2: Import invoices."
+
+
+def test_bare_page_numbers_at_page_edges_are_furniture():
+    pages = [f"REQ-{n}: The system shall cap batch {n} at\n{n}00\nrecords per run of job {n}.\n{n}" for n in range(1, 6)]
+    out = strip_page_furniture(pages)
+    assert out == [f"REQ-{n}: The system shall cap batch {n} at\n{n}00\nrecords per run of job {n}." for n in range(1, 6)]
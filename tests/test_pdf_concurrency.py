@@ -0,0 +1,30 @@
+import io, os, sys
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+
+from pypdf import PdfReader
+
+from bench_pdf_concurrency import make_analysis
+from pdf_generator import render_pdf, prefetch_pdf, cached_report
+
+REPORTS = 16
+
+
+def _markers(data: bytes) -> set:
+    text = "".join(p.extract_text() or "" for p in PdfReader(io.BytesIO(data)).pages)
+    return {word[:10] for word in text.split() if word.startswith("MARKER")}
+
+
+def test_concurrent_renders_keep_their_own_content():
+    with ThreadPoolExecutor(max_workers=REPORTS) as pool:
+        reports = list(pool.map(lambda n: render_pdf(make_analysis(n)), range(REPORTS)))
+    for n, report in enumerate(reports):
+        assert _markers(report.data) == {f"MARKER{n:04d}"}
+
+
+def test_concurrent_prefetches_keep_their_own_content():
+    with ThreadPoolExecutor(max_workers=REPORTS) as pool:
+        keys = list(pool.map(lambda n: prefetch_pdf(make_analysis(n + 100)), range(REPORTS)))
+    for n, key in enumerate(keys):
+        assert _markers(cached_report(key, timeout=60).data) == {f"MARKER{n + 100:04d}"}
@@ -0,0 +1,45 @@
+from store import AnalysisStore, document_hash
+
+TEXT = "REQ-1: The system shall export monthly reports as PDF within 5 seconds."
+RESULT = {
+    "project_info": {"detected_type": "ERP", "complexity": "Small"},
+    "quality_score": {"overall": 70},
+    "functional_requirements": [{"id": "FR1"}, {"id": "FR2"}],
+    "non_functional_requirements": [{"id": "NFR1"}],
+    "ambiguities": [],
+    "missing_information": [{"id": "MI1"}],
+    "risks": [{"id": "R1"}, {"id": "R2"}, {"id": "R3"}],
+    "clarification_questions": {
+        "client":    [{"id": "CQ1", "question": "Who receives the reports?"},
+                      {"id": "CQ2", "question": "Is a month a calendar month?"}],
+        "developer": [{"id": "DQ1", "question": "Which PDF layout is expected?"}],
+        "tester":    [],
+    },
+}
+
+
+def _saved(tmp_path, **kwargs):
+    store = AnalysisStore(str(tmp_path / "history.db"))
+    store.save_analysis(TEXT, RESULT, "srs.pdf", **kwargs)
+    assert store.flush(timeout=5)
+    rows = store.history(doc_hash=document_hash(TEXT))
+    assert len(rows) == 1
+    return rows[0]
+
+
+def test_counts_read_back(tmp_path):
+    row = _saved(tmp_path)
+    assert row["functional_count"] == 2
+    assert row["non_functional_count"] == 1
+    assert row["ambiguity_count"] == 0
+    assert row["missing_count"] == 1
+    assert row["risk_count"] == 3
+    assert row["question_count"] == 3          # summed over the role lists
+
+
+def test_unselected_sections_are_null(tmp_path):
+    row = _saved(tmp_path, sections=("risks", "clarification_questions"))
+    assert row["risk_count"] == 3
+    assert row["question_count"] == 3
+    assert row["functional_count"] is None
+    assert row["ambiguity_count"] is None
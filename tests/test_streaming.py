@@ -0,0 +1,39 @@
+import os, sys, asyncio
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+
+TEXT = "\n".join(f"REQ-{i}: The system shall let a clerk export invoice batch {i} as CSV within 2 seconds."
+                 for i in range(1, 13))
+
+
+@pytest.fixture(scope="module")
+def analyzer():
+    from fake_groq import FakeGroq
+    with FakeGroq(latency=0.01, tokens_per_s=20000) as fake:
+        saved = {k: os.environ.get(k) for k in ("GROQ_BASE_URL", "GROQ_API_KEY")}
+        os.environ.update(GROQ_BASE_URL=fake.base_url, GROQ_API_KEY="test")
+        import analyzer
+        yield analyzer
+        for k, v in saved.items():
+            if v is None:
+                os.environ.pop(k, None)
+            else:
+                os.environ[k] = v
+
+
+def test_streamed_totals_match_sync(analyzer):
+    sync = analyzer.analyze_requirements(TEXT, use_cache=False)
+
+    async def stream():
+        latest = {}
+        async for section, value in analyzer.stream_analysis_async(TEXT, use_cache=False):
+            latest[section] = value
+        return latest
+
+    streamed = asyncio.run(stream())
+    total = sync["project_info"]["total_requirements_count"]
+    assert total > 0
+    assert streamed["project_info"]["total_requirements_count"] == total
+    assert streamed["summary"]["total_fr"] == sync["summary"]["total_fr"]